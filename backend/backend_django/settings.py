@@ -187,3 +187,197 @@ GOOGLE_APPLICATION_CREDENTIALS = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'
 # Audio file settings
 AUDIO_UPLOAD_MAX_SIZE = 50 * 1024 * 1024  # 50MB max audio file size
 ALLOWED_AUDIO_TYPES = ['audio/wav', 'audio/mp3', 'audio/mpeg', 'audio/m4a', 'audio/aac', 'audio/webm', 'audio/ogg']
+
+# AI analysis single-flight: one process generates a (resume, job) report, others wait on it
+AI_ANALYSIS_LOCK_LEASE_SECONDS = 120  # lease after which a crashed leader's lock can be taken over
+AI_ANALYSIS_LOCK_WAIT_SECONDS = 25  # how long followers wait before returning 202 with a poll token
+AI_ANALYSIS_LOCK_POLL_INTERVAL = 0.5
+
+# DB-backed background task queue (run workers with `python manage.py run_workers`)
+TASK_QUEUE = {
+    'VISIBILITY_TIMEOUT_SECONDS': 300,  # a claimed task not finished within this is handed to another worker
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE_SECONDS': 5,  # retry delay doubles per attempt from this base
+    'BACKOFF_MAX_SECONDS': 600,
+}
+# When True, the student `analysis` endpoint queues generation and returns 202 instead of running it inline
+AI_ANALYSIS_ASYNC = os.getenv('AI_ANALYSIS_ASYNC', 'false').lower() == 'true'
+
+# Multi-job AI analysis: the resume and instructions are sent once per batch of this many jobs
+AI_ANALYSIS_BATCH_SIZE = 5
+# Gemini context caching for the shared batch prefix (resume + instructions); only used above MIN_TOKENS
+AI_ANALYSIS_CONTEXT_CACHE = {
+    'ENABLED': os.getenv('AI_ANALYSIS_CONTEXT_CACHE', 'false').lower() == 'true',
+    'MIN_TOKENS': 4096,
+    'TTL_SECONDS': 300,
+}
+
+# Job ranking cascade: vector similarity over all jobs -> local re-rank -> Gemini only for the top few
+RANKING_CASCADE = {
+    'VECTOR_TOP_K': 300,
+    'RERANK_TOP_K': 50,
+    'LLM_TOP_K': 5,
+    'LLM_PREFETCH': os.getenv('RANKING_LLM_PREFETCH', 'false').lower() == 'true',  # queue batch analyses for the top LLM_TOP_K
+    'CROSS_ENCODER_MODEL': os.getenv('RANKING_CROSS_ENCODER_MODEL', ''),  # empty uses the lexical feature re-ranker
+}
+
+# Shared LLM response cache (in-process LRU in front of the LLMResponseCache table); only parse-validated outputs are stored
+LLM_RESPONSE_CACHE = {
+    'ENABLED': os.getenv('LLM_RESPONSE_CACHE', 'true').lower() == 'true',
+    'TTL_SECONDS': 7 * 24 * 3600,
+    'MEMORY_MAX_ENTRIES': 256,  # per process
+    'DB_MAX_ROWS': 10000,  # least recently hit rows are pruned beyond this
+    'MAX_RESPONSE_CHARS': 200000,
+}
+
+# Per-field token budgets for prompt inputs (tiktoken counts when installed, else ~4 chars/token)
+PROMPT_TOKEN_BUDGETS = {
+    'ANALYSIS_RESUME': 1500,
+    'ANALYSIS_JOB': 700,
+    'ANALYSIS_SHARED': 400,  # shared scores handed to the per-audience view prompts
+    'INTERVIEW_REPORT_RESUME': 900,
+    'INTERVIEW_REPORT_JOB': 500,
+    'INTERVIEW_REPORT_MATCH': 400,
+    'INTERVIEW_QUESTION_RESUME': 700,
+}
+
+# LLM provider routing: per-provider circuit breakers, EWMA latency ordering and hedged requests.
+# OpenAI-compatible providers (see free_llm_config.py) are enabled when their API key is set.
+LLM_ROUTING = {
+    'POLICY': os.getenv('LLM_ROUTING_POLICY', 'latency'),  # 'latency' or 'ordered'
+    'HEDGE_ENABLED': os.getenv('LLM_HEDGE_ENABLED', 'false').lower() == 'true',  # off: analysis calls are long generations
+    'HEDGE_PERCENTILE': 95,
+    'HEDGE_MIN_SAMPLES': 20,
+    'HEDGE_AFTER_MS': int(os.getenv('LLM_HEDGE_AFTER_MS', '4000')),  # floor under the percentile
+    'HEDGE_BUDGET_FRACTION': 0.05,
+    'HEDGE_BUDGET_BURST': 3,
+    'LATENCY_WINDOW': 200,
+    'MAX_PARALLEL': 2,
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT_SECONDS': 30,
+    'EWMA_ALPHA': 0.2,
+    'MAX_WORKERS': 32,
+    'PROVIDERS': [
+        {'name': 'gemini', 'type': 'gemini', 'model': 'gemini-2.5-flash', 'timeout': 60},
+        {'name': 'groq', 'type': 'openai', 'model': 'llama-3.1-8b-instant', 'api_base': 'https://api.groq.com/openai/v1',
+         'api_key_env': 'GROQ_API_KEY', 'timeout': 30, 'enabled': bool(os.getenv('GROQ_API_KEY'))},
+        {'name': 'openrouter', 'type': 'openai', 'model': 'qwen/qwen-2.5-7b-instruct', 'api_base': 'https://openrouter.ai/api/v1',
+         'api_key_env': 'OPENROUTER_API_KEY', 'timeout': 30, 'enabled': bool(os.getenv('OPENROUTER_API_KEY'))},
+    ],
+}
+
+# Offline LLM backends for load tests and benchmarks:
+#   LLM_BACKEND=fake    templated responses with simulated latency (no network)
+#   LLM_BACKEND=record  call the first configured provider and save prompt/response fixtures
+#   LLM_BACKEND=replay  serve saved fixtures only
+LLM_BACKEND = os.getenv('LLM_BACKEND', '')
+LLM_FIXTURES_DIR = os.getenv('LLM_FIXTURES_DIR', os.path.join(BASE_DIR, 'llm_fixtures'))
+if LLM_BACKEND == 'fake':
+    LLM_ROUTING['PROVIDERS'] = [{
+        'name': 'fake', 'type': 'fake',
+        'latency': {'distribution': 'lognormal', 'median_ms': int(os.getenv('LLM_FAKE_MEDIAN_MS', '900')), 'sigma': 0.5},
+        'error_rate': float(os.getenv('LLM_FAKE_ERROR_RATE', '0')),
+    }]
+elif LLM_BACKEND in ('record', 'replay'):
+    LLM_ROUTING['PROVIDERS'] = [{
+        'name': LLM_BACKEND, 'type': 'record_replay', 'mode': LLM_BACKEND,
+        'fixtures_dir': LLM_FIXTURES_DIR, 'inner': LLM_ROUTING['PROVIDERS'][0],
+    }]
+
+# Cross-process token buckets for outbound APIs (state in the RateLimitBucket table).
+# Bucket names: 'llm:<provider name>' for LLM_ROUTING providers, 'google_speech', 'google_tts'.
+RATE_LIMITS = {
+    'BATCH_RESERVE_FRACTION': 0.3,  # share of each bucket only interactive (user-facing) calls may use
+    'MAX_WAIT_SECONDS': {'interactive': 15, 'batch': 300},
+    'POLL_SECONDS': 0.25,
+    'BUCKETS': {
+        'llm:gemini': {'CAPACITY': 10, 'REFILL_PER_SECOND': 1.0},  # ~60 requests/minute, bursts of 10
+        'google_speech': {'CAPACITY': 20, 'REFILL_PER_SECOND': 5.0},
+        'google_tts': {'CAPACITY': 20, 'REFILL_PER_SECOND': 5.0},
+    },
+}
+
+# Nightly precomputation of likely-viewed AI analyses (cron: manage.py precompute_analyses)
+PRECOMPUTE_ANALYSES = {
+    'WINDOW': ('01:00', '06:00'),  # local TIME_ZONE; runs stop at the end and resume next night
+    'TOKEN_BUDGET': int(os.getenv('PRECOMPUTE_TOKEN_BUDGET', '2000000')),  # prompt + output tokens per run
+    'MAX_PAIRS': 2000,
+    'TOP_MATCHES_PER_RESUME': 5,
+    'ACTIVE_DAYS': 14,
+    'APPLICATION_DAYS': 30,
+    'SAVED_DAYS': 30,
+}
+
+# Speculative follow-up questions: drafted from the partial answer transcript while the candidate is still speaking
+INTERVIEW_SPECULATION = {
+    'ENABLED': os.getenv('INTERVIEW_SPECULATION_ENABLED', 'True') == 'True',
+    'MIN_PARTIAL_WORDS': 8,          # don't draft from a transcript shorter than this
+    'MIN_SIMILARITY': 0.75,          # share of the partial's words opening the final answer needed to reuse a draft;
+                                     # a partial at least this similar to the last drafted one is not re-drafted
+    'MAX_DRAFTS_PER_QUESTION': 3,    # re-drafts as the transcript grows, per question
+    'WAIT_SECONDS': 20,              # how long submit waits for a matching draft still being generated
+    'MAX_WORKERS': 4,
+}
+
+# Single-flight lease for interview report generation (held on the AIInterview row)
+INTERVIEW_REPORT_LOCK = {
+    'LEASE_SECONDS': 180,   # longer than a slow report call; expired leases are taken over
+    'WAIT_SECONDS': 30,     # how long a concurrent caller waits for the holder's report
+    'POLL_INTERVAL': 0.5,
+}
+
+# Per-job bank of opening interview questions, matched to resumes by embedding similarity
+INTERVIEW_QUESTION_BANK = {
+    'ENABLED': os.getenv('INTERVIEW_QUESTION_BANK_ENABLED', 'True') == 'True',
+    'FIT_THRESHOLD': 0.35,        # resume-to-question cosine similarity needed to serve a banked opener
+    'DUPLICATE_THRESHOLD': 0.9,   # new questions this close to a banked one are not added
+    'MIN_BANK_SIZE': 3,           # always generate until the job has this many openers
+    'MAX_BANK_SIZE': 20,
+    'TOP_K': 3,                   # rotate among this many best-fitting openers
+    'MAX_SERVES': 50,             # retire an opener after this many uses
+    'EXPLORE_RATE': 0.1,          # share of starts that generate anyway while the bank has room
+}
+
+# Content-addressed cache of synthesised interview audio (warm with: manage.py warm_tts_cache)
+TTS_CACHE = {
+    'ENABLED': True,
+    'STORAGE_PREFIX': 'tts_cache',      # files stored as <prefix>/<aa>/<sha256>.mp3
+    'MEMORY_ENTRIES': 2048,             # per-process LRU of known cached paths
+    'VOICES_TTL_SECONDS': 24 * 3600,    # how long the Google voice list is reused
+}
+
+# Streaming speech recognition for the interview STT WebSocket
+STT_STREAMING = {
+    # 'google', 'whisper' (local model, final result only), 'fake' (offline: frames are read as text) or a dotted BaseSpeechBackend path; other keys go to the constructor
+    'BACKEND': {'type': os.getenv('STT_STREAMING_BACKEND', 'google')},
+    'QUEUE_MAX_CHUNKS': 512,
+    'FEED_TIMEOUT_SECONDS': 5.0,
+    'FINAL_GRACE_SECONDS': 1.5,
+}
+
+# Audio buffering for STT uploads and streams (size capped by AUDIO_UPLOAD_MAX_SIZE)
+AUDIO_BUFFER = {
+    'SPOOL_THRESHOLD': 1024 * 1024,  # bytes kept in memory before spooling to a temp file
+    'DEBUG_COPIES': os.getenv('AUDIO_DEBUG_COPIES', 'False') == 'True',  # save received audio to storage in the background
+    'DEBUG_COPY_WORKERS': 2,
+}
+
+# Decoding of compressed interview audio to 16 kHz mono PCM for the recognisers
+AUDIO_TRANSCODE = {
+    'BACKEND': os.getenv('AUDIO_TRANSCODE_BACKEND', 'auto'),  # 'av' (in-process PyAV), 'ffmpeg' (stdin/stdout pipes) or 'auto'
+    'MAX_CONCURRENT': 4,
+    'TIMEOUT_SECONDS': 30,
+}
+
+# Offline CPU speech-to-text (faster-whisper) used when Google Cloud STT isn't configured
+LOCAL_STT = {
+    'ENABLED': os.getenv('LOCAL_STT_ENABLED', 'True') == 'True',
+    'MODEL': os.getenv('LOCAL_STT_MODEL', 'base.en'),  # tiny.en / base.en / small.en: accuracy vs CPU time
+    'COMPUTE_TYPE': 'int8',
+    'WORKERS': int(os.getenv('LOCAL_STT_WORKERS', '2')),  # each worker holds one model in memory
+    'CPU_THREADS': 2,
+    'MAX_QUEUE': 16,
+    'BATCH_WINDOW_MS': 40,
+    'MAX_BATCH_SIZE': 8,
+    'INITIAL_PROMPT': 'Technical interview: Python, Django, React, JavaScript, TypeScript, SQL, AWS, Docker, Kubernetes, REST API.',
+}
@@ -2,7 +2,9 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from jobs.models import Job, Application, AIInterview, AIInterviewReport, AIAnalysisReport, Resume
+from jobs.models import Job, Application, AIInterview, AIInterviewReport, AIAnalysisReport, Resume, BackgroundTask
+from jobs.tasks import enqueue_analysis_report, enqueue_interview_report
+from jobs.services.ai_analysis_service import ai_analysis_service
 from accounts.models import StudentProfile, EmployerProfile, Company, User, Connection
 from django.db.models import Count, Q, Max, Avg, F, ExpressionWrapper, DurationField
 from django.utils import timezone
@@ -34,7 +36,12 @@ class InterviewReportView(APIView):
         try:
             interview = AIInterview.objects.get(application=application)
             if not interview.report_generated:
-                 return Response({"error": "Interview report is not yet available."}, status=status.HTTP_202_ACCEPTED)
+                body = {"error": "Interview report is not yet available.", "processing": False}
+                if interview.status == AIInterview.Status.COMPLETED:
+                    # Re-queues if earlier attempts were exhausted; otherwise returns the task already running
+                    task = enqueue_interview_report(interview, priority=BackgroundTask.Priority.INTERACTIVE, requested_by=request.user)
+                    body.update({"processing": True, "task_id": str(task.id), "task_status": task.status})
+                return Response(body, status=status.HTTP_202_ACCEPTED)
         except AIInterview.DoesNotExist:
             return Response({"error": "Interview not found for this application."}, status=status.HTTP_404_NOT_FOUND)
         
@@ -71,12 +78,26 @@ class AnalysisReportView(APIView):
         force_refresh = request.query_params.get('force_refresh', 'false').lower() == 'true'
         
         report = AIAnalysisReport.objects.filter(job=job, resume=resume).first()
+        if report:
+            ai_analysis_service.record_view(report)
 
-        if not report or force_refresh:
-            # This is a placeholder for celery task
-            # generate_ai_analysis_report_task.delay(resume.id, job.id)
+        needs_generation = (
+            not report
+            or ai_analysis_service.check_staleness(report, resume, job)
+            or not ai_analysis_service.has_sections(report, ai_analysis_service.sections_for('employer'))
+        )
+        if needs_generation or force_refresh:
+            task = enqueue_analysis_report(
+                resume, job,
+                priority=BackgroundTask.Priority.INTERACTIVE,
+                force_refresh=force_refresh,
+                requested_by=request.user,
+                audience='employer',
+            )
             return Response({
                 "status": "processing", 
+                "processing": True,
+                "task_id": str(task.id),
                 "message": "AI analysis report is being generated. Please check back in a few moments."
             }, status=status.HTTP_202_ACCEPTED)
 
@@ -291,7 +312,9 @@ class JobMatchingWeightageView(APIView):
         serializer = JobMatchingWeightageSerializer(job, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data)
+            # Existing reports keep their axis scores; only the weighted overall score changes
+            rescored = ai_analysis_service.rescore_reports(job)
+            return Response({**serializer.data, 'rescored_reports': rescored})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class JobApplicantsView(APIView):
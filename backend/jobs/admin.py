@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Skill, Job, Application, AIAnalysisReport, AIInterview, InterviewUtterance, AIInterviewReport
+from .models import Skill, Job, Application, AIAnalysisReport, AnalysisGenerationLock, BackgroundTask, LLMResponseCache, RateLimitBucket, AnalysisPrecomputeRun, AIInterview, InterviewUtterance, AIInterviewReport, InterviewQuestion
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -21,10 +21,16 @@ class ApplicationAdmin(admin.ModelAdmin):
 
 @admin.register(AIAnalysisReport)
 class AIAnalysisReportAdmin(admin.ModelAdmin):
-    list_display = ('resume', 'job', 'overall_score', 'report_version', 'model_name', 'is_stale', 'created_at')
+    list_display = ('resume', 'job', 'overall_score', 'report_version', 'model_name', 'is_stale', 'generated_by', 'view_count', 'last_viewed_at', 'created_at')
+    list_filter = ('generated_by', 'is_stale')
     search_fields = ('resume__student_profile__user__email', 'job__title')
     raw_id_fields = ('resume', 'job')
 
+@admin.register(AnalysisGenerationLock)
+class AnalysisGenerationLockAdmin(admin.ModelAdmin):
+    list_display = ('resume', 'job', 'report_version', 'owner', 'expires_at', 'created_at')
+    raw_id_fields = ('resume', 'job')
+
 @admin.register(AIInterview)
 class AIInterviewAdmin(admin.ModelAdmin):
     list_display = ('application', 'status', 'completed_at')
@@ -42,3 +48,34 @@ class AIInterviewReportAdmin(admin.ModelAdmin):
     list_display = ('interview', 'report_version', 'model_name', 'overall_score', 'created_at')
     search_fields = ('interview__id', 'report_version', 'model_name')
     raw_id_fields = ('interview',)
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ('task_name', 'status', 'priority', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at')
+    list_filter = ('status', 'task_name')
+    search_fields = ('id', 'dedup_key')
+    raw_id_fields = ('requested_by', 'requesters')
+
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('key', 'model_name', 'hit_count', 'created_at', 'expires_at', 'last_hit_at')
+    list_filter = ('model_name',)
+    search_fields = ('key',)
+
+@admin.register(AnalysisPrecomputeRun)
+class AnalysisPrecomputeRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'status', 'cursor', 'generated', 'skipped', 'failed', 'tokens_used', 'token_budget', 'finished_at')
+    list_filter = ('status',)
+    exclude = ('candidates',)
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ('name', 'tokens', 'updated_at')
+
+@admin.register(InterviewQuestion)
+class InterviewQuestionAdmin(admin.ModelAdmin):
+    list_display = ('job', 'question_type', 'times_served', 'last_served_at', 'is_active', 'created_at')
+    list_filter = ('is_active', 'question_type')
+    search_fields = ('job__title', 'question_text')
+    raw_id_fields = ('job',)
+    exclude = ('embedding',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        # Register background task handlers for the run_workers command
+        from . import tasks  # noqa: F401
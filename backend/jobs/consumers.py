@@ -1,85 +1,119 @@
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
-import logging
-import os
+import time
+import uuid
 import asyncio
-from django.conf import settings
+import logging
+from channels.generic.websocket import AsyncWebsocketConsumer
+from .services.audio_buffer import AudioBuffer, AudioTooLarge
+from .services.speech_stream_service import speech_stream_service
 
 logger = logging.getLogger(__name__)
 
+
 class STTConsumer(AsyncWebsocketConsumer):
+    """
+    Streams answer audio to the recogniser as it arrives. Binary frames are fed to a
+    SpeechStream; interim and final transcripts are pushed back while the candidate is
+    still speaking, and {"action": "end"} returns the full transcript. An utterance that
+    fails part-way (too large, recogniser too far behind) is answered with an error once
+    and its remaining frames are ignored until "end".
+    """
+
     async def connect(self):
         await self.accept()
-        self.audio_chunks = []
+        self.stream = None
+        self.forwarder = None
+        self.audio = None
+        self.abandoned = None  # error that ended the current utterance early; its later frames are dropped
         logger.info("STT WebSocket connected.")
 
     async def disconnect(self, close_code):
         logger.info(f"STT WebSocket disconnected: {close_code}")
-        self.audio_chunks = []
+        self._close_stream()
 
     async def receive(self, text_data=None, bytes_data=None):
         if bytes_data:
-            self.audio_chunks.append(bytes_data)
+            if self.abandoned:
+                # The rest of an abandoned utterance can't be decoded on its own; wait for "end"
+                return
+            if self.stream is None:
+                self.stream = speech_stream_service.open_stream(asyncio.get_running_loop())
+                self.forwarder = asyncio.create_task(self._forward_results(self.stream))
+                self.audio = AudioBuffer()
+            try:
+                # Bounded copy of the utterance (spooled to disk when long) for the size cap and debug copies
+                self.audio.write(bytes_data)
+            except AudioTooLarge as e:
+                await self._abandon(str(e))
+                return
+            # Waits while the recogniser catches up, holding back the socket
+            if not await self.stream.feed(bytes_data):
+                await self._abandon(str(self.stream.error or "Audio stream was closed."))
+                return
             await self.send(text_data=json.dumps({"status": "chunk_received", "size": len(bytes_data)}))
         elif text_data:
             data = json.loads(text_data)
             if data.get("action") == "end":
-                await self.send(text_data=json.dumps({"status": "processing", "chunks": len(self.audio_chunks)}))
-                transcript, error = await self.stream_to_google_stt()
-                if error:
+                if self.abandoned:
+                    error, self.abandoned = self.abandoned, None
                     await self.send(text_data=json.dumps({"status": "error", "error": error}))
-                else:
-                    await self.send(text_data=json.dumps({"status": "transcript", "transcript": transcript}))
+                    return
+                await self._finish()
             else:
                 await self.send(text_data=json.dumps({"status": "unknown_action"}))
 
-    async def stream_to_google_stt(self):
-        try:
-            # from google.cloud import speech
-            import io
-            # Combine all audio chunks into a single bytes object
-            audio_bytes = b"".join(self.audio_chunks)
-            if not audio_bytes:
-                return (None, "No audio data received.")
+    async def _forward_results(self, stream):
+        async for segment, is_final in stream.results():
+            await self.send(text_data=json.dumps({
+                "status": "final" if is_final else "interim",
+                "segment": segment,
+                "transcript": stream.transcript,
+            }))
 
-            # Google expects a generator of requests for streaming
-            def request_generator():
-                yield speech.StreamingRecognizeRequest(
-                    audio_content=audio_bytes
-                )
+    async def _finish(self):
+        stream, forwarder = self.stream, self.forwarder
+        if stream is None:
+            await self.send(text_data=json.dumps({"status": "error", "error": "No audio data received."}))
+            return
+        await self.send(text_data=json.dumps({"status": "processing"}))
+        stream.finish()
+        self.audio.save_debug_copy(f"user_uploads/interview_audio/stream_{uuid.uuid4()}.webm")
+        partial = False
+        try:
+            # Most of the audio is already recognised; only the last segment's final result is outstanding
+            await asyncio.wait_for(asyncio.shield(forwarder), timeout=speech_stream_service.config['FINAL_GRACE_SECONDS'])
+        except asyncio.TimeoutError:
+            partial = True
+        self._close_stream()
+        latency_ms = round((time.monotonic() - stream.ended_at) * 1000)
 
-            client = speech.SpeechClient()
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
-                sample_rate_hertz=48000,
-                language_code="en-US",
-                enable_automatic_punctuation=True,
-                enable_word_time_offsets=False,
-                model="latest_long",
-                use_enhanced=True,
-            )
-            streaming_config = speech.StreamingRecognitionConfig(
-                config=config,
-                interim_results=False,
-                single_utterance=True,
-            )
+        transcript = stream.transcript
+        if not transcript:
+            error = str(stream.error) if stream.error else "No speech detected in audio."
+            await self.send(text_data=json.dumps({"status": "error", "error": error}))
+            return
+        logger.info(f"STT stream finished {latency_ms}ms after end of audio ({len(stream.finals)} final segments, partial={partial})")
+        await self.send(text_data=json.dumps({
+            "status": "transcript",
+            "transcript": transcript,
+            "partial": partial,
+            "latency_ms": latency_ms,
+        }))
 
-            # Run the blocking Google call in a thread executor
-            loop = asyncio.get_event_loop()
-            responses = await loop.run_in_executor(
-                None,
-                lambda: list(client.streaming_recognize(streaming_config, request_generator()))
-            )
+    async def _abandon(self, error):
+        """End the utterance early: its transcript would have gaps, so none is returned."""
+        self._close_stream()
+        self.abandoned = error
+        await self.send(text_data=json.dumps({"status": "error", "error": error}))
 
-            transcript = ""
-            for response in responses:
-                for result in response.results:
-                    if result.is_final and result.alternatives:
-                        transcript += result.alternatives[0].transcript + " "
-            transcript = transcript.strip()
-            if not transcript:
-                return (None, "No speech detected in audio.")
-            return (transcript, None)
-        except Exception as e:
-            logger.error(f"Google STT streaming error: {e}", exc_info=True)
-            return (None, str(e)) 
\ No newline at end of file
+    def _close_stream(self):
+        # Next binary frame starts a new utterance
+        if self.stream is not None:
+            self.stream.finish()
+        if self.forwarder is not None and not self.forwarder.done():
+            self.forwarder.cancel()
+        if self.audio is not None:
+            self.audio.close()
+        self.stream = None
+        self.forwarder = None
+        self.audio = None
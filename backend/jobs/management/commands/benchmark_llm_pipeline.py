@@ -0,0 +1,104 @@
+import time
+import itertools
+import statistics
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from jobs.models import Job, Resume
+from jobs.services import ai_analysis_service as analysis_module
+from jobs.services import ai_interview_service as interview_module
+from jobs.services.fake_llm_service import FakeLLMProvider
+from jobs.services.llm_gateway_service import llm_gateway_service
+from jobs.services.llm_json import llm_json_parser
+from jobs.services.llm_router_service import LLMRouterService
+from jobs.services.question_bank_service import question_bank_service
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive many concurrent AI analyses or interview questions through the real service code '
+        'against the fake LLM backend, and report latency split into provider time and our own overhead. '
+        'Analysis mode writes AIAnalysisReport rows: run it against a development database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['analysis', 'question'], default='analysis')
+        parser.add_argument('--count', type=int, default=200, help='Number of LLM-backed operations (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent worker threads (default: 50)')
+        parser.add_argument('--backend', choices=['fake', 'configured'], default='fake',
+                            help="'fake' swaps in the offline provider; 'configured' uses LLM_ROUTING as-is")
+        parser.add_argument('--median-ms', type=float, default=900, help='Fake provider median latency (lognormal)')
+        parser.add_argument('--sigma', type=float, default=0.5, help='Fake provider lognormal sigma')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake provider injected failure rate')
+        parser.add_argument('--use-cache', action='store_true', help='Keep the LLM response cache enabled')
+
+    def handle(self, *args, **options):
+        resumes = list(Resume.objects.exclude(parsed_text__isnull=True).exclude(parsed_text='').select_related('student_profile')[:50])
+        jobs = list(Job.objects.filter(is_active=True).select_related('company')[:50])
+        if not resumes or not jobs:
+            raise CommandError('Need at least one resume with parsed text and one active job.')
+
+        fake = None
+        if options['backend'] == 'fake':
+            fake = FakeLLMProvider(latency={'distribution': 'lognormal', 'median_ms': options['median_ms'], 'sigma': options['sigma']},
+                                   error_rate=options['error_rate'], seed=42)
+            router = LLMRouterService(config={'MAX_WORKERS': options['concurrency'], 'HEDGE_ENABLED': False}, providers=[fake])
+            analysis_module.ai_analysis_service.model = router
+            interview_module.llm_model = router
+        llm_gateway_service.enabled = options['use_cache']
+        question_bank_service.config['ENABLED'] = False  # measure generation, not bank hits
+
+        pairs = list(itertools.islice(itertools.cycle(itertools.product(resumes, jobs)), options['count']))
+        operation = self._analysis if options['mode'] == 'analysis' else self._question
+
+        latencies, errors = [], 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [pool.submit(self._timed, operation, resume, job) for resume, job in pairs]
+            for future in as_completed(futures):
+                ok, latency = future.result()
+                latencies.append(latency)
+                errors += 0 if ok else 1
+        wall = time.monotonic() - started
+
+        self.stdout.write(f"{options['mode']}: {len(pairs)} ops, concurrency {options['concurrency']}, {errors} errors")
+        self.stdout.write(f"wall {wall:.2f}s, throughput {len(pairs) / wall:.1f} ops/s")
+        self.stdout.write(
+            f"latency p50 {_percentile(latencies, 50) * 1000:.0f}ms  p95 {_percentile(latencies, 95) * 1000:.0f}ms  "
+            f"p99 {_percentile(latencies, 99) * 1000:.0f}ms  mean {statistics.mean(latencies) * 1000:.0f}ms"
+        )
+        if fake is not None and fake.calls:
+            provider_mean = fake.total_latency / fake.calls
+            self.stdout.write(
+                f"provider mean {provider_mean * 1000:.0f}ms over {fake.calls} calls; "
+                f"own overhead mean {(statistics.mean(latencies) - provider_mean) * 1000:.0f}ms"
+            )
+        if options['use_cache']:
+            self.stdout.write(f"response cache: {llm_gateway_service.stats()}")
+        self.stdout.write(f"json parsing: {llm_json_parser.stats()}")
+
+    def _timed(self, operation, resume, job):
+        started = time.monotonic()
+        try:
+            operation(resume, job)
+            ok = True
+        except Exception as e:
+            logger.warning(f"Benchmark operation failed: {e}")
+            ok = False
+        return ok, time.monotonic() - started
+
+    def _analysis(self, resume, job):
+        analysis_module.ai_analysis_service._create_analysis(resume, job)
+
+    def _question(self, resume, job):
+        interview_module.interview_service._generate_initial_question(job, resume)
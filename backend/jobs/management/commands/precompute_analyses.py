@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.services.analysis_precompute_service import analysis_precompute_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate AI analyses off-peak for pairs users are likely to open (recent applications, '
+        'saved jobs, top matches of active students). Intended for a nightly cron entry; stops at the '
+        'end of PRECOMPUTE_ANALYSES["WINDOW"] or when the token budget is spent, and resumes an '
+        'unfinished run on the next invocation.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--token-budget', type=int, help='Override PRECOMPUTE_ANALYSES["TOKEN_BUDGET"] for a new run')
+        parser.add_argument('--max-pairs', type=int, help='Override PRECOMPUTE_ANALYSES["MAX_PAIRS"] for a new run')
+        parser.add_argument('--ignore-window', action='store_true', help='Run even outside the configured time window')
+        parser.add_argument('--fresh', action='store_true', help='Start a new run instead of resuming an unfinished one')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the candidate pairs that would be processed')
+        parser.add_argument('--stats', type=int, metavar='DAYS', help='Only print precompute hit rates over the last DAYS days')
+
+    def handle(self, *args, **options):
+        service = analysis_precompute_service
+        if options['stats']:
+            self.stdout.write(str(service.hit_rate(options['stats'])))
+            return
+
+        if options['dry_run']:
+            candidates = service.select_candidates(options['max_pairs'])
+            for resume_id, job_id, source in candidates:
+                self.stdout.write(f"{source:12} resume {resume_id} / job {job_id}")
+            self.stdout.write(f"{len(candidates)} candidate pairs.")
+            return
+
+        if not options['ignore_window'] and not service.in_window():
+            self.stdout.write(f"Outside the precompute window {service.config['WINDOW']}; nothing to do.")
+            return
+
+        try:
+            run = None if options['fresh'] else service.resumable_run()
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        if run is not None:
+            self.stdout.write(f"Resuming run {run.id} at {run.cursor}/{len(run.candidates)}.")
+        else:
+            self.stdout.write(f"Previous 7 days: {service.hit_rate(7)}")
+            run = service.start_run(options['token_budget'], options['max_pairs'])
+
+        run = service.execute(run, ignore_window=options['ignore_window'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {run.id} {run.status}: {run.cursor}/{len(run.candidates)} processed, generated {run.generated}, "
+            f"skipped {run.skipped}, failed {run.failed}, tokens {run.tokens_used}/{run.token_budget}."
+        ))
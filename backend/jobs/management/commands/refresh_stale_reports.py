@@ -0,0 +1,59 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.models import AIAnalysisReport, BackgroundTask
+from jobs.services.ai_analysis_service import ai_analysis_service
+from jobs.tasks import enqueue_analysis_report
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Queue regeneration of stale AI analysis reports that users have actually viewed, most-viewed first'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=14,
+            help='Only refresh reports viewed within this many days (default: 14)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum number of reports to queue (default: 100)',
+        )
+        parser.add_argument(
+            '--scan',
+            action='store_true',
+            help='First compare fingerprints of recently viewed reports to flag ones whose inputs changed',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        viewed = AIAnalysisReport.objects.filter(last_viewed_at__gte=cutoff).select_related(
+            'resume__student_profile', 'job__company'
+        )
+
+        if options['scan']:
+            flagged = 0
+            for report in viewed.filter(is_stale=False).iterator():
+                if ai_analysis_service.check_staleness(report, report.resume, report.job):
+                    flagged += 1
+            self.stdout.write(f"Fingerprint scan flagged {flagged} stale reports.")
+
+        stale_reports = viewed.filter(is_stale=True).order_by('-view_count', '-last_viewed_at')[:options['limit']]
+        queued = 0
+        for report in stale_reports:
+            # Reports someone looked at in the last day are likely to be opened again soon
+            recently_viewed = report.last_viewed_at >= now - timedelta(days=1)
+            priority = BackgroundTask.Priority.NORMAL if recently_viewed else BackgroundTask.Priority.BATCH
+            # Only regenerate the audience views the report had; others are generated on demand
+            enqueue_analysis_report(report.resume, report.job, priority=priority,
+                                    audience=ai_analysis_service.audience_of(report.report_data or {}))
+            queued += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} stale reports for regeneration."))
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import logging
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(index, poll_interval, burst):
+    """Entry point of a single worker process."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_django.settings')
+    django.setup()
+    from jobs.services.task_queue_service import task_queue_service
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:w{index}"
+    logger.info(f"Task worker {worker_id} started")
+    processed = task_queue_service.work(worker_id=worker_id, poll_interval=poll_interval, stop_event=stop_event, burst=burst)
+    logger.info(f"Task worker {worker_id} stopped after {processed} tasks")
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers (AI report generation etc.) against the DB-backed task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Number of worker processes to start (default: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the queue is empty (default: 1.0)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is drained instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+        burst = options['burst']
+
+        if workers == 1:
+            self.stdout.write("Starting 1 task worker in-process...")
+            _worker_main(0, poll_interval, burst)
+            return
+
+        # Children must open their own DB connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_worker_main, args=(i, poll_interval, burst), daemon=False)
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} task workers: {', '.join(str(p.pid) for p in processes)}")
+
+        def _shutdown(*_):
+            self.stdout.write("Stopping task workers (finishing in-flight tasks)...")
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS("All task workers stopped."))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from jobs.models import InterviewQuestion, Job
+from jobs.services.ai_interview_service import FALLBACK_FOLLOWUP_QUESTION, FALLBACK_OPENING_QUESTION
+from jobs.services.rate_limiter_service import PRIORITY_BATCH, rate_limiter_service
+from jobs.services.tts_service import DEFAULT_VOICE, tts_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-synthesise the audio of fixed interview prompts into the TTS cache: the fallback questions '
+        '(the opening one per active job) and the openers in the interview question bank'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--voice',
+            action='append',
+            help=f'Voice to synthesise; repeat for several (default: {DEFAULT_VOICE})',
+        )
+        parser.add_argument(
+            '--no-bank',
+            action='store_true',
+            help='Skip questions from the interview question bank',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the prompts that would be synthesised',
+        )
+
+    def handle(self, *args, **options):
+        prompts = {FALLBACK_FOLLOWUP_QUESTION}
+        for title in Job.objects.filter(is_active=True).values_list('title', flat=True).distinct():
+            prompts.add(FALLBACK_OPENING_QUESTION.format(job_title=title))
+        if not options['no_bank']:
+            prompts.update(InterviewQuestion.objects.filter(
+                is_active=True, job__is_active=True
+            ).values_list('question_text', flat=True))
+        voices = options['voice'] or [DEFAULT_VOICE]
+
+        if options['dry_run']:
+            self.stdout.write(f"Would warm {len(prompts)} prompts x {len(voices)} voices.")
+            return
+
+        synthesised = cached = failed = 0
+        # Warm-up must not take quota from live interviews
+        with rate_limiter_service.priority(PRIORITY_BATCH):
+            for voice in voices:
+                for text in sorted(prompts):
+                    try:
+                        result = tts_service.synthesize(text, voice)
+                    except Exception as e:
+                        logger.warning(f"TTS warm-up failed for voice {voice}: {e}")
+                        failed += 1
+                        continue
+                    if result['cached']:
+                        cached += 1
+                    else:
+                        synthesised += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"TTS cache warm: {synthesised} synthesised, {cached} already cached, {failed} failed."
+        ))
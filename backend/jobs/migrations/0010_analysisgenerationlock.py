@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:06
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_connection'),
+        ('jobs', '0009_alter_aiinterviewreport_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisGenerationLock',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('report_version', models.CharField(help_text='Report version being generated under this lock.', max_length=50)),
+                ('owner', models.CharField(help_text='host:pid:thread of the process holding the lease.', max_length=255)),
+                ('expires_at', models.DateTimeField(help_text='Lease expiry; an expired lock may be taken over by another process.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_locks', to='jobs.job')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_locks', to='accounts.resume')),
+            ],
+            options={
+                'unique_together': {('resume', 'job', 'report_version')},
+            },
+        ),
+    ]
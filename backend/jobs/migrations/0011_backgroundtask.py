@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:08
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_analysisgenerationlock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('task_name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('priority', models.IntegerField(default=50, help_text='Higher values are claimed first.')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('dedup_key', models.CharField(blank=True, help_text='At most one queued/running task may share this key.', max_length=255, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the task may be claimed (used for retry backoff).')),
+                ('locked_by', models.CharField(blank=True, max_length=255)),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Visibility timeout of the current claim.', null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='background_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', '-priority', 'run_after'], name='jobs_task_claim_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['QUEUED', 'RUNNING'])), fields=('dedup_key',), name='jobs_task_unique_active_dedup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_backgroundtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aianalysisreport',
+            name='content_fingerprints',
+            field=models.JSONField(blank=True, default=dict, help_text='Hashes of the inputs (resume, job, preferences, weights, prompt) the report was generated from.'),
+        ),
+        migrations.AddField(
+            model_name='aianalysisreport',
+            name='last_viewed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='aianalysisreport',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times the report has been served to a user.'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:16
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_aianalysisreport_content_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResponseCache',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model_name', models.CharField(max_length=100)),
+                ('response_text', models.TextField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
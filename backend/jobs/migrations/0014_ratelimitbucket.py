@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_llmresponsecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:29
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisPrecomputeRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('INTERRUPTED', 'Interrupted'), ('WINDOW_CLOSED', 'Stopped at end of window'), ('BUDGET_EXHAUSTED', 'Token budget exhausted')], default='RUNNING', max_length=20)),
+                ('candidates', models.JSONField(default=list, help_text='Ordered [resume_id, job_id, source] pairs to generate.')),
+                ('cursor', models.PositiveIntegerField(default=0, help_text='Index of the next candidate to process.')),
+                ('token_budget', models.PositiveIntegerField()),
+                ('tokens_used', models.PositiveIntegerField(default=0)),
+                ('generated', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0, help_text='Candidates that already had a fresh report or were being generated elsewhere.')),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Heartbeat; a RUNNING run that stops updating is resumed.')),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='aianalysisreport',
+            name='generated_by',
+            field=models.CharField(choices=[('ON_DEMAND', 'On demand'), ('PRECOMPUTE', 'Precomputed')], db_index=True, default='ON_DEMAND', help_text='Whether the report was generated for a request or by the nightly precomputation.', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_analysisprecomputerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinterview',
+            name='question_draft',
+            field=models.JSONField(blank=True, help_text='Follow-up question drafted speculatively from a partial answer transcript.', null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_aiinterview_question_draft'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinterview',
+            name='report_lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='Report generation lease expiry; an expired lease may be taken over.', null=True),
+        ),
+        migrations.AddField(
+            model_name='aiinterview',
+            name='report_lease_owner',
+            field=models.CharField(blank=True, default='', help_text='host:pid:thread generating the interview report, if any.', max_length=255),
+        ),
+        migrations.DeleteModel(
+            name='InterviewReport',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:38
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_interview_report_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewQuestion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('question_text', models.TextField()),
+                ('question_type', models.CharField(blank=True, default='', max_length=50)),
+                ('embedding', models.JSONField(help_text='Vector embedding of the question text (same model as resume embeddings).')),
+                ('times_served', models.PositiveIntegerField(default=0)),
+                ('last_served_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True, help_text='Retired questions are no longer served.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_bank', to='jobs.job')),
+            ],
+            options={
+                'ordering': ['job', 'times_served'],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations, models
+
+
+def backfill_utterances(apps, schema_editor):
+    """Copy each interview's questions/answers JSON into alternating AI / candidate utterances."""
+    AIInterview = apps.get_model('jobs', 'AIInterview')
+    InterviewUtterance = apps.get_model('jobs', 'InterviewUtterance')
+    interviews = AIInterview.objects.filter(utterances__isnull=True).only('id', 'questions', 'answers')
+    for interview in interviews.iterator(chunk_size=500):
+        questions = interview.questions or []
+        answers = interview.answers or []
+        rows = []
+        for index in range(max(len(questions), len(answers))):
+            if index < len(questions):
+                question = questions[index] if isinstance(questions[index], dict) else {'question_text': str(questions[index])}
+                rows.append(InterviewUtterance(
+                    interview_id=interview.id, sequence=len(rows) + 1, speaker='AI',
+                    text=question.get('question_text', ''),
+                    metadata={k: v for k, v in question.items() if k != 'question_text'},
+                ))
+            if index < len(answers):
+                answer = answers[index] if isinstance(answers[index], dict) else {'text': str(answers[index])}
+                rows.append(InterviewUtterance(
+                    interview_id=interview.id, sequence=len(rows) + 1, speaker='CANDIDATE',
+                    text=answer.get('text', ''), audio_clip_url=answer.get('audio_url'),
+                    metadata={k: v for k, v in answer.items() if k not in ('text', 'audio_url')},
+                ))
+        InterviewUtterance.objects.bulk_create(rows)
+
+
+def restore_json(apps, schema_editor):
+    AIInterview = apps.get_model('jobs', 'AIInterview')
+    InterviewUtterance = apps.get_model('jobs', 'InterviewUtterance')
+    for interview in AIInterview.objects.only('id').iterator(chunk_size=500):
+        questions, answers = [], []
+        for utterance in InterviewUtterance.objects.filter(interview_id=interview.id).order_by('sequence'):
+            if utterance.speaker == 'AI':
+                questions.append({**utterance.metadata, 'question_text': utterance.text})
+            else:
+                answer = {**utterance.metadata, 'text': utterance.text}
+                if utterance.audio_clip_url:
+                    answer['audio_url'] = utterance.audio_clip_url
+                answers.append(answer)
+        AIInterview.objects.filter(id=interview.id).update(questions=questions, answers=answers)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_interviewquestion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interviewutterance',
+            name='start_time',
+            field=models.PositiveIntegerField(blank=True, help_text='Start time of utterance in seconds from beginning of audio.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='interviewutterance',
+            name='end_time',
+            field=models.PositiveIntegerField(blank=True, help_text='End time of utterance in seconds from beginning of audio.', null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewutterance',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict, help_text='Other question/answer fields, e.g. question type, bank id, answer timestamp.'),
+        ),
+        migrations.RunPython(backfill_utterances, restore_json),
+    ]
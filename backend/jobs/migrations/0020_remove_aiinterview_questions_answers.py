@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_interview_utterance_transcript'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='aiinterview',
+            name='answers',
+        ),
+        migrations.RemoveField(
+            model_name='aiinterview',
+            name='questions',
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_remove_aiinterview_questions_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundtask',
+            name='requesters',
+            field=models.ManyToManyField(blank=True, help_text='Everyone whose request was collapsed onto this task; each of them may poll it.', related_name='requested_background_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -109,6 +109,10 @@ class Application(models.Model):
 
 
 class AIAnalysisReport(models.Model):
+    class Source(models.TextChoices):
+        ON_DEMAND = 'ON_DEMAND', 'On demand'
+        PRECOMPUTE = 'PRECOMPUTE', 'Precomputed'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='analysis_reports')
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='analysis_reports')
@@ -117,6 +121,10 @@ class AIAnalysisReport(models.Model):
     report_version = models.CharField(max_length=50, default="1.0", help_text="The version of the analysis model and prompt used.")
     model_name = models.CharField(max_length=100, help_text="Version of the model used (e.g., 'gemini-1.5-pro').")
     is_stale = models.BooleanField(default=False, help_text="True if the resume or job has been updated since this report was generated.")
+    content_fingerprints = models.JSONField(default=dict, blank=True, help_text="Hashes of the inputs (resume, job, preferences, weights, prompt) the report was generated from.")
+    view_count = models.PositiveIntegerField(default=0, help_text="Number of times the report has been served to a user.")
+    generated_by = models.CharField(max_length=20, choices=Source.choices, default=Source.ON_DEMAND, db_index=True, help_text="Whether the report was generated for a request or by the nightly precomputation.")
+    last_viewed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -127,6 +135,26 @@ class AIAnalysisReport(models.Model):
         return f"AI Report v{self.report_version} for {self.resume.student_profile.user.email} against {self.job.title}"
 
 
+class AnalysisGenerationLock(models.Model):
+    """
+    Lease row held by the single process generating an AIAnalysisReport.
+    The row id doubles as the poll token handed to requests that wait on the leader.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='analysis_locks')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='analysis_locks')
+    report_version = models.CharField(max_length=50, help_text="Report version being generated under this lock.")
+    owner = models.CharField(max_length=255, help_text="host:pid:thread of the process holding the lease.")
+    expires_at = models.DateTimeField(help_text="Lease expiry; an expired lock may be taken over by another process.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('resume', 'job', 'report_version')
+
+    def __str__(self):
+        return f"Analysis lock for resume {self.resume_id} / job {self.job_id} (v{self.report_version})"
+
+
 class AIInterviewReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     interview = models.OneToOneField('AIInterview', on_delete=models.CASCADE)
@@ -154,17 +182,44 @@ class AIInterview(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='interview')
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
-    questions = models.JSONField(default=list, blank=True, help_text="List of generated interview questions.")
-    answers = models.JSONField(default=list, blank=True, help_text="List of candidate answers (text/audio reference).")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     report_generated = models.BooleanField(default=False, help_text="True if the employer-facing interview report has been generated.")
+    question_draft = models.JSONField(null=True, blank=True, help_text="Follow-up question drafted speculatively from a partial answer transcript.")
+    report_lease_owner = models.CharField(max_length=255, blank=True, default='', help_text="host:pid:thread generating the interview report, if any.")
+    report_lease_expires_at = models.DateTimeField(null=True, blank=True, help_text="Report generation lease expiry; an expired lease may be taken over.")
 
     def __str__(self):
         return f"AI Interview for application {self.application.id}"
 
+    def questions_and_answers(self):
+        """Rebuilt from the utterances; uses the prefetch cache when utterances were prefetched."""
+        return InterviewUtterance.split_transcript(self.utterances.all())
+
+
+class InterviewQuestion(models.Model):
+    """
+    A generated interview question banked per job so later interviews for the same
+    job can reuse it. The embedding is compared with resume embeddings to judge fit.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='question_bank')
+    question_text = models.TextField()
+    question_type = models.CharField(max_length=50, blank=True, default='')
+    embedding = models.JSONField(help_text="Vector embedding of the question text (same model as resume embeddings).")
+    times_served = models.PositiveIntegerField(default=0)
+    last_served_at = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True, help_text="Retired questions are no longer served.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['job', 'times_served']
+
+    def __str__(self):
+        return f"Question for {self.job.title}: {self.question_text[:60]}"
+
 
 class InterviewUtterance(models.Model):
     class Speaker(models.TextChoices):
@@ -176,9 +231,10 @@ class InterviewUtterance(models.Model):
     sequence = models.PositiveIntegerField()
     speaker = models.CharField(max_length=10, choices=Speaker.choices)
     text = models.TextField()
-    start_time = models.PositiveIntegerField(help_text="Start time of utterance in seconds from beginning of audio.")
-    end_time = models.PositiveIntegerField(help_text="End time of utterance in seconds from beginning of audio.")
+    start_time = models.PositiveIntegerField(null=True, blank=True, help_text="Start time of utterance in seconds from beginning of audio.")
+    end_time = models.PositiveIntegerField(null=True, blank=True, help_text="End time of utterance in seconds from beginning of audio.")
     audio_clip_url = models.URLField(max_length=500, blank=True, null=True, help_text="URL to the specific audio clip for this utterance.")
+    metadata = models.JSONField(default=dict, blank=True, help_text="Other question/answer fields, e.g. question type, bank id, answer timestamp.")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -188,18 +244,145 @@ class InterviewUtterance(models.Model):
     def __str__(self):
         return f"{self.speaker} utterance #{self.sequence} in interview {self.interview.id}"
 
+    def as_question(self):
+        return {**self.metadata, 'question_text': self.text}
+
+    def as_answer(self):
+        answer = {**self.metadata, 'text': self.text}
+        if self.audio_clip_url:
+            answer['audio_url'] = self.audio_clip_url
+        return answer
+
+    @classmethod
+    def split_transcript(cls, utterances):
+        """(questions, answers) in the dict shapes the interview flow and API use."""
+        questions, answers = [], []
+        for utterance in utterances:
+            if utterance.speaker == cls.Speaker.AI:
+                questions.append(utterance.as_question())
+            else:
+                answers.append(utterance.as_answer())
+        return questions, answers
+
+
+class BackgroundTask(models.Model):
+    """
+    Durable, DB-backed job for the in-house worker pool (see the run_workers command).
+    Workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED and hold them for a
+    visibility timeout; rows whose lease lapses are picked up again by another worker.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', 'Queued'
+        RUNNING = 'RUNNING', 'Running'
+        SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+        FAILED = 'FAILED', 'Failed'
+
+    class Priority(models.IntegerChoices):
+        BATCH = 10, 'Batch'
+        NORMAL = 50, 'Normal'
+        INTERACTIVE = 100, 'Interactive'
 
-class InterviewReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    interview = models.OneToOneField('AIInterview', on_delete=models.CASCADE, related_name='employer_report')
-    application = models.ForeignKey('Application', on_delete=models.CASCADE, related_name='interview_reports')
-    report_data = models.JSONField(help_text="Comprehensive employer-facing interview report data.")
+    task_name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.IntegerField(default=Priority.NORMAL, help_text="Higher values are claimed first.")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    dedup_key = models.CharField(max_length=255, null=True, blank=True, help_text="At most one queued/running task may share this key.")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Earliest time the task may be claimed (used for retry backoff).")
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Visibility timeout of the current claim.")
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_tasks')
+    requesters = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='requested_background_tasks',
+                                        help_text="Everyone whose request was collapsed onto this task; each of them may poll it.")
     created_at = models.DateTimeField(auto_now_add=True)
-    version = models.CharField(max_length=20, default='1.0', help_text="Version of the report format/LLM prompt.")
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        unique_together = ('interview', 'application')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'], name='jobs_task_claim_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=['QUEUED', 'RUNNING']),
+                name='jobs_task_unique_active_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} [{self.status}] ({self.id})"
+
+
+class LLMResponseCache(models.Model):
+    """
+    Persistent tier of the LLM response cache (see llm_gateway_service). Rows are keyed by a
+    hash of (model, normalised prompt, generation config) and only hold outputs that passed
+    the caller's parse validation.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    response_text = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.model_name} response {self.key[:12]} ({self.hit_count} hits)"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Shared state of a token bucket used by rate_limiter_service to pace outbound calls
+    (LLM providers, Google Speech/TTS) across all processes. Capacity and refill rate
+    come from settings.RATE_LIMITS; only the current token count lives here.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.2f} tokens"
+
+
+class AnalysisPrecomputeRun(models.Model):
+    """
+    One pass of the nightly analysis precomputation (manage.py precompute_analyses).
+    The candidate pairs are frozen when the run starts so an interrupted run resumes
+    from ``cursor`` instead of selecting again.
+    """
+    class Status(models.TextChoices):
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        INTERRUPTED = 'INTERRUPTED', 'Interrupted'
+        WINDOW_CLOSED = 'WINDOW_CLOSED', 'Stopped at end of window'
+        BUDGET_EXHAUSTED = 'BUDGET_EXHAUSTED', 'Token budget exhausted'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    candidates = models.JSONField(default=list, help_text="Ordered [resume_id, job_id, source] pairs to generate.")
+    cursor = models.PositiveIntegerField(default=0, help_text="Index of the next candidate to process.")
+    token_budget = models.PositiveIntegerField()
+    tokens_used = models.PositiveIntegerField(default=0)
+    generated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0, help_text="Candidates that already had a fresh report or were being generated elsewhere.")
+    failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Heartbeat; a RUNNING run that stops updating is resumed.")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
 
     def __str__(self):
-        return f"InterviewReport v{self.version} for interview {self.interview.id} (application {self.application.id})"
+        return f"Precompute run {self.started_at:%Y-%m-%d %H:%M} [{self.status}] {self.cursor}/{len(self.candidates)}"
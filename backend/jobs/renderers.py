@@ -0,0 +1,41 @@
+import json
+from typing import AsyncIterator, Iterator
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+def format_sse(event: str, data) -> str:
+    """Format a single server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def iterate_in_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """
+    Async view of a blocking iterator, for StreamingHttpResponse under ASGI: Django drains a
+    sync iterator completely before sending anything there, whereas this hands each chunk to
+    the server as soon as a worker thread has produced it. Closing it closes ``iterator``.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(iterator.close, thread_sensitive=False)()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF accept `Accept: text/event-stream` on streaming endpoints.
+    Successful responses are StreamingHttpResponses and bypass rendering; this only
+    renders early error responses, as a single `error` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_sse('error', data).encode(self.charset)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Skill, Job, Application, AIAnalysisReport, AIInterview, AIInterviewReport
+from .models import Skill, Job, Application, AIAnalysisReport, AIInterview, AIInterviewReport, BackgroundTask, InterviewUtterance
 from accounts.models import Company
 
 class SkillSerializer(serializers.ModelSerializer):
@@ -17,12 +17,38 @@ class CompanySummarySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'logo_url', 'location']
 
 
+class InterviewUtteranceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InterviewUtterance
+        fields = ['sequence', 'speaker', 'text', 'start_time', 'end_time', 'audio_clip_url', 'created_at']
+
+
 class AIInterviewSerializer(serializers.ModelSerializer):
-    """Serializer for AI Interview objects."""
-    
+    """
+    Serializer for AI Interview objects. ``questions`` and ``answers`` keep their list-of-dicts
+    shape but are assembled, with the ordered ``transcript``, from the interview's utterances.
+    """
+    questions = serializers.SerializerMethodField()
+    answers = serializers.SerializerMethodField()
+    transcript = serializers.SerializerMethodField()
+
     class Meta:
         model = AIInterview
-        fields = ['id', 'status', 'questions', 'answers', 'started_at', 'completed_at']
+        fields = ['id', 'status', 'questions', 'answers', 'transcript', 'started_at', 'completed_at']
+
+    def to_representation(self, instance):
+        # One utterance query shared by the three fields (none if they were prefetched)
+        self._utterances = list(instance.utterances.all())
+        return super().to_representation(instance)
+
+    def get_questions(self, obj):
+        return InterviewUtterance.split_transcript(self._utterances)[0]
+
+    def get_answers(self, obj):
+        return InterviewUtterance.split_transcript(self._utterances)[1]
+
+    def get_transcript(self, obj):
+        return InterviewUtteranceSerializer(self._utterances, many=True).data
 
 
 class JobSerializer(serializers.ModelSerializer):
@@ -37,6 +63,9 @@ class JobSerializer(serializers.ModelSerializer):
         return round(score, 1) if score is not None else None
 
     def get_ai_match_score(self, obj):
+        # Callers that already looked the scores up in bulk pass them in context
+        if 'ai_match_scores' in self.context:
+            return self.context['ai_match_scores'].get(str(obj.id))
         # Get the current user and their primary resume
         request = self.context.get('request')
         user = getattr(request, 'user', None)
@@ -91,7 +120,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
 
     def get_interview_answers(self, obj):
         if hasattr(obj, 'interview') and obj.interview:
-            return obj.interview.answers
+            return obj.interview.questions_and_answers()[1]
         return []
 
     def get_canonical_status(self, obj):
@@ -125,11 +154,16 @@ class AIAnalysisReportSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Output the new grouped JSON structure for the AI match report."""
         data = super().to_representation(instance)
-        # The report_data is now already grouped as {shared, student_view, employer_view}
+        # The report_data is grouped as {shared, student_view, employer_view}; views are generated
+        # per audience, so a report may hold only some of them
         grouped = data.get('report_data', {})
+        grouped['available_sections'] = [name for name in ('shared', 'student_view', 'employer_view') if name in grouped]
         
-        # Move overall_score to top level for frontend compatibility
-        if 'shared' in grouped and 'overall_score' in grouped['shared']:
+        # Move overall_score to top level for frontend compatibility; the column is authoritative
+        # (it is re-scored in bulk when the employer changes the job's weights)
+        if data.get('overall_score') is not None:
+            grouped['overall_score'] = data['overall_score']
+        elif 'shared' in grouped and 'overall_score' in grouped['shared']:
             grouped['overall_score'] = grouped['shared']['overall_score']
         
         grouped['id'] = data['id']
@@ -201,4 +235,16 @@ class AIInterviewReportSerializer(serializers.ModelSerializer):
         data['model_name'] = data.get('model_name')
         data['created_at'] = data.get('created_at')
         # Optionally flatten more fields if needed
-        return data 
\ No newline at end of file
+        return data
+
+
+class BackgroundTaskSerializer(serializers.ModelSerializer):
+    """Status view of a queued background task, used for client polling."""
+    processing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BackgroundTask
+        fields = ['id', 'task_name', 'status', 'processing', 'attempts', 'max_attempts', 'result', 'created_at', 'finished_at']
+
+    def get_processing(self, obj):
+        return obj.status in (BackgroundTask.Status.QUEUED, BackgroundTask.Status.RUNNING)
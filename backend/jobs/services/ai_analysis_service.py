@@ -1,108 +1,36 @@
 import json
+import math
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from django.conf import settings
-from ..models import AIAnalysisReport, Resume, Job
+from django.db import transaction
+from django.db.models import F, FloatField, Func, IntegerField, JSONField, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Abs, Cast, Coalesce, Floor, Greatest, Least, Sign
+from django.utils import timezone
+from ..models import AIAnalysisReport, AnalysisGenerationLock, Resume, Job
+from .analysis_lock_service import analysis_lock_service, AnalysisInProgress
+from .llm_json import IncrementalJSONSectionParser, llm_json_parser, loads_strict, matches_schema, missing_keys
+from .llm_gateway_service import llm_gateway_service
+from .prompt_budget_service import prompt_budget_service
+from .llm_router_service import llm_router_service
+from .rate_limiter_service import rate_limiter_service
 import google.generativeai as genai
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
+_generation_source = contextvars.ContextVar('analysis_generation_source', default=AIAnalysisReport.Source.ON_DEMAND)
 
-class AIAnalysisService:
-    def __init__(self):
-        self.model = model
+REPORT_VERSION = '4.0'
+MODEL_NAME = 'gemini-2.5-flash'
 
-    def get_or_create_analysis(self, resume: Resume, job: Job) -> AIAnalysisReport:
-        """Get existing dual-audience analysis or create a new one."""
-        existing_report = AIAnalysisReport.objects.filter(
-            resume=resume, 
-            job=job
-        ).first()
-        if existing_report and not existing_report.is_stale:
-            return existing_report
-        return self._create_analysis(resume, job)
-
-    def _create_analysis(self, resume: Resume, job: Job) -> AIAnalysisReport:
-        """Create a new AI analysis report, using employer weights if available."""
-        try:
-            student_profile = resume.student_profile
-            career_preferences = student_profile.career_preferences or {}
-            preferred_industries = career_preferences.get('industries', [])
-            preferred_locations = career_preferences.get('locations', [])
-            preferred_work_types = career_preferences.get('work_types', [])
-            preferred_roles = career_preferences.get('preferred_roles', [])
-            
-            # Fetch employer weights from job if available
-            employer_weights = None
-            if hasattr(job, 'matching_weights') and job.matching_weights:
-                raw_weights = {
-                    'skills': float(job.matching_weights.get('skills', 0.4)),
-                    'experience': float(job.matching_weights.get('experience', 0.3)),
-                    'culture_fit': float(job.matching_weights.get('culture_fit', 0.15)),
-                    'growth_potential': float(job.matching_weights.get('growth_potential', 0.1)),
-                }
-                total = sum(raw_weights.values())
-                if total > 0:
-                    employer_weights = {k: v / total for k, v in raw_weights.items()}
-                else:
-                    employer_weights = {'skills': 0.45, 'experience': 0.25, 'culture_fit': 0.15, 'growth_potential': 0.1}
-            else:
-                employer_weights = {'skills': 0.45, 'experience': 0.25, 'culture_fit': 0.15, 'growth_potential': 0.1}
-            
-            # Build the prompt with all context
-            prompt = self._build_dual_analysis_prompt(
-                resume_text=resume.parsed_text,
-                job_data=job,
-                career_preferences={
-                    'industries': preferred_industries,
-                    'locations': preferred_locations,
-                    'work_types': preferred_work_types,
-                    'preferred_roles': preferred_roles
-                },
-                employer_weights=employer_weights
-            )
-            
-            response = self.model.generate_content(prompt)
-            analysis_data = self._parse_llm_response(response.text)
-            
-            # Calculate overall score using employer weights from shared data
-            overall_score = self._calculate_overall_score(analysis_data['shared'], employer_weights)
-            analysis_data['shared']['overall_score'] = overall_score
-            
-            # Add metadata fields for frontend
-            analysis_data['audience'] = 'dual'  # Indicates this report works for both audiences
-            analysis_data['employer_weightage'] = employer_weights
-            
-            # Create or update the report
-            report, created = AIAnalysisReport.objects.update_or_create(
-                resume=resume,
-                job=job,
-                defaults={
-                    'overall_score': overall_score,
-                    'report_data': analysis_data,
-                    'report_version': '4.0',
-                    'model_name': 'gemini-2.5-flash',
-                    'is_stale': False
-                }
-            )
-            return report
-        except Exception as e:
-            logger.error(f"Error creating AI analysis: {e}")
-            raise
-
-    def _build_dual_analysis_prompt(self, resume_text: str, job_data: Job, career_preferences: Dict[str, Any], employer_weights: Optional[Dict[str, float]] = None) -> str:
-        """Build the prompt for the LLM analysis, with new matrix and enhanced insight fields. Explicitly require no empty objects/arrays."""
-        # Format career preferences for the prompt
-        pref_industries = ', '.join(career_preferences.get('industries', [])) or 'None specified'
-        pref_locations = ', '.join(career_preferences.get('locations', [])) or 'None specified'
-        pref_work_types = ', '.join(career_preferences.get('work_types', [])) or 'None specified'
-        pref_roles = ', '.join(career_preferences.get('preferred_roles', [])) or 'None specified'
-
-        prompt = f"""
-You are an expert AI job matching analyst. Analyze the resume and job description, and generate a single JSON report for both a STUDENT (candidate) and EMPLOYER (recruiter/hiring manager) view.
+ANALYSIS_INSTRUCTIONS = """You are an expert AI job matching analyst. Analyze the resume and job description, and generate a single JSON report for both a STUDENT (candidate) and EMPLOYER (recruiter/hiring manager) view.
 
 - The "shared" section contains all the axis-level scores and breakdowns (skills_score, experience_score, etc.) and is IDENTICAL for both audiences.
 - The "student_view" section gives tailored feedback for the candidate, including:
@@ -118,114 +46,91 @@ You are an expert AI job matching analyst. Analyze the resume and job descriptio
     - follow_up_questions (3-5 specific questions an interviewer should ask to clarify the candidate’s fit, based on gaps, ambiguities, or strengths).
 
 Never leave any field as an empty object or array—if no data, provide a summary or explanation.
-Order all fields as shown.
+Order all fields as shown."""
 
-
-RESUME TEXT:
-{resume_text}
-
-JOB DETAILS:
-Title: {job_data.title}
-Company: {job_data.company.name}
-Industry: {job_data.company.industry or 'Not specified'}
-Location: {job_data.location or 'Not specified'}
-Job Type: {job_data.get_job_type_display()}
-Remote Option: {job_data.get_remote_option_display()}
-Salary Range: {job_data.salary_min or 'Not specified'} - {job_data.salary_max or 'Not specified'}
-Description: {job_data.description}
-Requirements: {', '.join(job_data.requirements) if job_data.requirements else 'Not specified'}
-Responsibilities: {', '.join(job_data.responsibilities) if job_data.responsibilities else 'Not specified'}
-
-CANDIDATE CAREER PREFERENCES:
-Preferred Industries: {pref_industries}
-Preferred Locations: {pref_locations}
-Preferred Work Types: {pref_work_types}
-Preferred Roles: {pref_roles}
-
-Please provide a comprehensive analysis in the following JSON format:
-
-{{
-  "shared": {{
+SHARED_JSON_SCHEMA = """"shared": {
     "skills_score": <0-100>,
     "experience_score": <0-100>,
     "culture_fit_score": <0-100>,
     "growth_potential_score": <0-100>,
     "preferences_bonus": <0-5>,
     "overall_score": <0-100>,
-    "skills_analysis": {{
+    "skills_analysis": {
       "matching_skills": ["skill1", "skill2"],
       "missing_skills": ["skill3", "skill4"],
       "summary": "Summary of skills match and gaps"
-    }},
-    "experience_analysis": {{
+    },
+    "experience_analysis": {
       "relevant_experience": ["exp1", "exp2"],
       "experience_gaps": ["gap1", "gap2"],
       "summary": "Summary of experience alignment"
-    }},
-    "culture_fit_analysis": {{
+    },
+    "culture_fit_analysis": {
       "summary": "Summary of culture/team fit",
       "teamwork": <0-100>,
       "values_alignment": <0-100>,
       "communication": <0-100>
-    }},
-    "growth_potential_analysis": {{
+    },
+    "growth_potential_analysis": {
       "summary": "Summary of growth potential",
       "learning_agility": <0-100>,
       "upskilling_history": <0-100>,
       "motivation": <0-100>
-    }},
+    },
     "preferences_analysis": [
-      {{
+      {
         "title": "Preference insight title",
         "description": "How this job aligns with career preferences",
         "impact": "high|medium|low",
         "match_level": "excellent|good|moderate|poor",
         "preference_type": "industry|location|work_type|role"
-      }}
+      }
     ]
-  }},
-  "student_view": {{
+  }"""
+
+STUDENT_VIEW_JSON_SCHEMA = """"student_view": {
     "career_insights": [
-      {{
+      {
         "type": "strength|improvement|opportunity|warning|gap",
         "title": "Insight title",
         "description": "Detailed description",
         "impact": "high|medium|low"
-      }}
+      }
     ],
     "personalized_recommendations": [
-      {{
+      {
         "category": "skill_development|experience|networking|application",
         "title": "Recommendation title",
         "description": "Detailed recommendation",
         "priority": "high|medium|low"
-      }}
+      }
     ],
     "encouragement": "Positive encouragement statement for the candidate",
     "next_career_goal": "Best-fit role suggestion (e.g., Junior Full-Stack Developer)"
-  }},
-  "employer_view": {{
+  }"""
+
+EMPLOYER_VIEW_JSON_SCHEMA = """"employer_view": {
     "risk_flags": [
-      {{
+      {
         "type": "hard_filter|potential_risk|soft_risk",
         "title": "Risk title",
         "description": "Description of risk or disqualifier",
         "impact": "high|medium|low"
-      }}
+      }
     ],
     "opportunity_flags": [
-      {{
+      {
         "type": "unique_strength|growth_potential|diversity",
         "title": "Opportunity title",
         "description": "Description of unique value or potential",
         "impact": "high|medium|low"
-      }}
+      }
     ],
     "recruiter_recommendations": [
-      {{
+      {
         "title": "Recommendation title",
         "description": "Practical step for recruiter (e.g., 'Invite for phone screen after AI Interview')"
-      }}
+      }
     ],
     "fit_summary": "2-3 sentence overview of the candidate's suitability for the role",
     "follow_up_questions": [
@@ -233,36 +138,853 @@ Please provide a comprehensive analysis in the following JSON format:
       "Clarify Django experience",
       "Other suggested question"
     ]
-  }}
-}}
+  }"""
+
+SECTION_JSON_SCHEMAS = {
+    'shared': SHARED_JSON_SCHEMA,
+    'student_view': STUDENT_VIEW_JSON_SCHEMA,
+    'employer_view': EMPLOYER_VIEW_JSON_SCHEMA,
+}
+
+REPORT_JSON_SCHEMA = "{\n  " + ",\n  ".join(SECTION_JSON_SCHEMAS.values()) + "\n}"
 
-Guidelines:
+ANALYSIS_GUIDELINES = """Guidelines:
 - All main axis scores must be integers 0-100.
 - Never leave any field empty. If no content, provide a summary or placeholder.
 - Use supportive and concise language for each audience.
 - Only put scoring and factual axis breakdowns in 'shared'.
 - Only put audience-specific feedback in the respective view.
-- Return only the JSON object, no additional commentary.
+- Return only the JSON object, no additional commentary."""
+
+# Reports can also be generated section by section: the shared scores first, then each
+# audience's view only when that audience asks for it.
+SECTIONS = ('shared', 'student_view', 'employer_view')
+AUDIENCE_SECTIONS = {
+    'shared': ('shared',),
+    'student': ('shared', 'student_view'),
+    'employer': ('shared', 'employer_view'),
+}
+
+# Fields each section must contain for a response to count as complete; a section
+# missing from a full-report response is re-asked on its own instead of discarded
+REPORT_SCHEMA = {
+    'shared': ('skills_score', 'experience_score', 'culture_fit_score', 'growth_potential_score'),
+    'student_view': ('career_insights',),
+    'employer_view': ('risk_flags', 'fit_summary'),
+}
+
+SECTION_INSTRUCTIONS = {
+    'shared': """You are an expert AI job matching analyst. Score how well the resume matches the job description.
+Return ONLY the "shared" section: the axis-level scores and breakdowns that are IDENTICAL for the candidate and the employer.
+Do not write any audience-specific feedback.""",
+    'student_view': """You are an expert AI career coach. Using the resume, the job description and the match scores below, write the feedback shown to the STUDENT (candidate):
+    - career_insights (strengths, gaps, opportunities, warnings),
+    - personalized_recommendations (actionable, practical steps),
+    - encouragement (1-2 lines of positive summary or motivation),
+    - next_career_goal (best-fit role the candidate should target next).
+Return ONLY the "student_view" section and stay consistent with the scores.""",
+    'employer_view': """You are an expert AI recruiting analyst. Using the resume, the job description and the match scores below, write the feedback shown to the EMPLOYER (recruiter/hiring manager):
+    - risk_flags (hard filters, must-have gaps),
+    - opportunity_flags (unique strengths, diversity signals, etc.),
+    - recruiter_recommendations (practical suggestions: ai interview, reject, screen, etc.),
+    - fit_summary (2-3 line high-level evaluation of the candidate's suitability),
+    - follow_up_questions (3-5 specific questions an interviewer should ask to clarify the candidate’s fit, based on gaps, ambiguities, or strengths).
+Return ONLY the "employer_view" section and stay consistent with the scores.""",
+}
+
+# Any change to the prompt text or report version invalidates existing reports
+PROMPT_FINGERPRINT = hashlib.sha256(
+    '\n'.join([REPORT_VERSION, ANALYSIS_INSTRUCTIONS, REPORT_JSON_SCHEMA, ANALYSIS_GUIDELINES, *SECTION_INSTRUCTIONS.values()]).encode('utf-8')
+).hexdigest()[:16]
+
+
+
+class JSONSet(Func):
+    """
+    Set one (nested) key of a JSON column inside an UPDATE: jsonb_set on PostgreSQL,
+    json_set on SQLite. ``value`` is an SQL expression, or a Value with a JSONField
+    output_field to store a JSON object.
+    """
+    output_field = JSONField()
+
+    def __init__(self, expression, path, value):
+        self.path = list(path)
+        super().__init__(expression, value)
+
+    def _compile_parts(self, compiler):
+        target, value = self.get_source_expressions()
+        target_sql, target_params = compiler.compile(target)
+        value_sql, value_params = compiler.compile(value)
+        return target_sql, tuple(target_params), value_sql, tuple(value_params), isinstance(value.output_field, JSONField)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        target_sql, target_params, value_sql, value_params, is_json = self._compile_parts(compiler)
+        if not is_json:
+            value_sql = f"to_jsonb({value_sql})"
+        path = '{' + ','.join(self.path) + '}'
+        return f"jsonb_set({target_sql}, %s::text[], {value_sql})", (*target_params, path, *value_params)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        target_sql, target_params, value_sql, value_params, is_json = self._compile_parts(compiler)
+        if is_json:
+            value_sql = f"json({value_sql})"
+        path = '$.' + '.'.join(self.path)
+        return f"json_set({target_sql}, %s, {value_sql})", (*target_params, path, *value_params)
+
+
+# Configure Gemini (used directly for context caching); generation goes through the provider router
+genai.configure(api_key=settings.GEMINI_API_KEY)
+model = llm_router_service
+
+
+class AIAnalysisService:
+    def __init__(self):
+        self.model = model
+        self._context_caches = {}
+        self._usage_lock = threading.Lock()
+        self.tokens_used = 0  # prompt + output tokens billed by the provider since start-up
+
+    @contextmanager
+    def generation_source(self, source: str):
+        """Tag reports created inside the block with ``source`` (AIAnalysisReport.Source)."""
+        token = _generation_source.set(source)
+        try:
+            yield
+        finally:
+            _generation_source.reset(token)
+
+    def get_or_create_analysis(self, resume: Resume, job: Job, wait_timeout: Optional[float] = None, audience: Optional[str] = None,
+                               use_cache: bool = True) -> AIAnalysisReport:
+        """
+        Get existing analysis or create the parts of it the audience needs.
+
+        ``audience`` is 'student', 'employer' or 'shared' (scores only); None means the full
+        dual-audience report. Sections already stored are reused, so a student and an employer
+        looking at the same match share one set of scores and each pay only for their own view.
+
+        Generation is single-flight across processes: if another request is already
+        generating this report we wait up to ``wait_timeout`` seconds for its result,
+        then raise AnalysisInProgress carrying a poll token. ``use_cache=False`` (a forced
+        refresh) asks the model again instead of replaying cached responses.
+        """
+        sections = self.sections_for(audience)
+        while True:
+            existing_report = self.get_fresh_report(resume, job)
+            if existing_report and self.has_sections(existing_report, sections):
+                return existing_report
+
+            lock, is_leader = analysis_lock_service.acquire(resume, job, REPORT_VERSION)
+            if is_leader:
+                try:
+                    # Re-check: a previous leader may have finished just before we took the lock
+                    return self._generate_sections(resume, job, self.get_fresh_report(resume, job), sections, lock=lock, use_cache=use_cache)
+                finally:
+                    analysis_lock_service.release(lock)
+
+            report = analysis_lock_service.wait_for_leader(lock, wait_timeout, sections=sections)
+            if report and self.has_sections(report, sections):
+                return report
+            if report is None:
+                # Leader released without a report (e.g. LLM error); try to take over
+                logger.info(f"Analysis leader for resume {resume.id} / job {job.id} finished without a report, retrying")
+
+    @staticmethod
+    def sections_for(audience: Optional[str]) -> tuple:
+        if audience is None:
+            return SECTIONS
+        if audience not in AUDIENCE_SECTIONS:
+            raise ValueError(f"Unknown analysis audience '{audience}'")
+        return AUDIENCE_SECTIONS[audience]
+
+    @staticmethod
+    def has_sections(report: AIAnalysisReport, sections) -> bool:
+        return all(section in (report.report_data or {}) for section in sections)
+
+    @staticmethod
+    def audience_of(report_data: Dict[str, Any]) -> Optional[str]:
+        """The narrowest audience whose sections cover what the report holds (None: both views)."""
+        has_student, has_employer = 'student_view' in report_data, 'employer_view' in report_data
+        if has_student and has_employer:
+            return None
+        if has_student:
+            return 'student'
+        if has_employer:
+            return 'employer'
+        return 'shared'
+
+    def get_fresh_report(self, resume: Resume, job: Job) -> Optional[AIAnalysisReport]:
+        report = AIAnalysisReport.objects.filter(resume=resume, job=job).first()
+        if report and not self.check_staleness(report, resume, job):
+            return report
+        return None
+
+    def _generate_sections(self, resume: Resume, job: Job, report: Optional[AIAnalysisReport], sections,
+                           combined: bool = True, lock: Optional[AnalysisGenerationLock] = None,
+                           use_cache: bool = True) -> AIAnalysisReport:
+        """
+        Generate the sections missing from ``report`` (None: no fresh report) and store each as
+        it completes. With ``combined`` a report needing every section is made in one call, and
+        one needing the scores and a single audience view gets both from one call; sections
+        that call leaves out, or that a report already half-has, are filled in one by one.
+        ``lock``, when the caller holds one, is renewed before each LLM call.
+        """
+        missing = [section for section in sections if report is None or section not in report.report_data]
+        if not missing:
+            return report
+        if combined and report is None and len(missing) == len(SECTIONS):
+            # Everything is needed: one combined call is cheaper than three
+            return self._create_analysis(resume, job, lock=lock, use_cache=use_cache)
+
+        employer_weights = self._get_employer_weights(job)
+        career_preferences = self._get_career_preferences(resume)
+        if combined and report is None and len(missing) == 2:
+            if lock is not None:
+                analysis_lock_service.renew(lock)
+            prompt = self._build_sections_prompt(missing, resume.parsed_text, job, career_preferences)
+            started = time.monotonic()
+            response = llm_gateway_service.generate_content(
+                self.model, prompt, validator=lambda text: matches_schema(text, {s: REPORT_SCHEMA[s] for s in missing}),
+                use_cache=use_cache,
+            )
+            self._log_usage('+'.join(missing), response, started, report_count=1)
+            report = self._save_combined_sections(resume, job, missing, response.text, employer_weights)
+            missing = [section for section in missing if report is None or section not in report.report_data]
+
+        for section in missing:
+            if lock is not None:
+                analysis_lock_service.renew(lock)
+            shared = report.report_data['shared'] if report is not None else None
+            prompt = self._build_section_prompt(section, resume.parsed_text, job, career_preferences, shared)
+            started = time.monotonic()
+            response = llm_gateway_service.generate_content(
+                self.model, prompt, validator=lambda text, section=section: matches_schema(text, {section: REPORT_SCHEMA[section]}),
+                use_cache=use_cache,
+            )
+            self._log_usage(section, response, started, report_count=1)
+            content = self._parse_section_response(section, response.text)
+            report = self._save_section(resume, job, report, section, content, employer_weights)
+        return report
+
+    def stream_analysis(self, resume: Resume, job: Job, audience: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of get_or_create_analysis. Yields events as dicts:
+          {'event': 'delta', 'data': {'text': ...}}            raw model output as it arrives
+          {'event': 'section', 'data': {'name': ..., 'content': ...}}  a top-level section once closed
+          {'event': 'processing', 'data': {'poll_token': ...}} another request is generating this report
+          {'event': 'report', 'report': AIAnalysisReport}      the persisted final report
+        Sections already stored are replayed without calling the LLM. A new report is streamed
+        from one prompt (all sections, or the scores plus the audience's view); sections still
+        missing after that are streamed one prompt at a time (shared scores first).
+        """
+        sections = self.sections_for(audience)
+        existing_report = self.get_fresh_report(resume, job)
+        if existing_report and self.has_sections(existing_report, sections):
+            yield from self._replay_report(existing_report, sections)
+            return
+
+        lock, is_leader = analysis_lock_service.acquire(resume, job, REPORT_VERSION)
+        if not is_leader:
+            yield {'event': 'processing', 'data': {'poll_token': str(lock.id)}}
+            try:
+                report = analysis_lock_service.wait_for_leader(lock, sections=sections)
+            except AnalysisInProgress:
+                return
+            if report and self.has_sections(report, sections):
+                yield from self._replay_report(report, sections)
+            return
+
+        try:
+            report = self.get_fresh_report(resume, job)
+            employer_weights = self._get_employer_weights(job)
+            career_preferences = self._get_career_preferences(resume)
+            if report is None and len(sections) == len(SECTIONS):
+                prompt = self._build_dual_analysis_prompt(
+                    resume_text=resume.parsed_text,
+                    job_data=job,
+                    career_preferences=career_preferences,
+                    employer_weights=employer_weights
+                )
+                text = yield from self._stream_prompt('stream', prompt, self._is_valid_analysis_response, employer_weights)
+                analysis_data, missing = self._parse_llm_response(text)
+                report = self._save_parsed_report(resume, job, analysis_data, missing, employer_weights, lock=lock)
+                for section in missing:
+                    yield {'event': 'section', 'data': {'name': section, 'content': report.report_data[section]}}
+            else:
+                streamed = set()
+                if report is None and len(sections) == 2:
+                    # Neither the scores nor the audience view exist yet: stream both from one prompt
+                    prompt = self._build_sections_prompt(sections, resume.parsed_text, job, career_preferences)
+                    text = yield from self._stream_prompt(
+                        f"stream:{'+'.join(sections)}", prompt,
+                        lambda text: matches_schema(text, {s: REPORT_SCHEMA[s] for s in sections}), employer_weights
+                    )
+                    report = self._save_combined_sections(resume, job, sections, text, employer_weights)
+                    streamed = {section for section in sections if report is not None and section in report.report_data}
+                for section in sections:
+                    if report is not None and section in report.report_data:
+                        if section not in streamed:
+                            yield {'event': 'section', 'data': {'name': section, 'content': report.report_data[section]}}
+                        continue
+                    analysis_lock_service.renew(lock)
+                    shared = report.report_data['shared'] if report is not None else None
+                    prompt = self._build_section_prompt(section, resume.parsed_text, job, career_preferences, shared)
+                    text = yield from self._stream_prompt(
+                        f"stream:{section}", prompt,
+                        lambda text, section=section: matches_schema(text, {section: REPORT_SCHEMA[section]}), employer_weights
+                    )
+                    content = self._parse_section_response(section, text)
+                    report = self._save_section(resume, job, report, section, content, employer_weights)
+            yield {'event': 'report', 'report': report}
+        finally:
+            analysis_lock_service.release(lock)
+
+    def _stream_prompt(self, mode: str, prompt: str, validator, employer_weights: Dict[str, float]):
+        """Stream one prompt, yielding delta/section events; returns the full response text."""
+        parser = IncrementalJSONSectionParser()
+        started = time.monotonic()
+        response = llm_gateway_service.generate_content(self.model, prompt, stream=True, validator=validator)
+        for chunk in response:
+            text = getattr(chunk, 'text', '') or ''
+            if not text:
+                continue
+            yield {'event': 'delta', 'data': {'text': text}}
+            for name, content in parser.feed(text):
+                if name == 'shared' and isinstance(content, dict):
+                    # Give the client a provisional weighted score as soon as the axis scores land
+                    content = dict(content)
+                    content['overall_score'] = self._calculate_overall_score(content, employer_weights)
+                yield {'event': 'section', 'data': {'name': name, 'content': content}}
+        self._log_usage(mode, response, started, report_count=1)
+        return parser.text
+
+    def _replay_report(self, report: AIAnalysisReport, sections=SECTIONS) -> Iterator[Dict[str, Any]]:
+        for name in sections:
+            if name in report.report_data:
+                yield {'event': 'section', 'data': {'name': name, 'content': report.report_data[name]}}
+        yield {'event': 'report', 'report': report}
+
+    def _create_analysis(self, resume: Resume, job: Job, lock: Optional[AnalysisGenerationLock] = None,
+                         use_cache: bool = True) -> AIAnalysisReport:
+        """Create a new AI analysis report, using employer weights if available."""
+        try:
+            employer_weights = self._get_employer_weights(job)
+            
+            # Build the prompt with all context
+            prompt = self._build_dual_analysis_prompt(
+                resume_text=resume.parsed_text,
+                job_data=job,
+                career_preferences=self._get_career_preferences(resume),
+                employer_weights=employer_weights
+            )
+            
+            started = time.monotonic()
+            response = llm_gateway_service.generate_content(self.model, prompt, validator=self._is_valid_analysis_response,
+                                                            use_cache=use_cache)
+            self._log_usage('single', response, started, report_count=1)
+            analysis_data, missing = self._parse_llm_response(response.text)
+            return self._save_parsed_report(resume, job, analysis_data, missing, employer_weights, lock=lock, use_cache=use_cache)
+        except Exception as e:
+            logger.error(f"Error creating AI analysis: {e}")
+            raise
+
+    def analyze_jobs(self, resume: Resume, jobs: List[Job], batch_size: Optional[int] = None) -> Dict[str, AIAnalysisReport]:
+        """
+        Analyse one resume against several jobs, sending the resume and instructions once
+        per batch of jobs instead of once per job. Jobs with a fresh report, or whose report
+        is being generated by another process, are skipped. Returns {job_id: report}.
+        """
+        batch_size = batch_size or getattr(settings, 'AI_ANALYSIS_BATCH_SIZE', 5)
+        reports = {}
+        pending = []
+        for job in jobs:
+            existing = self.get_fresh_report(resume, job)
+            if existing:
+                reports[str(job.id)] = existing
+            else:
+                pending.append(job)
+
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            locks = []
+            try:
+                for job in chunk:
+                    lock, is_leader = analysis_lock_service.acquire(resume, job, REPORT_VERSION)
+                    if is_leader:
+                        locks.append((job, lock))
+                if locks:
+                    reports.update(self._create_batch_analysis(resume, [job for job, _ in locks]))
+            finally:
+                for _, lock in locks:
+                    analysis_lock_service.release(lock)
+        return reports
+
+    def _create_batch_analysis(self, resume: Resume, jobs: List[Job]) -> Dict[str, AIAnalysisReport]:
+        """Generate reports for several jobs from a single multi-job prompt."""
+        if len(jobs) == 1:
+            return {str(jobs[0].id): self._create_analysis(resume, jobs[0])}
+
+        career_preferences = self._get_career_preferences(resume)
+        prefix = self._build_batch_prompt_prefix(resume.parsed_text, career_preferences)
+        suffix = self._build_batch_prompt_jobs(jobs)
+
+        started = time.monotonic()
+        job_ids = [str(job.id) for job in jobs]
+        cached_model = self._get_context_cached_model(resume, prefix)
+        response = llm_gateway_service.generate_content(
+            self.model, prefix + suffix,
+            validator=lambda text: self._is_valid_batch_response(text, job_ids),
+            # The context-cached model talks to Gemini directly, so it takes its quota from the router's Gemini bucket
+            call=(lambda: rate_limiter_service.call('llm:gemini', cached_model.generate_content, suffix)) if cached_model is not None else None,
+        )
+        self._log_usage('batch', response, started, report_count=len(jobs))
+
+        parsed = self._parse_batch_llm_response(response.text, job_ids)
+        reports = {}
+        for job in jobs:
+            entry = parsed.get(str(job.id))
+            if entry is None:
+                # The model dropped or mangled this job's scores; fall back to the single-job path
+                logger.warning(f"Batch analysis response missing job {job.id}; generating it individually")
+                reports[str(job.id)] = self._create_analysis(resume, job)
+                continue
+            analysis_data, missing = entry
+            reports[str(job.id)] = self._save_parsed_report(resume, job, analysis_data, missing, self._get_employer_weights(job))
+        return reports
+
+    def _get_career_preferences(self, resume: Resume) -> Dict[str, Any]:
+        career_preferences = resume.student_profile.career_preferences or {}
+        return {
+            'industries': career_preferences.get('industries', []),
+            'locations': career_preferences.get('locations', []),
+            'work_types': career_preferences.get('work_types', []),
+            'preferred_roles': career_preferences.get('preferred_roles', [])
+        }
+
+    def _get_employer_weights(self, job: Job) -> Dict[str, float]:
+        """Fetch employer weights from the job if available, normalised to sum to 1."""
+        if hasattr(job, 'matching_weights') and job.matching_weights:
+            raw_weights = {
+                'skills': float(job.matching_weights.get('skills', 0.4)),
+                'experience': float(job.matching_weights.get('experience', 0.3)),
+                'culture_fit': float(job.matching_weights.get('culture_fit', 0.15)),
+                'growth_potential': float(job.matching_weights.get('growth_potential', 0.1)),
+            }
+            total = sum(raw_weights.values())
+            if total > 0:
+                return {k: v / total for k, v in raw_weights.items()}
+        return {'skills': 0.45, 'experience': 0.25, 'culture_fit': 0.15, 'growth_potential': 0.1}
+
+    def _save_report(self, resume: Resume, job: Job, analysis_data: Dict[str, Any], employer_weights: Dict[str, float]) -> AIAnalysisReport:
+        # Calculate overall score using employer weights from shared data
+        overall_score = self._calculate_overall_score(analysis_data['shared'], employer_weights)
+        analysis_data['shared']['overall_score'] = overall_score
+        
+        # Add metadata fields for frontend
+        analysis_data['audience'] = self.audience_of(analysis_data) or 'dual'  # which audiences the report can serve
+        analysis_data['employer_weightage'] = employer_weights
+        
+        # Create or update the report
+        report, created = AIAnalysisReport.objects.update_or_create(
+            resume=resume,
+            job=job,
+            defaults={
+                'overall_score': overall_score,
+                'report_data': analysis_data,
+                'report_version': REPORT_VERSION,
+                'model_name': MODEL_NAME,
+                'is_stale': False,
+                'content_fingerprints': self.compute_fingerprints(resume, job),
+                'generated_by': _generation_source.get(),
+            }
+        )
+        return report
+
+    def _save_parsed_report(self, resume: Resume, job: Job, analysis_data: Dict[str, Any], missing: List[str],
+                            employer_weights: Dict[str, float],
+                            lock: Optional[AnalysisGenerationLock] = None, use_cache: bool = True) -> AIAnalysisReport:
+        """Save a parsed full report; sections the response lacked are re-asked one by one instead of defaulted."""
+        if not missing:
+            return self._save_report(resume, job, analysis_data, employer_weights)
+        logger.warning(f"AI analysis for resume {resume.id} / job {job.id} lacks {', '.join(missing)}; re-asking for those sections only")
+        report = None
+        if 'shared' not in missing:
+            present = {section: content for section, content in analysis_data.items() if section not in missing}
+            report = self._save_report(resume, job, present, employer_weights)
+        return self._generate_sections(resume, job, report, SECTIONS, combined=False, lock=lock, use_cache=use_cache)
+
+    def _save_combined_sections(self, resume: Resume, job: Job, sections, response_text: str,
+                                employer_weights: Dict[str, float]) -> Optional[AIAnalysisReport]:
+        """
+        Store the sections a shared-plus-view response brought back complete. Returns None,
+        storing nothing, if the shared scores are missing; absent views are left for the caller.
+        """
+        schema = {section: REPORT_SCHEMA[section] for section in sections}
+        parsed = llm_json_parser.parse(response_text, f"analysis:{'+'.join(sections)}", schema)
+        if parsed.data is None or 'shared' in parsed.missing:
+            return None
+        normalized = self._normalize_analysis_data(parsed.data)
+        present = {section: normalized[section] for section in sections if section not in parsed.missing}
+        return self._save_report(resume, job, present, employer_weights)
+
+    def _save_section(self, resume: Resume, job: Job, report: Optional[AIAnalysisReport], section: str,
+                      content: Dict[str, Any], employer_weights: Dict[str, float]) -> AIAnalysisReport:
+        """Store one generated section. New shared scores replace the report, dropping views written against old ones."""
+        if section == 'shared':
+            return self._save_report(resume, job, {'shared': content}, employer_weights)
+        report_data = dict(report.report_data)
+        report_data[section] = content
+        report_data['audience'] = self.audience_of(report_data) or 'dual'
+        AIAnalysisReport.objects.filter(id=report.id).update(report_data=report_data)
+        report.report_data = report_data
+        return report
+
+    # ---------------- Re-scoring ----------------
+
+    def rescore_reports(self, job: Job, report_ids: Optional[List[Any]] = None) -> int:
+        """
+        Recompute overall_score for every report of ``job`` (or just ``report_ids``) from the
+        stored shared axis scores and the job's current weights, in a single UPDATE and
+        without calling the LLM. Mirrors _calculate_overall_score. Returns the number of
+        reports updated.
+        """
+        weights = self._get_employer_weights(job)
+
+        def shared_int(key):
+            # int(float(x)) truncates towards zero
+            number = Coalesce(Cast(KT(f'report_data__shared__{key}'), FloatField()), Value(0.0))
+            return Sign(number) * Floor(Abs(number))
+
+        def clamp(expression):
+            return Greatest(Value(0.0), Least(Value(100.0), expression))
+
+        weighted = None
+        for axis, weight in weights.items():
+            term = clamp(shared_int(f'{axis}_score')) * Value(weight)
+            weighted = term if weighted is None else weighted + term
+        # Halves round up; ROUND() on double precision rounds them to even on PostgreSQL
+        overall = Cast(Floor(clamp(weighted + shared_int('preferences_bonus')) + Value(0.5)), IntegerField())
+
+        reports = AIAnalysisReport.objects.filter(job=job, report_data__has_key='shared')
+        if report_ids is not None:
+            reports = reports.filter(id__in=report_ids)
+        with transaction.atomic():
+            updated = reports.update(
+                overall_score=overall,
+                report_data=JSONSet(
+                    JSONSet(F('report_data'), ['shared', 'overall_score'], overall),
+                    ['employer_weightage'], Value(weights, output_field=JSONField()),
+                ),
+            )
+            # Reports without fingerprints adopt the current inputs on their next staleness check
+            reports.exclude(content_fingerprints={}).update(
+                content_fingerprints=JSONSet(F('content_fingerprints'), ['weights'], Value(self._hash(weights), output_field=JSONField()))
+            )
+        logger.info(f"Re-scored {updated} AI analysis reports for job {job.id} with weights {weights}")
+        return updated
+
+    # ---------------- Staleness tracking ----------------
+
+    @staticmethod
+    def _hash(value: Any) -> str:
+        payload = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def compute_fingerprints(self, resume: Resume, job: Job) -> Dict[str, str]:
+        """Hash every input that shapes a report, so a mismatch pinpoints what changed."""
+        return {
+            'resume': self._hash(resume.parsed_text or ''),
+            'job': self._hash({
+                'title': job.title,
+                'company': job.company.name,
+                'industry': job.company.industry,
+                'location': job.location,
+                'job_type': job.job_type,
+                'remote_option': job.remote_option,
+                'salary_min': job.salary_min,
+                'salary_max': job.salary_max,
+                'description': job.description,
+                'requirements': job.requirements,
+                'responsibilities': job.responsibilities,
+            }),
+            'preferences': self._hash(self._get_career_preferences(resume)),
+            'weights': self._hash(self._get_employer_weights(job)),
+            'prompt': PROMPT_FINGERPRINT,
+        }
+
+    def check_staleness(self, report: AIAnalysisReport, resume: Resume, job: Job) -> bool:
+        """
+        Return True if the report is stale, lazily flagging it when its stored
+        fingerprints no longer match the current inputs.
+        """
+        if report.is_stale:
+            return True
+        current = self.compute_fingerprints(resume, job)
+        stored = report.content_fingerprints or {}
+        if not stored:
+            if report.report_version != REPORT_VERSION:
+                changed = ['prompt']
+            else:
+                # Report predates fingerprinting; adopt the current inputs rather than regenerate blindly
+                AIAnalysisReport.objects.filter(id=report.id).update(content_fingerprints=current)
+                report.content_fingerprints = current
+                return False
+        else:
+            changed = [part for part, value in current.items() if stored.get(part) != value]
+        if not changed:
+            return False
+        if changed == ['weights']:
+            # Weights only feed the arithmetic overall score; re-score instead of regenerating.
+            # Only this report: the rest of the job's reports are re-scored when they are read
+            # or by the weight-change view, not behind the back of a concurrent _save_section.
+            self.rescore_reports(job, report_ids=[report.id])
+            report.refresh_from_db(fields=['overall_score', 'report_data', 'content_fingerprints'])
+            return False
+        logger.info(f"AI analysis report {report.id} is stale (changed: {', '.join(changed)})")
+        AIAnalysisReport.objects.filter(id=report.id).update(is_stale=True)
+        report.is_stale = True
+        return True
+
+    def record_view(self, report: AIAnalysisReport) -> None:
+        """Count a user viewing the report; views drive which stale reports get refreshed first."""
+        AIAnalysisReport.objects.filter(id=report.id).update(view_count=F('view_count') + 1, last_viewed_at=timezone.now())
+
+    def _log_usage(self, mode: str, response, started: float, report_count: int) -> None:
+        """Log token usage and latency so the batched and single-job paths can be compared."""
+        latency = time.monotonic() - started
+        if getattr(response, 'cached', False):
+            logger.info(f"AI analysis [{mode}] reports={report_count} served from response cache in {latency:.3f}s")
+            return
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+        with self._usage_lock:
+            self.tokens_used += prompt_tokens + output_tokens
+        logger.info(
+            f"AI analysis [{mode}] reports={report_count} latency={latency:.2f}s "
+            f"prompt_tokens={prompt_tokens} cached_tokens={cached_tokens} output_tokens={output_tokens} "
+            f"per_report_tokens={(prompt_tokens + output_tokens) / max(report_count, 1):.0f} "
+            f"per_report_latency={latency / max(report_count, 1):.2f}s"
+        )
+
+    def _format_career_preferences(self, career_preferences: Dict[str, Any]) -> str:
+        pref_industries = ', '.join(career_preferences.get('industries', [])) or 'None specified'
+        pref_locations = ', '.join(career_preferences.get('locations', [])) or 'None specified'
+        pref_work_types = ', '.join(career_preferences.get('work_types', [])) or 'None specified'
+        pref_roles = ', '.join(career_preferences.get('preferred_roles', [])) or 'None specified'
+        return f"""CANDIDATE CAREER PREFERENCES:
+Preferred Industries: {pref_industries}
+Preferred Locations: {pref_locations}
+Preferred Work Types: {pref_work_types}
+Preferred Roles: {pref_roles}"""
+
+    def _format_job_details(self, job_data: Job) -> str:
+        return f"""Title: {job_data.title}
+Company: {job_data.company.name}
+Industry: {job_data.company.industry or 'Not specified'}
+Location: {job_data.location or 'Not specified'}
+Job Type: {job_data.get_job_type_display()}
+Remote Option: {job_data.get_remote_option_display()}
+Salary Range: {job_data.salary_min or 'Not specified'} - {job_data.salary_max or 'Not specified'}
+Description: {prompt_budget_service.compact_text(job_data.description, 'ANALYSIS_JOB')}
+Requirements: {', '.join(job_data.requirements) if job_data.requirements else 'Not specified'}
+Responsibilities: {', '.join(job_data.responsibilities) if job_data.responsibilities else 'Not specified'}"""
+
+    def _build_dual_analysis_prompt(self, resume_text: str, job_data: Job, career_preferences: Dict[str, Any], employer_weights: Optional[Dict[str, float]] = None) -> str:
+        """Build the prompt for the LLM analysis, with new matrix and enhanced insight fields. Explicitly require no empty objects/arrays."""
+        prompt = f"""
+{ANALYSIS_INSTRUCTIONS}
+
+
+RESUME TEXT:
+{prompt_budget_service.compact_resume(resume_text)}
+
+JOB DETAILS:
+{self._format_job_details(job_data)}
+
+{self._format_career_preferences(career_preferences)}
+
+Please provide a comprehensive analysis in the following JSON format:
+
+{REPORT_JSON_SCHEMA}
+
+{ANALYSIS_GUIDELINES}
         """
         return prompt
 
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse the LLM response and ensure it's valid JSON."""
+    def _build_section_prompt(self, section: str, resume_text: str, job_data: Job, career_preferences: Dict[str, Any],
+                              shared: Optional[Dict[str, Any]] = None) -> str:
+        """Prompt for a single report section; the audience views are grounded in the stored shared scores."""
+        scores = ''
+        if shared is not None:
+            scores = f"""
+MATCH SCORES:
+{prompt_budget_service.compact_match_report({'shared': shared}, 'ANALYSIS_SHARED')}
+"""
+        return f"""
+{SECTION_INSTRUCTIONS[section]}
+
+
+RESUME TEXT:
+{prompt_budget_service.compact_resume(resume_text)}
+
+JOB DETAILS:
+{self._format_job_details(job_data)}
+
+{self._format_career_preferences(career_preferences)}
+{scores}
+Respond in the following JSON format:
+
+{{
+  {SECTION_JSON_SCHEMAS[section]}
+}}
+
+{ANALYSIS_GUIDELINES}
+"""
+
+    def _build_sections_prompt(self, sections, resume_text: str, job_data: Job, career_preferences: Dict[str, Any]) -> str:
+        """Prompt for the shared scores plus one audience view in a single response."""
+        names = ' and '.join(f'"{section}"' for section in sections)
+        schema = ",\n  ".join(SECTION_JSON_SCHEMAS[section] for section in sections)
+        return f"""
+{ANALYSIS_INSTRUCTIONS}
+Only the {names} sections are needed now; do not write any other section.
+
+
+RESUME TEXT:
+{prompt_budget_service.compact_resume(resume_text)}
+
+JOB DETAILS:
+{self._format_job_details(job_data)}
+
+{self._format_career_preferences(career_preferences)}
+
+Respond in the following JSON format:
+
+{{
+  {schema}
+}}
+
+{ANALYSIS_GUIDELINES}
+"""
+
+    def _build_batch_prompt_prefix(self, resume_text: str, career_preferences: Dict[str, Any]) -> str:
+        """
+        Shared, job-independent part of a multi-job prompt. It is identical for every batch
+        of the same resume, which is what makes it eligible for context caching.
+        """
+        return f"""
+{ANALYSIS_INSTRUCTIONS}
+
+You will receive SEVERAL jobs. Produce one independent report per job, each following the format below exactly.
+
+
+RESUME TEXT:
+{prompt_budget_service.compact_resume(resume_text)}
+
+{self._format_career_preferences(career_preferences)}
+
+Each per-job report must use the following JSON format:
+
+{REPORT_JSON_SCHEMA}
+
+Return a single JSON object of the form {{"reports": {{"<job id>": <report>, ...}}}} with exactly one entry per job, keyed by the job id given in its JOB header.
+
+{ANALYSIS_GUIDELINES}
+"""
+
+    def _build_batch_prompt_jobs(self, jobs: List[Job]) -> str:
+        blocks = [f"=== JOB {job.id} ===\n{self._format_job_details(job)}" for job in jobs]
+        return "\nJOBS:\n" + "\n\n".join(blocks) + "\n"
+
+    def _get_context_cached_model(self, resume: Resume, prefix: str):
+        """
+        Return a model bound to a Gemini context cache holding the batch prefix, or None
+        when caching is disabled, the prefix is below the provider's minimum size, or
+        the cache cannot be created. Caches are reused per resume until they expire.
+        """
+        config = getattr(settings, 'AI_ANALYSIS_CONTEXT_CACHE', {})
+        if not config.get('ENABLED', False):
+            return None
+        # Rough 4-characters-per-token estimate; the provider rejects caches below its minimum
+        if len(prefix) / 4 < config.get('MIN_TOKENS', 4096):
+            return None
+        cache_key = (str(resume.id), hashlib.sha256(prefix.encode('utf-8')).hexdigest())
+        ttl_seconds = config.get('TTL_SECONDS', 300)
+        now = time.monotonic()
+        entry = self._context_caches.get(cache_key)
+        if entry and entry[1] > now:
+            return entry[0]
         try:
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
-            data = json.loads(cleaned_text)
-            return self._normalize_analysis_data(data)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"Response text: {response_text}")
-            return self._get_default_analysis_data()
+            from google.generativeai import caching
+            cached_content = caching.CachedContent.create(
+                model=f"models/{MODEL_NAME}",
+                display_name=f"resume-{resume.id}",
+                contents=[prefix],
+                ttl=timedelta(seconds=ttl_seconds),
+            )
+            cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
         except Exception as e:
-            logger.error(f"Error parsing LLM response: {e}")
-            return self._get_default_analysis_data()
+            logger.warning(f"Context cache unavailable, sending full batch prompt: {e}")
+            return None
+        # Expire our handle slightly before the server-side TTL
+        self._context_caches[cache_key] = (cached_model, now + ttl_seconds * 0.9)
+        return cached_model
+
+    @staticmethod
+    def _is_valid_analysis_response(response_text: str) -> bool:
+        """Only complete reports (every section with its required fields) are worth caching."""
+        return matches_schema(response_text, REPORT_SCHEMA)
+
+    @staticmethod
+    def _is_valid_batch_response(response_text: str, job_ids: List[str]) -> bool:
+        try:
+            data = loads_strict(response_text)
+        except ValueError:
+            return False
+        reports = data.get('reports', data) if isinstance(data, dict) else {}
+        return all(isinstance(reports.get(job_id), dict) and not missing_keys(reports[job_id], REPORT_SCHEMA) for job_id in job_ids)
+
+    def _parse_llm_response(self, response_text: str) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Parse a full-report response, repairing malformed or truncated JSON. Returns the
+        normalised sections that came back complete and the names of those that did not.
+        """
+        parsed = llm_json_parser.parse(response_text, 'analysis', REPORT_SCHEMA)
+        if parsed.data is None:
+            return {}, list(SECTIONS)
+        return self._complete_sections(parsed.data, parsed.missing)
+
+    def _complete_sections(self, data: Dict[str, Any], missing: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        normalized = self._normalize_analysis_data(data)
+        return {section: normalized[section] for section in SECTIONS if section not in missing}, missing
+
+    def _parse_section_response(self, section: str, response_text: str) -> Dict[str, Any]:
+        """Parse a single-section response; the model may omit the outer section key."""
+        parsed = llm_json_parser.parse(response_text, f'analysis:{section}', {section: REPORT_SCHEMA[section]})
+        data = parsed.data or {}
+        content = data.get(section, data)
+        if not isinstance(content, dict):
+            content = {}
+        return self._normalize_analysis_data({section: content})[section]
+
+    def _parse_batch_llm_response(self, response_text: str, job_ids: List[str]) -> Dict[str, Tuple[Dict[str, Any], List[str]]]:
+        """
+        Parse a keyed multi-report response into {job_id: (sections, missing sections)}.
+        Jobs absent from the response, or without usable shared scores, are omitted.
+        """
+        parsed = llm_json_parser.parse(response_text, 'analysis:batch')
+        data = parsed.data or {}
+        reports = data.get('reports', data)
+        result = {}
+        for job_id in job_ids:
+            report = reports.get(job_id) if isinstance(reports, dict) else None
+            if not isinstance(report, dict):
+                continue
+            missing = missing_keys(report, REPORT_SCHEMA)
+            if 'shared' not in missing:
+                result[job_id] = self._complete_sections(report, missing)
+        return result
 
     def _normalize_analysis_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize and ensure all axis analyses and audience views are filled with at least a summary/placeholder."""
@@ -332,43 +1054,6 @@ Guidelines:
             "employer_view": employer_view
         }
 
-    def _get_default_analysis_data(self) -> Dict[str, Any]:
-        """Get default analysis data structure for error fallback."""
-        return {
-            "shared": {
-            "skills_score": 0,
-            "experience_score": 0,
-                "culture_fit_score": 0,
-                "growth_potential_score": 0,
-                "preferences_bonus": 0,
-                "overall_score": 0,
-                "skills_analysis": {"summary": "No skills analysis provided."},
-                "experience_analysis": {"summary": "No experience analysis provided."},
-                "culture_fit_analysis": {"summary": "No culture/team fit analysis provided."},
-                "growth_potential_analysis": {"summary": "No growth potential analysis provided."},
-                "preferences_analysis": [{
-                    "title": "No preferences analysis provided.",
-                    "impact": "low",
-                    "description": "",
-                    "match_level": "poor",
-                    "preference_type": "industry"
-                }]
-            },
-            "student_view": {
-            "career_insights": [],
-            "personalized_recommendations": [],
-                "encouragement": "No encouragement provided.",
-                "next_career_goal": "No career goal suggested."
-            },
-            "employer_view": {
-                "risk_flags": [],
-                "opportunity_flags": [],
-                "recruiter_recommendations": [],
-                "fit_summary": "No fit summary provided.",
-                "follow_up_questions": []
-            }
-        }
-
     def _calculate_overall_score(self, shared_data: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> int:
         """Calculate overall score from individual scores and preferences bonus."""
         weights = weights or {'skills': 0.45, 'experience': 0.25, 'culture_fit': 0.15, 'growth_potential': 0.1}
@@ -384,7 +1069,8 @@ Guidelines:
                 culture_fit_score * weights.get('culture_fit', 0.15) +
                 growth_potential_score * weights.get('growth_potential', 0.1)
             ) + preferences_bonus
-            return int(round(min(100, max(0, overall))))
+            # Round halves up, as rescore_reports does in SQL (Python's round() goes to even)
+            return int(math.floor(min(100, max(0, overall)) + 0.5))
         except Exception as e:
             logger.error(f"Error calculating overall score: {e}")
             return 0
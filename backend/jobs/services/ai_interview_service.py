@@ -1,100 +1,303 @@
 import logging
-from typing import List, Dict, Any
-from jobs.models import Job, Resume, AIInterview, Application
+import difflib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional
+from django.db import connection, transaction
+from django.db.models import Max
+from jobs.models import Job, Resume, AIInterview, Application, InterviewUtterance
 from django.utils import timezone
 from django.conf import settings
-import google.generativeai as genai
-import json
-from django.shortcuts import get_object_or_404
-from .ai_analysis_service import AIAnalysisReport
-from jobs.models import AIInterviewReport, AIInterview
+from .llm_gateway_service import llm_gateway_service
+from .llm_json import llm_json_parser, matches_schema
+from .prompt_budget_service import prompt_budget_service
+from .llm_router_service import llm_router_service
+from .question_bank_service import question_bank_service
+from ..tasks import enqueue_interview_report
 
 logger = logging.getLogger(__name__)
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
-llm_model = genai.GenerativeModel('gemini-2.5-flash')
+llm_model = llm_router_service
+
+
+INTERVIEW_QUESTION_COUNT = 3
+
+DEFAULT_SPECULATION_CONFIG = {
+    'ENABLED': True,
+    'MIN_PARTIAL_WORDS': 8,
+    'MIN_SIMILARITY': 0.75,
+    'MAX_DRAFTS_PER_QUESTION': 3,
+    'WAIT_SECONDS': 20,
+    'MAX_WORKERS': 4,
+}
+
+# Fixed fallback questions; their audio is pre-synthesised by the warm_tts_cache command
+FALLBACK_OPENING_QUESTION = "Based on your resume, walk me through your experience with a key technology required for the {job_title} role."
+FALLBACK_FOLLOWUP_QUESTION = "Can you provide a specific example of how you've applied that skill in a professional project?"
+
+QUESTION_SCHEMA = {'question_text': (), 'type': ()}
+
+
+def _is_valid_question(text: str) -> bool:
+    return matches_schema(text, QUESTION_SCHEMA)
+
+
+def _parse_question(text: str, name: str) -> Dict[str, Any]:
+    parsed = llm_json_parser.parse(text, name, QUESTION_SCHEMA)
+    if parsed.data is None or parsed.missing:
+        raise ValueError("Question must have 'question_text' and 'type'.")
+    return parsed.data
+
+
+def answer_similarity(partial: str, final: str) -> float:
+    """
+    Word-sequence similarity (0-1) of two transcripts. It falls as either text grows past
+    the other, so it measures divergence: a partial that has moved on from the one a draft
+    was made from gets a new draft.
+    """
+    partial_words = (partial or '').lower().split()
+    final_words = (final or '').lower().split()
+    if not partial_words or not final_words:
+        return 0.0
+    return difflib.SequenceMatcher(None, partial_words, final_words, autojunk=False).ratio()
+
+
+def answer_prefix_match(partial: str, final: str) -> float:
+    """
+    Share (0-1) of a partial transcript's words found, in order, in the same-length prefix
+    of the final answer. An answer that simply carried on after the partial still matches
+    fully; one that was revised or restarted does not.
+    """
+    partial_words = (partial or '').lower().split()
+    final_words = (final or '').lower().split()
+    if not partial_words or not final_words:
+        return 0.0
+    matcher = difflib.SequenceMatcher(None, partial_words, final_words[:len(partial_words)], autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(partial_words)
+
 
 class InterviewService:
+    """
+    Runs the conversational AI interview. While the candidate is still answering, a
+    follow-up question can be drafted in the background from the partial transcript;
+    on submit the draft is reused if the final answer has not materially diverged.
+    """
+
+    def __init__(self):
+        self.speculation = {**DEFAULT_SPECULATION_CONFIG, **getattr(settings, 'INTERVIEW_SPECULATION', {})}
+        self._executor = ThreadPoolExecutor(max_workers=self.speculation['MAX_WORKERS'], thread_name_prefix='interview-draft')
+        # (interview_id, question_index) -> [(partial_answer, future)], newest last
+        self._drafts: Dict[tuple, List[tuple]] = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
     def start_interview(self, application: Application) -> AIInterview:
         """
         Starts an AI interview by generating the first question.
         """
-        # Generate only the first question to start
-        first_question = self._generate_initial_question(application.job, application.resume)
+        # Generate only the first question to start, unless the job's question bank has one that fits this resume
+        first_question = question_bank_service.serve_opener(application.job, application.resume)
+        if first_question is None:
+            first_question = self._generate_initial_question(application.job, application.resume)
         
-        interview, created = AIInterview.objects.update_or_create(
-            application=application,
-            defaults={
-                'status': AIInterview.Status.IN_PROGRESS,
-                'questions': [first_question],
-                'answers': [],
-                'started_at': timezone.now(),
-                'completed_at': None,
-            }
-        )
+        with transaction.atomic():
+            interview, created = AIInterview.objects.update_or_create(
+                application=application,
+                defaults={
+                    'status': AIInterview.Status.IN_PROGRESS,
+                    'started_at': timezone.now(),
+                    'completed_at': None,
+                }
+            )
+            # A restarted interview begins a fresh transcript
+            interview.utterances.all().delete()
+            self.record_question(interview, first_question)
         logger.info(f"Started AI Interview {interview.id} for application {application.id}")
         return interview
 
     def submit_answer_and_get_next_question(self, interview: AIInterview, answer: Dict[str, Any]) -> AIInterview:
         """
-        Appends the current answer and generates the next dynamic question.
+        Records the current answer and generates the next dynamic question.
         Now always generates exactly 3 questions, one by one, for a conversational interview.
         """
+        questions, answers = interview.questions_and_answers()
+
         # 1. Save the current answer
-        answers = interview.answers or []
+        self.record_answer(interview, answer)
         answers.append(answer)
-        interview.answers = answers
 
         # 2. Check if the interview should end (after 3 questions)
-        if len(interview.questions) >= 3:
+        if len(questions) >= INTERVIEW_QUESTION_COUNT:
             interview.status = AIInterview.Status.COMPLETED
             interview.completed_at = timezone.now()
-            interview.save()
+            interview.save(update_fields=['status', 'completed_at', 'updated_at'])
             logger.info(f"AI Interview {interview.id} completed after 3 questions.")
-            # --- Enhancement: Automatically generate AIInterviewReport ---
+            # The report prompt is large; generate it on a worker so the final submit returns immediately
             try:
-                from .ai_interview_service import AIInterviewService
-                ai_interview_service = AIInterviewService()
-                ai_interview_service.generate_final_report(interview.id)
+                task = enqueue_interview_report(interview, requested_by=interview.application.applicant)
+                logger.info(f"Queued AIInterviewReport generation for interview {interview.id} as task {task.id}")
             except Exception as e:
-                logger.error(f"Failed to auto-generate AIInterviewReport for interview {interview.id}: {e}")
+                logger.error(f"Failed to queue AIInterviewReport for interview {interview.id}: {e}")
             return interview
 
-        # 3. Generate the next question based on the conversation history
-        previous_qa = [{'question': q, 'answer': a} for q, a in zip(interview.questions, interview.answers)]
-        next_question = self._generate_followup_question(interview.application.job, interview.application.resume, previous_qa)
+        # 3. Reuse the speculative draft if the answer matches it, else generate the next question now
+        next_question = self._take_draft(interview, len(questions), answer.get('text', ''))
+        if next_question is None:
+            previous_qa = [{'question': q, 'answer': a} for q, a in zip(questions, answers)]
+            next_question = self._generate_followup_question(interview.application.job, interview.application.resume, previous_qa)
         
-        # 4. Add the new question to the list
-        questions = interview.questions or []
-        questions.append(next_question)
-        interview.questions = questions
+        # 4. Add the new question to the transcript
+        self.record_question(interview, next_question)
+        interview.question_draft = None
         
-        interview.save()
+        interview.save(update_fields=['question_draft', 'updated_at'])
         logger.info(f"Submitted answer and generated next question for AI Interview {interview.id}")
         return interview
 
+    # ---------------- Transcript ----------------
+
+    def record_question(self, interview: AIInterview, question: Dict[str, Any]) -> InterviewUtterance:
+        extra = {k: v for k, v in question.items() if k != 'question_text'}
+        return self.append_utterance(interview, InterviewUtterance.Speaker.AI, question.get('question_text', ''), metadata=extra)
+
+    def record_answer(self, interview: AIInterview, answer: Dict[str, Any]) -> InterviewUtterance:
+        extra = {k: v for k, v in answer.items() if k not in ('text', 'audio_url')}
+        return self.append_utterance(interview, InterviewUtterance.Speaker.CANDIDATE, answer.get('text', ''),
+                                     audio_clip_url=answer.get('audio_url'), metadata=extra)
+
+    def append_utterance(self, interview: AIInterview, speaker: str, text: str, **fields) -> InterviewUtterance:
+        """
+        Append one turn with the next sequence number. The interview row is locked while
+        the number is allocated, so concurrent submits can't take the same one.
+        """
+        with transaction.atomic():
+            AIInterview.objects.select_for_update().only('id').get(id=interview.id)
+            last = interview.utterances.aggregate(last=Max('sequence'))['last'] or 0
+            return InterviewUtterance.objects.create(interview=interview, sequence=last + 1, speaker=speaker, text=text, **fields)
+
+    # ---------------- Speculative follow-up drafts ----------------
+
+    def draft_next_question(self, interview: AIInterview, partial_answer: str) -> bool:
+        """
+        Start drafting the follow-up to the question currently being answered from a
+        partial transcript. Returns True if a new draft was started; drafts that would
+        duplicate one already under way for a similar transcript are skipped.
+        """
+        config = self.speculation
+        if not config['ENABLED'] or interview.status != AIInterview.Status.IN_PROGRESS:
+            return False
+        if len((partial_answer or '').split()) < config['MIN_PARTIAL_WORDS']:
+            return False
+        questions, answers = interview.questions_and_answers()
+        index = len(questions)
+        # Drafting only makes sense while the current question is unanswered and not the last one
+        if index >= INTERVIEW_QUESTION_COUNT or len(answers) != index - 1:
+            return False
+
+        key = (str(interview.id), index)
+        with self._lock:
+            self._prune_drafts()
+            drafts = self._drafts.setdefault(key, [])
+            if drafts and answer_similarity(drafts[-1][0], partial_answer) >= config['MIN_SIMILARITY']:
+                return False
+            if len(drafts) >= config['MAX_DRAFTS_PER_QUESTION']:
+                return False
+            application = interview.application
+            previous_qa = [{'question': q, 'answer': a} for q, a in zip(questions, answers)]
+            previous_qa.append({'question': questions[-1], 'answer': {'text': partial_answer}})
+            future = self._executor.submit(
+                self._run_draft, interview.id, index, partial_answer, application.job, application.resume, previous_qa
+            )
+            drafts.append((partial_answer, future))
+            self._stats['drafted'] += 1
+        logger.info(f"Drafting question {index + 1} for AI Interview {interview.id} from a {len(partial_answer.split())}-word partial answer")
+        return True
+
+    def _run_draft(self, interview_id, index: int, partial_answer: str, job: Job, resume: Resume,
+                   previous_qa: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            question = self._generate_followup_question(job, resume, previous_qa)
+            # Persist so a submit handled by another process can pick the draft up
+            AIInterview.objects.filter(id=interview_id, status=AIInterview.Status.IN_PROGRESS).update(
+                question_draft={'index': index, 'partial_answer': partial_answer, 'question': question,
+                                'created_at': timezone.now().isoformat()}
+            )
+            return question
+        finally:
+            connection.close()
+
+    def _take_draft(self, interview: AIInterview, index: int, final_answer: str) -> Optional[Dict[str, Any]]:
+        """Return a drafted follow-up to question ``index`` whose partial transcript matches the final answer, or None."""
+        with self._lock:
+            local = self._drafts.pop((str(interview.id), index), [])
+        threshold = self.speculation['MIN_SIMILARITY']
+
+        # Newest in-process draft first: it saw the most of the answer
+        for partial, future in reversed(local):
+            if answer_prefix_match(partial, final_answer) < threshold:
+                continue
+            try:
+                question = future.result(timeout=self.speculation['WAIT_SECONDS'])
+            except FutureTimeoutError:
+                logger.warning(f"Draft for AI Interview {interview.id} question {index + 1} not ready in time")
+                break
+            except Exception as e:
+                logger.warning(f"Draft for AI Interview {interview.id} question {index + 1} failed: {e}")
+                continue
+            self._count('reused')
+            return question
+
+        stored = AIInterview.objects.filter(id=interview.id).values_list('question_draft', flat=True).first()
+        if stored and stored.get('index') == index and \
+                answer_prefix_match(stored.get('partial_answer', ''), final_answer) >= threshold:
+            self._count('reused')
+            return stored['question']
+
+        if local or stored:
+            self._count('diverged')
+            logger.info(f"Answer to question {index} of AI Interview {interview.id} diverged from its draft; regenerating")
+        return None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _prune_drafts(self) -> None:
+        # Interviews abandoned mid-answer never submit; forget their finished drafts (the DB copy remains)
+        if len(self._drafts) > 1000:
+            for key in [k for k, drafts in self._drafts.items() if all(f.done() for _, f in drafts)]:
+                del self._drafts[key]
+
+    def speculation_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
     def _generate_initial_question(self, job: Job, resume: Resume) -> Dict[str, Any]:
         """Generates the first, high-impact question for the interview."""
         prompt = f"""
 As an expert technical interviewer, generate a single, compelling opening question for an AI interview.
 This question should be based on the provided job and resume, designed to immediately assess a key qualification.
 Do not ask "Tell me about yourself". Instead, ask a specific question about a core requirement or a significant project on their resume.
+Do not mention the candidate's name, employers or project names; refer to the skill or experience instead, so the question can be reused for candidates with a similar background.
 Return a JSON object with "question_text" and "type" (e.g., 'deep-dive', 'technical').
 
 JOB: {job.title} - {job.description}
-RESUME: {resume.parsed_text or 'No resume text.'}
+RESUME: {prompt_budget_service.compact_resume(resume.parsed_text, 'INTERVIEW_QUESTION_RESUME') or 'No resume text.'}
 
 JSON Output:
 """
         try:
-            response = llm_model.generate_content(prompt)
-            question = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
-            if 'question_text' not in question or 'type' not in question:
-                raise ValueError("Initial question must have 'question_text' and 'type'.")
-            return question
+            response = llm_gateway_service.generate_content(llm_model, prompt, validator=_is_valid_question)
+            question = _parse_question(response.text, 'interview:question')
         except Exception as e:
             logger.error(f"Failed to generate initial question: {e}")
-            return {"type": "deep-dive", "question_text": f"Based on your resume, walk me through your experience with a key technology required for the {job.title} role."}
+            return {"type": "deep-dive", "question_text": FALLBACK_OPENING_QUESTION.format(job_title=job.title)}
+        try:
+            question_bank_service.add_opener(job, question)
+        except Exception as e:
+            logger.warning(f"Could not bank opening question for job {job.id}: {e}")
+        return question
 
     def _generate_followup_question(self, job: Job, resume: Resume, previous_qa: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generates an adaptive follow-up question."""
@@ -116,131 +319,11 @@ Return a single JSON object with "question_text" and "type".
 JSON Output:
         """
         try:
-            response = llm_model.generate_content(prompt)
-            question = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
-            if 'question_text' not in question or 'type' not in question:
-                raise ValueError("Follow-up question must have 'question_text' and 'type'.")
-            return question
+            response = llm_gateway_service.generate_content(llm_model, prompt, validator=_is_valid_question)
+            return _parse_question(response.text, 'interview:followup')
         except Exception as e:
             logger.error(f"Failed to generate follow-up question: {e}")
-            return {"type": "deep-dive", "question_text": "Can you provide a specific example of how you've applied that skill in a professional project?"}
-    
-    def generate_final_report(self, application: Application) -> 'AIInterviewReport':
-        from .ai_analysis_service import ai_analysis_service # Local import to avoid circular dependency
-        """
-        Generates and saves the final employer-facing interview report for a completed interview.
-        """
-        interview = get_object_or_404(AIInterview, application=application)
-        if interview.status != AIInterview.Status.COMPLETED:
-            raise ValueError("Interview must be completed to generate a report.")
-
-        # Generate employer-facing report (idempotent)
-        report = ai_analysis_service.generate_interview_report(interview)
-
-        # Mark interview as report_generated (add this field if not present)
-        if not hasattr(interview, 'report_generated') or not interview.report_generated:
-            interview.report_generated = True
-            interview.save(update_fields=['report_generated'])
-
-        # Update application status to INTERVIEWED if not already
-        if application.status != Application.Status.INTERVIEWED:
-            application.status = Application.Status.INTERVIEWED
-            application.save(update_fields=['status'])
-
-        return report
+            return {"type": "deep-dive", "question_text": FALLBACK_FOLLOWUP_QUESTION}
 
 
-interview_service = InterviewService() 
-
-class AIInterviewService:
-    def __init__(self):
-        self.model = llm_model # Use the existing llm_model
-
-    def generate_final_report(self, interview_id):
-        interview = get_object_or_404(AIInterview, id=interview_id)
-        if interview.status != AIInterview.Status.COMPLETED:
-            raise ValueError("Interview must be completed to generate a report.")
-        # Idempotency: check if report exists
-        existing = AIInterviewReport.objects.filter(interview=interview).order_by('-created_at').first()
-        if existing:
-            return existing
-        application = interview.application
-        resume = application.resume
-        job = application.job
-        ai_match_report = AIAnalysisReport.objects.filter(resume=resume, job=job).order_by('-created_at').first()
-        ai_match_data = ai_match_report.report_data if ai_match_report else {}
-        resume_text = getattr(resume, 'parsed_text', '')
-        job_description = job.description
-        job_title = job.title
-        job_requirements = job.requirements
-        job_responsibilities = job.responsibilities
-        job_company = job.company.name
-        job_industry = getattr(job.company, 'industry', '')
-        job_location = job.location
-        interview_questions = interview.questions
-        interview_answers = interview.answers
-        interview_qa = [
-            {'question': q.get('question_text', q) if isinstance(q, dict) else q, 'answer': a.get('text', a) if isinstance(a, dict) else a}
-            for q, a in zip(interview_questions, interview_answers)
-        ]
-        prompt = f'''
-You are an expert technical interviewer and AI hiring assistant. Generate a comprehensive, actionable employer-facing interview report for the following candidate and job application.
-Context:
-- Job Title: {job_title}
-- Company: {job_company}
-- Industry: {job_industry}
-- Location: {job_location}
-- Job Description: {job_description}
-- Requirements: {job_requirements}
-- Responsibilities: {job_responsibilities}
-- Candidate Resume (parsed): {resume_text}
-- AI Matching Report: {json.dumps(ai_match_data)}
-- Interview Q&A:
-{json.dumps(interview_qa, indent=2)}
-Instructions:
-- Analyze the candidate's strengths and weaknesses based on the interview and AI matching data.
-- Assess fit against the job description and requirements.
-- Provide AI-derived confidence scores for key skills and culture fit.
-- Summarize the candidate's communication, problem-solving, and technical depth as demonstrated in the interview.
-- Suggest next steps: Offer, Reject, or Further Interview, with rationale.
-- Output a single JSON object with the following fields:
-  - summary: string
-  - strengths: list of strings
-  - weaknesses: list of strings
-  - fit_score: integer (0-100)
-  - culture_fit_score: integer (0-100)
-  - communication_score: integer (0-100)
-  - technical_depth_score: integer (0-100)
-  - suggested_next_step: string (Offer/Reject/Further Interview)
-  - rationale: string
-  - follow_up_questions: list of strings
-  - version: string (e.g. '1.0')
-- Never leave any field empty. If no data, provide a summary or explanation.
-- Return only the JSON object, no commentary.
-'''
-        response = self.model.generate_content(prompt)
-        try:
-            report_data = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
-        except Exception as e:
-            logger.error(f"Failed to parse interview report LLM response: {e}")
-            report_data = {"summary": "Error generating report.", "strengths": [], "weaknesses": [], "fit_score": 0, "culture_fit_score": 0, "communication_score": 0, "technical_depth_score": 0, "suggested_next_step": "Further Interview", "rationale": "LLM error.", "follow_up_questions": [], "version": "1.0"}
-        report = AIInterviewReport.objects.create(
-            interview=interview,
-            report_data=report_data,
-            created_at=timezone.now(),
-            report_version=report_data.get('version', '1.0'),
-            model_name='gemini-2.5-flash',
-            overall_score=report_data.get('fit_score', 0)
-        )
-        interview.report_generated = True
-        interview.save(update_fields=['report_generated'])
-        
-        # Update application status to INTERVIEWED
-        application = interview.application
-        if application.status != Application.Status.INTERVIEWED:
-            application.status = Application.Status.INTERVIEWED
-            application.save(update_fields=['status'])
-        
-        return report
-
-ai_interview_service = AIInterviewService() 
\ No newline at end of file
+interview_service = InterviewService()
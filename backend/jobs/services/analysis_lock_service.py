@@ -0,0 +1,112 @@
+import os
+import socket
+import threading
+import time
+import logging
+from datetime import timedelta
+from typing import Iterable, Optional, Tuple
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ..models import AnalysisGenerationLock, AIAnalysisReport, Resume, Job
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisInProgress(Exception):
+    """Raised when another process is generating the same report and the wait timed out."""
+
+    def __init__(self, poll_token):
+        super().__init__(f"Analysis generation already in progress (poll token {poll_token}).")
+        self.poll_token = poll_token
+
+
+class AnalysisLockService:
+    """
+    Cross-process single-flight for AI analysis generation.
+
+    The first request for a (resume, job, report_version) inserts a lease row and
+    becomes the leader; concurrent requests hit the unique constraint and wait for
+    the leader's report instead of calling the LLM themselves.
+    """
+
+    def __init__(self):
+        self.lease_seconds = getattr(settings, 'AI_ANALYSIS_LOCK_LEASE_SECONDS', 120)
+        self.wait_seconds = getattr(settings, 'AI_ANALYSIS_LOCK_WAIT_SECONDS', 25)
+        self.poll_interval = getattr(settings, 'AI_ANALYSIS_LOCK_POLL_INTERVAL', 0.5)
+
+    @staticmethod
+    def _owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def acquire(self, resume: Resume, job: Job, report_version: str) -> Tuple[AnalysisGenerationLock, bool]:
+        """Return (lock, is_leader). Expired leases are taken over by the caller."""
+        owner = self._owner()
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        try:
+            with transaction.atomic():
+                lock = AnalysisGenerationLock.objects.create(
+                    resume=resume,
+                    job=job,
+                    report_version=report_version,
+                    owner=owner,
+                    expires_at=expires_at,
+                )
+            return lock, True
+        except IntegrityError:
+            pass
+
+        lock_qs = AnalysisGenerationLock.objects.filter(resume=resume, job=job, report_version=report_version)
+        # Take over a lease whose holder died without releasing it
+        taken_over = lock_qs.filter(expires_at__lt=now).update(owner=owner, expires_at=expires_at)
+        lock = lock_qs.first()
+        if lock is None:
+            # Leader released between our insert and lookup; retry once as a fresh leader
+            return self.acquire(resume, job, report_version)
+        if taken_over:
+            logger.warning(f"Took over expired analysis lock {lock.id} for resume {resume.id} / job {job.id}")
+        return lock, bool(taken_over)
+
+    def renew(self, lock: AnalysisGenerationLock) -> bool:
+        """
+        Extend the lease by another lease period. The leader calls this between LLM calls so
+        a multi-section generation never outlives its lease; False means the lease was lost.
+        """
+        expires_at = timezone.now() + timedelta(seconds=self.lease_seconds)
+        renewed = AnalysisGenerationLock.objects.filter(id=lock.id, owner=lock.owner).update(expires_at=expires_at)
+        if not renewed:
+            logger.warning(f"Analysis lock {lock.id} was lost before renewal; another worker may be generating the same report")
+        return bool(renewed)
+
+    def release(self, lock: AnalysisGenerationLock) -> None:
+        AnalysisGenerationLock.objects.filter(id=lock.id, owner=lock.owner).delete()
+
+    def wait_for_leader(self, lock: AnalysisGenerationLock, wait_timeout: Optional[float] = None,
+                        sections: Optional[Iterable[str]] = None) -> Optional[AIAnalysisReport]:
+        """
+        Poll until the leader has stored a fresh report (holding every one of ``sections``,
+        if given) or released the lock. Returns the report - possibly without the wanted
+        sections if the leader was generating others - or None if the leader gave up
+        without producing one. Raises AnalysisInProgress if the leader is still running
+        after wait_timeout.
+        """
+        timeout = self.wait_seconds if wait_timeout is None else wait_timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            report = AIAnalysisReport.objects.filter(
+                resume_id=lock.resume_id,
+                job_id=lock.job_id,
+                is_stale=False,
+            ).first()
+            if report and all(section in report.report_data for section in sections or ()):
+                return report
+            if not AnalysisGenerationLock.objects.filter(id=lock.id).exists():
+                return report
+            if time.monotonic() >= deadline:
+                raise AnalysisInProgress(lock.id)
+            time.sleep(self.poll_interval)
+
+
+# Global instance
+analysis_lock_service = AnalysisLockService()
@@ -0,0 +1,222 @@
+import logging
+from datetime import datetime, time as dt_time, timedelta
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.utils import timezone
+from ..models import AIAnalysisReport, AnalysisPrecomputeRun, Application, Job, Resume, SavedJob
+from .ai_analysis_service import ai_analysis_service
+from .analysis_lock_service import AnalysisInProgress
+from .rate_limiter_service import PRIORITY_BATCH, rate_limiter_service
+from .ranking_cascade_service import ranking_cascade_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRECOMPUTE_CONFIG = {
+    'WINDOW': ('01:00', '06:00'),  # local time; may cross midnight
+    'TOKEN_BUDGET': 2_000_000,
+    'MAX_PAIRS': 2000,
+    'TOP_MATCHES_PER_RESUME': 5,
+    'ACTIVE_DAYS': 14,          # students who logged in this recently get their top matches precomputed
+    'APPLICATION_DAYS': 30,
+    'SAVED_DAYS': 30,
+    'RESUME_WITHIN_HOURS': 20,  # unfinished runs older than this are abandoned, not resumed
+    'HEARTBEAT_SECONDS': 600,   # a RUNNING run silent for longer is assumed dead
+}
+
+# Candidate sources, most likely to be opened first, and the analysis audience each needs
+SOURCE_AUDIENCES = {
+    'application': None,       # both the student and the employer will read it
+    'saved': 'student',
+    'top_match': 'student',
+}
+
+
+class AnalysisPrecomputeService:
+    """
+    Generates AI analyses off-peak for (resume, job) pairs a user is likely to open:
+    recent applications, saved jobs and the top vector matches of active students.
+    Runs stop at the end of the time window or when the token budget is spent, and
+    pick up where they left off on the next invocation.
+    """
+
+    def __init__(self):
+        self.config = {**DEFAULT_PRECOMPUTE_CONFIG, **getattr(settings, 'PRECOMPUTE_ANALYSES', {})}
+
+    # ---------------- Window ----------------
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        start, end = (dt_time.fromisoformat(value) for value in self.config['WINDOW'])
+        current = timezone.localtime(now).time()
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    # ---------------- Candidates ----------------
+
+    def select_candidates(self, max_pairs: Optional[int] = None) -> List[List[str]]:
+        """Return ordered [resume_id, job_id, source] pairs, de-duplicated, highest-probability sources first."""
+        max_pairs = max_pairs or self.config['MAX_PAIRS']
+        now = timezone.now()
+        seen = set()
+        candidates = []
+
+        def add(resume, job_id, source):
+            if resume is None or not resume.parsed_text:
+                return
+            key = (str(resume.id), str(job_id))
+            if key not in seen:
+                seen.add(key)
+                candidates.append([key[0], key[1], source])
+
+        applications = Application.objects.filter(
+            applied_at__gte=now - timedelta(days=self.config['APPLICATION_DAYS']), job__is_active=True
+        ).select_related('resume', 'applicant__student_profile')
+        for application in applications.iterator():
+            add(application.resume or self._primary_resume(application.applicant), application.job_id, 'application')
+
+        saved_jobs = SavedJob.objects.filter(
+            saved_at__gte=now - timedelta(days=self.config['SAVED_DAYS']), job__is_active=True
+        ).select_related('user__student_profile')
+        for saved in saved_jobs.iterator():
+            add(self._primary_resume(saved.user), saved.job_id, 'saved')
+
+        active_resumes = Resume.objects.filter(
+            is_primary=True,
+            embedding__isnull=False,
+            student_profile__user__last_login__gte=now - timedelta(days=self.config['ACTIVE_DAYS']),
+        ).exclude(parsed_text='')
+        for resume in active_resumes.iterator():
+            if len(candidates) >= max_pairs:
+                break
+            ranking = ranking_cascade_service.rank_jobs(resume, limit=self.config['TOP_MATCHES_PER_RESUME'])
+            for candidate in ranking['results']:
+                add(resume, candidate['job'].id, 'top_match')
+
+        return candidates[:max_pairs]
+
+    @staticmethod
+    def _primary_resume(user) -> Optional[Resume]:
+        profile = getattr(user, 'student_profile', None)
+        return profile.resumes.filter(is_primary=True).first() if profile else None
+
+    # ---------------- Runs ----------------
+
+    def resumable_run(self) -> Optional[AnalysisPrecomputeRun]:
+        """
+        The unfinished run to continue, if any. Raises RuntimeError if another process
+        is still working on it.
+        """
+        now = timezone.now()
+        run = AnalysisPrecomputeRun.objects.filter(
+            status__in=[AnalysisPrecomputeRun.Status.RUNNING, AnalysisPrecomputeRun.Status.INTERRUPTED],
+            started_at__gte=now - timedelta(hours=self.config['RESUME_WITHIN_HOURS']),
+        ).first()
+        if run and run.status == AnalysisPrecomputeRun.Status.RUNNING and \
+                run.updated_at >= now - timedelta(seconds=self.config['HEARTBEAT_SECONDS']):
+            raise RuntimeError(f"Precompute run {run.id} is still running in another process")
+        return run
+
+    def start_run(self, token_budget: Optional[int] = None, max_pairs: Optional[int] = None) -> AnalysisPrecomputeRun:
+        candidates = self.select_candidates(max_pairs)
+        run = AnalysisPrecomputeRun.objects.create(
+            candidates=candidates,
+            token_budget=token_budget or self.config['TOKEN_BUDGET'],
+        )
+        sources = {}
+        for _, _, source in candidates:
+            sources[source] = sources.get(source, 0) + 1
+        logger.info(f"Precompute run {run.id} started with {len(candidates)} candidates {sources}")
+        return run
+
+    def execute(self, run: AnalysisPrecomputeRun, ignore_window: bool = False) -> AnalysisPrecomputeRun:
+        """Process the run's candidates from its cursor until done, out of window or out of budget."""
+        Status = AnalysisPrecomputeRun.Status
+        run.status = Status.RUNNING
+        run.save(update_fields=['status', 'updated_at'])
+        try:
+            while run.cursor < len(run.candidates):
+                if not ignore_window and not self.in_window():
+                    run.status = Status.WINDOW_CLOSED
+                    break
+                if self._budget_exhausted(run):
+                    run.status = Status.BUDGET_EXHAUSTED
+                    break
+                self._process(run, *run.candidates[run.cursor])
+                run.cursor += 1
+                run.save(update_fields=['cursor', 'tokens_used', 'generated', 'skipped', 'failed', 'updated_at'])
+            else:
+                run.status = Status.COMPLETED
+        except BaseException:
+            # Killed or crashed mid-run: leave it resumable from the cursor
+            run.status = Status.INTERRUPTED
+            raise
+        finally:
+            if run.status != Status.INTERRUPTED:
+                run.finished_at = timezone.now()
+            run.save(update_fields=['status', 'finished_at', 'updated_at'])
+            logger.info(
+                f"Precompute run {run.id} {run.status}: {run.cursor}/{len(run.candidates)} processed, "
+                f"generated={run.generated} skipped={run.skipped} failed={run.failed} "
+                f"tokens={run.tokens_used}/{run.token_budget}"
+            )
+        return run
+
+    @staticmethod
+    def _budget_exhausted(run: AnalysisPrecomputeRun) -> bool:
+        # Stop before a typical generation would overshoot the budget
+        per_pair = run.tokens_used / run.generated if run.generated else 0
+        return run.tokens_used + per_pair > run.token_budget
+
+    def _process(self, run: AnalysisPrecomputeRun, resume_id: str, job_id: str, source: str) -> None:
+        resume = Resume.objects.filter(id=resume_id).select_related('student_profile').first()
+        job = Job.objects.filter(id=job_id, is_active=True).select_related('company').first()
+        if resume is None or job is None:
+            run.skipped += 1
+            return
+        audience = SOURCE_AUDIENCES.get(source, 'student')
+        report = ai_analysis_service.get_fresh_report(resume, job)
+        if report and ai_analysis_service.has_sections(report, ai_analysis_service.sections_for(audience)):
+            run.skipped += 1
+            return
+
+        tokens_before = ai_analysis_service.tokens_used
+        try:
+            with ai_analysis_service.generation_source(AIAnalysisReport.Source.PRECOMPUTE), \
+                    rate_limiter_service.priority(PRIORITY_BATCH):
+                ai_analysis_service.get_or_create_analysis(resume, job, wait_timeout=0, audience=audience)
+            run.generated += 1
+        except AnalysisInProgress:
+            run.skipped += 1
+        except Exception as e:
+            logger.warning(f"Precompute failed for resume {resume_id} / job {job_id}: {e}")
+            run.failed += 1
+        finally:
+            run.tokens_used += ai_analysis_service.tokens_used - tokens_before
+
+    # ---------------- Metrics ----------------
+
+    def hit_rate(self, days: int = 7) -> Dict[str, Any]:
+        """
+        How well precomputation predicted what users open, over reports created in the last ``days``:
+        precision is the share of precomputed reports that were viewed; hit_rate is the share of
+        viewed reports that were already precomputed rather than generated on demand.
+        """
+        since = timezone.now() - timedelta(days=days)
+        reports = AIAnalysisReport.objects.filter(created_at__gte=since)
+        precomputed = reports.filter(generated_by=AIAnalysisReport.Source.PRECOMPUTE)
+        precomputed_total = precomputed.count()
+        precomputed_viewed = precomputed.filter(view_count__gt=0).count()
+        on_demand_viewed = reports.filter(generated_by=AIAnalysisReport.Source.ON_DEMAND, view_count__gt=0).count()
+        viewed = precomputed_viewed + on_demand_viewed
+        return {
+            'days': days,
+            'precomputed': precomputed_total,
+            'precomputed_viewed': precomputed_viewed,
+            'on_demand_viewed': on_demand_viewed,
+            'precision': round(precomputed_viewed / precomputed_total, 3) if precomputed_total else None,
+            'hit_rate': round(precomputed_viewed / viewed, 3) if viewed else None,
+        }
+
+
+# Global instance
+analysis_precompute_service = AnalysisPrecomputeService()
@@ -0,0 +1,169 @@
+import io
+import os
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_BUFFER_CONFIG = {
+    'SPOOL_THRESHOLD': 1024 * 1024,
+    'DEBUG_COPIES': False,
+    'DEBUG_COPY_WORKERS': 2,
+}
+
+_config = {**DEFAULT_AUDIO_BUFFER_CONFIG, **getattr(settings, 'AUDIO_BUFFER', {})}
+_debug_executor = ThreadPoolExecutor(max_workers=_config['DEBUG_COPY_WORKERS'], thread_name_prefix='audio-debug')
+
+
+class AudioTooLarge(Exception):
+    """The audio exceeds AUDIO_UPLOAD_MAX_SIZE."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Audio exceeds the maximum size of {max_size // (1024 * 1024)}MB.")
+        self.max_size = max_size
+
+
+class AudioBuffer:
+    """
+    Size-capped audio held in memory while small and spooled to a named temp file once it
+    passes SPOOL_THRESHOLD. Consumers read it without copying: ``open()`` for a stream,
+    ``as_path()`` for tools that need a file name, ``read_bytes()`` only for APIs that
+    take bytes. An upload Django already spooled to disk is adopted in place.
+
+    Debug copies are saved to storage on a background thread from a handle opened up
+    front, so closing the buffer (and unlinking its temp file) doesn't race them.
+    """
+
+    def __init__(self, suffix: str = '.webm', max_size: Optional[int] = None, spool_threshold: Optional[int] = None):
+        self.suffix = suffix
+        self.max_size = max_size if max_size is not None else settings.AUDIO_UPLOAD_MAX_SIZE
+        self.spool_threshold = spool_threshold if spool_threshold is not None else _config['SPOOL_THRESHOLD']
+        self.size = 0
+        self._memory: Optional[io.BytesIO] = io.BytesIO()
+        self._file: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+        self._owns_path = True
+
+    @classmethod
+    def from_upload(cls, uploaded_file, max_size: Optional[int] = None) -> 'AudioBuffer':
+        """Wrap a Django UploadedFile, rejecting it by its declared size before reading anything."""
+        name = getattr(uploaded_file, 'name', '') or ''
+        buffer = cls(suffix=os.path.splitext(name)[1] or '.webm', max_size=max_size)
+        if uploaded_file.size is not None and uploaded_file.size > buffer.max_size:
+            raise AudioTooLarge(buffer.max_size)
+        if hasattr(uploaded_file, 'temporary_file_path'):
+            # Already on disk (TemporaryUploadedFile); Django removes it after the request
+            buffer._memory = None
+            buffer._path = uploaded_file.temporary_file_path()
+            buffer._owns_path = False
+            buffer.size = uploaded_file.size
+            return buffer
+        for chunk in uploaded_file.chunks():
+            buffer.write(chunk)
+        return buffer
+
+    def __enter__(self) -> 'AudioBuffer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def on_disk(self) -> bool:
+        return self._path is not None
+
+    # ---------------- Writing ----------------
+
+    def write(self, chunk: bytes) -> None:
+        if self.size + len(chunk) > self.max_size:
+            raise AudioTooLarge(self.max_size)
+        self.size += len(chunk)
+        if self._memory is not None:
+            self._memory.write(chunk)
+            if self.size > self.spool_threshold:
+                self._rollover()
+        else:
+            self._file.write(chunk)
+
+    def _rollover(self) -> None:
+        self._file = tempfile.NamedTemporaryFile(suffix=self.suffix, delete=False)
+        self._path = self._file.name
+        self._file.write(self._memory.getbuffer())
+        self._memory = None
+
+    # ---------------- Reading ----------------
+
+    def open(self) -> BinaryIO:
+        """A fresh readable stream over the audio; the caller closes it."""
+        if self._memory is not None:
+            return io.BytesIO(self._memory.getbuffer())
+        if self._file is not None:
+            self._file.flush()
+        return open(self._path, 'rb')
+
+    def read_bytes(self) -> bytes:
+        if self._memory is not None:
+            return self._memory.getvalue()
+        with self.open() as f:
+            return f.read()
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with self.open() as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    @contextmanager
+    def as_path(self) -> Iterator[str]:
+        """A file path holding the audio. Spooled audio is used in place; small in-memory audio is written out once."""
+        if self._memory is None:
+            if self._file is not None:
+                self._file.flush()
+            yield self._path
+            return
+        with tempfile.NamedTemporaryFile(suffix=self.suffix, delete=False) as temp_file:
+            temp_file.write(self._memory.getbuffer())
+        try:
+            yield temp_file.name
+        finally:
+            os.unlink(temp_file.name)
+
+    # ---------------- Debug copies ----------------
+
+    def save_debug_copy(self, name: str) -> bool:
+        """Save a copy under ``name`` in the background if AUDIO_BUFFER.DEBUG_COPIES is on."""
+        if not _config['DEBUG_COPIES'] or self.size == 0:
+            return False
+        _debug_executor.submit(_write_debug_copy, self.open(), name)
+        return True
+
+    # ---------------- Cleanup ----------------
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path and self._owns_path:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+        self._path = None
+        self._memory = None
+
+
+def _write_debug_copy(reader: BinaryIO, name: str) -> None:
+    try:
+        with reader:
+            path = default_storage.save(name, File(reader))
+        logger.info(f"Saved audio debug copy: {path}")
+    except Exception as e:
+        logger.warning(f"Could not save audio debug copy {name}: {e}")
@@ -0,0 +1,142 @@
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from collections import Counter
+from typing import Any, Dict, Optional
+from django.conf import settings
+from .audio_buffer import AudioBuffer
+
+try:
+    import av
+except ImportError:
+    av = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes per sample, s16le
+
+DEFAULT_AUDIO_TRANSCODE = {
+    'BACKEND': 'auto',            # 'av' decodes in-process with PyAV, 'ffmpeg' pipes through the binary, 'auto' prefers av
+    'FFMPEG_BINARY': 'ffmpeg',
+    'MAX_CONCURRENT': 4,          # simultaneous decodes; each costs roughly a CPU core
+    'ACQUIRE_TIMEOUT_SECONDS': 10,
+    'TIMEOUT_SECONDS': 30,
+}
+
+
+class TranscodeError(Exception):
+    """The audio could not be decoded."""
+
+
+class TranscoderBusy(TranscodeError):
+    """No transcoding slot came free within ACQUIRE_TIMEOUT_SECONDS."""
+
+
+class AudioTranscodeService:
+    """
+    Turns uploaded or streamed audio (webm/ogg/mp3/m4a/...) into 16 kHz mono s16le PCM,
+    the input the recognisers want, without intermediate files.
+
+    With PyAV installed (it comes with faster-whisper) audio is decoded in-process, so
+    there is no process spawn at all. Otherwise ffmpeg is fed through stdin and its PCM
+    read from stdout; audio already spooled to disk is passed as the input path instead.
+    Concurrency is capped by MAX_CONCURRENT and every ffmpeg process is reaped before
+    returning, including on timeout.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_AUDIO_TRANSCODE, **(config if config is not None else getattr(settings, 'AUDIO_TRANSCODE', {}))}
+        self._slots = threading.BoundedSemaphore(self.config['MAX_CONCURRENT'])
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    @property
+    def backend(self) -> Optional[str]:
+        choice = self.config['BACKEND']
+        if choice in ('auto', 'av') and av is not None:
+            return 'av'
+        if choice in ('auto', 'ffmpeg') and shutil.which(self.config['FFMPEG_BINARY']):
+            return 'ffmpeg'
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    def to_pcm(self, audio: AudioBuffer) -> bytes:
+        """Decode to 16 kHz mono s16le PCM. Raises TranscodeError / TranscoderBusy."""
+        backend = self.backend
+        if backend is None:
+            raise TranscodeError('No audio decoder available: install PyAV or ffmpeg.')
+        if not self._slots.acquire(timeout=self.config['ACQUIRE_TIMEOUT_SECONDS']):
+            self._record('busy')
+            raise TranscoderBusy('All audio transcoders are busy.')
+        started = time.monotonic()
+        try:
+            pcm = self._decode_av(audio) if backend == 'av' else self._decode_ffmpeg(audio)
+        except TranscodeError:
+            self._record('failed')
+            raise
+        finally:
+            self._slots.release()
+        self._record('decoded')
+        self._record('decode_ms', round((time.monotonic() - started) * 1000))
+        return pcm
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        decoded = stats.get('decoded', 0)
+        stats['mean_decode_ms'] = round(stats.get('decode_ms', 0) / decoded) if decoded else 0
+        return stats
+
+    # ---------------- Backends ----------------
+
+    def _decode_av(self, audio: AudioBuffer) -> bytes:
+        pcm = bytearray()
+        try:
+            with audio.open() as stream, av.open(stream, mode='r', metadata_errors='ignore') as container:
+                resampler = av.AudioResampler(format='s16', layout='mono', rate=SAMPLE_RATE)
+                for frame in container.decode(audio=0):
+                    for resampled in resampler.resample(frame):
+                        pcm += resampled.to_ndarray().tobytes()
+                for resampled in resampler.resample(None):
+                    pcm += resampled.to_ndarray().tobytes()
+        except (av.error.FFmpegError, ValueError, IndexError) as e:
+            raise TranscodeError(f'Could not decode audio: {e}') from e
+        return bytes(pcm)
+
+    def _decode_ffmpeg(self, audio: AudioBuffer) -> bytes:
+        command = [self.config['FFMPEG_BINARY'], '-hide_banner', '-loglevel', 'error']
+        output_args = ['-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1']
+        if audio.on_disk:
+            # Spooled audio: let ffmpeg read (and seek) the file itself
+            with audio.as_path() as path:
+                return self._run(command + ['-nostdin', '-i', path] + output_args, None)
+        return self._run(command + ['-i', 'pipe:0'] + output_args, audio.read_bytes())
+
+    def _run(self, args, input_bytes: Optional[bytes]) -> bytes:
+        process = subprocess.Popen(args, stdin=subprocess.PIPE if input_bytes is not None else subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            stdout, stderr = process.communicate(input=input_bytes, timeout=self.config['TIMEOUT_SECONDS'])
+        except subprocess.TimeoutExpired as e:
+            raise TranscodeError(f"ffmpeg timed out after {self.config['TIMEOUT_SECONDS']}s") from e
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.communicate()
+        if process.returncode != 0:
+            raise TranscodeError(f"ffmpeg failed: {stderr.decode('utf-8', errors='ignore').strip()[-500:]}")
+        return stdout
+
+    def _record(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += count
+
+
+# Global instance
+audio_transcode_service = AudioTranscodeService()
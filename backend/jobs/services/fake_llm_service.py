@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from django.utils import timezone
+from .llm_gateway_service import LLMGatewayService
+from .llm_router_service import BaseLLMProvider, LLMProviderError, LLMResponse, LLMRouterService, _Usage
+
+logger = logging.getLogger(__name__)
+
+_JOB_HEADER_RE = re.compile(r'=== JOB (\S+) ===')
+
+
+class FakeStream:
+    """Chunked stand-in for a streamed response; sleeps between chunks to mimic token pacing."""
+
+    def __init__(self, text: str, chunk_delay: float, chunks: int, usage_metadata):
+        self.text = text
+        self.usage_metadata = usage_metadata
+        self._chunk_delay = chunk_delay
+        self._chunks = max(1, chunks)
+
+    def __iter__(self):
+        size = max(1, len(self.text) // self._chunks)
+        for start in range(0, len(self.text), size):
+            time.sleep(self._chunk_delay)
+            yield LLMResponse(self.text[start:start + size], 'fake')
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """
+    Offline LLM for load tests and benchmarks. Latency is drawn from a configurable
+    distribution and responses are canned (first ``responses`` entry whose ``match``
+    substring occurs in the prompt) or templated from the prompt type, so the analysis
+    and interview parsers see realistic JSON.
+
+    latency: {'distribution': 'fixed', 'ms': 800}
+             {'distribution': 'uniform', 'min_ms': 300, 'max_ms': 1500}
+             {'distribution': 'normal', 'mean_ms': 900, 'std_ms': 250}
+             {'distribution': 'lognormal', 'median_ms': 900, 'sigma': 0.5}
+    """
+
+    def __init__(self, name: str = 'fake', model: str = 'fake-llm', latency: Optional[Dict[str, Any]] = None,
+                 error_rate: float = 0.0, responses: Optional[List[Dict[str, str]]] = None, stream_chunks: int = 8,
+                 seed: Optional[int] = None, timeout: float = 60):
+        super().__init__(name, model, timeout)
+        self.latency = latency or {'distribution': 'fixed', 'ms': 0}
+        self.error_rate = error_rate
+        self.responses = responses or []
+        self.stream_chunks = stream_chunks
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_latency = 0.0
+
+    def sample_latency(self) -> Tuple[float, bool]:
+        """Return (latency in seconds, whether to inject a failure)."""
+        spec = self.latency
+        distribution = spec.get('distribution', 'fixed')
+        with self._lock:
+            if distribution == 'uniform':
+                ms = self._random.uniform(spec['min_ms'], spec['max_ms'])
+            elif distribution == 'normal':
+                ms = self._random.gauss(spec['mean_ms'], spec.get('std_ms', 0))
+            elif distribution == 'lognormal':
+                ms = spec['median_ms'] * self._random.lognormvariate(0, spec.get('sigma', 0.5))
+            else:
+                ms = spec.get('ms', 0)
+            fail = self._random.random() < self.error_rate
+        return max(0.0, ms) / 1000, fail
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        latency, fail = self.sample_latency()
+        with self._lock:
+            self.calls += 1
+            self.total_latency += latency
+        text = self.render(prompt)
+        usage = _Usage(len(prompt) // 4, len(text) // 4)
+        if stream:
+            if fail:
+                raise LLMProviderError(f"{self.name}: injected failure")
+            return FakeStream(text, latency / self.stream_chunks, self.stream_chunks, usage)
+        time.sleep(latency)
+        if fail:
+            raise LLMProviderError(f"{self.name}: injected failure")
+        return LLMResponse(text, self.name, usage)
+
+    # ---------------- Responses ----------------
+
+    def render(self, prompt: str) -> str:
+        for canned in self.responses:
+            if canned['match'] in prompt:
+                return canned['text']
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        if '"reports"' in prompt:
+            job_ids = _JOB_HEADER_RE.findall(prompt)
+            return json.dumps({'reports': {job_id: self._analysis_report(seed + i) for i, job_id in enumerate(job_ids)}})
+        sections = [name for name in ('shared', 'student_view', 'employer_view') if f'"{name}": {{' in prompt]
+        if sections:
+            # Full-report and single-section analysis prompts: answer only the sections asked for
+            report = self._analysis_report(seed)
+            return json.dumps({name: report[name] for name in sections})
+        if 'fit_score' in prompt:
+            return json.dumps(self._interview_report(seed))
+        if 'question_text' in prompt:
+            return json.dumps({
+                'question_text': f"Walk me through a project where you applied this role's core skills (#{seed % 1000}).",
+                'type': 'deep-dive',
+            })
+        return '{}'
+
+    @staticmethod
+    def _score(seed: int, offset: int) -> int:
+        return 40 + (seed >> offset) % 60
+
+    def _analysis_report(self, seed: int) -> Dict[str, Any]:
+        scores = {key: self._score(seed, i * 3) for i, key in enumerate(
+            ['skills_score', 'experience_score', 'culture_fit_score', 'growth_potential_score']
+        )}
+        return {
+            'shared': {
+                **scores,
+                'preferences_bonus': seed % 6,
+                'overall_score': round(sum(scores.values()) / len(scores)),
+                'skills_analysis': {'matching_skills': ['Python', 'SQL'], 'missing_skills': ['Kubernetes'],
+                                    'summary': 'Solid core skills with some tooling gaps.'},
+                'experience_analysis': {'relevant_experience': ['Backend internship'], 'experience_gaps': ['No production on-call'],
+                                        'summary': 'Relevant but early-career experience.'},
+                'culture_fit_analysis': {'summary': 'Likely good team fit.', 'teamwork': 75, 'values_alignment': 70, 'communication': 72},
+                'growth_potential_analysis': {'summary': 'Learns quickly.', 'learning_agility': 80, 'upskilling_history': 70, 'motivation': 78},
+                'preferences_analysis': [{'title': 'Location match', 'description': 'Role is in a preferred location.',
+                                          'impact': 'medium', 'match_level': 'good', 'preference_type': 'location'}],
+            },
+            'student_view': {
+                'career_insights': [{'type': 'strength', 'title': 'Strong fundamentals', 'description': 'Good grasp of core stack.', 'impact': 'high'}],
+                'personalized_recommendations': [{'category': 'skill_development', 'title': 'Learn containers',
+                                                  'description': 'Build a small project with Docker and Kubernetes.', 'priority': 'medium'}],
+                'encouragement': 'You are a credible candidate for this role.',
+                'next_career_goal': 'Junior Backend Developer',
+            },
+            'employer_view': {
+                'risk_flags': [{'type': 'soft_risk', 'title': 'Limited production experience', 'description': 'Mostly academic projects.', 'impact': 'medium'}],
+                'opportunity_flags': [{'type': 'growth_potential', 'title': 'Fast learner', 'description': 'Picked up new stacks quickly.', 'impact': 'high'}],
+                'recruiter_recommendations': [{'title': 'AI interview', 'description': 'Invite to the AI interview.'}],
+                'fit_summary': 'Promising early-career candidate with a relevant skill base.',
+                'follow_up_questions': ['Describe your largest project.', 'How do you test your code?', 'What would you learn next?'],
+            },
+        }
+
+    def _interview_report(self, seed: int) -> Dict[str, Any]:
+        return {
+            'summary': 'Candidate answered clearly with concrete examples.',
+            'strengths': ['Clear communication', 'Practical examples'],
+            'weaknesses': ['Limited depth on scaling'],
+            'fit_score': self._score(seed, 0),
+            'culture_fit_score': self._score(seed, 3),
+            'communication_score': self._score(seed, 6),
+            'technical_depth_score': self._score(seed, 9),
+            'suggested_next_step': 'Further Interview',
+            'rationale': 'Good baseline; probe system design next.',
+            'follow_up_questions': ['How would you scale the service you described?'],
+            'version': '1.0',
+        }
+
+
+class RecordReplayProvider(BaseLLMProvider):
+    """
+    Captures prompt -> response pairs from an inner provider into JSON fixtures
+    (mode 'record') and serves them back without network access (mode 'replay').
+    In replay mode a missing fixture raises unless ``strict`` is False, in which
+    case the inner provider answers (and nothing is written).
+    """
+
+    def __init__(self, name: str = 'replay', mode: str = 'replay', fixtures_dir: str = 'llm_fixtures',
+                 inner: Optional[Dict[str, Any]] = None, strict: bool = True, model: Optional[str] = None, timeout: float = 60):
+        self.inner = LLMRouterService._build_provider(inner) if inner else None
+        super().__init__(name, model or (self.inner.model_name if self.inner else 'replay'), timeout)
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown record/replay mode '{mode}'")
+        if mode == 'record' and self.inner is None:
+            raise ValueError("Record mode needs an inner provider")
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir
+        self.strict = strict
+        os.makedirs(fixtures_dir, exist_ok=True)
+
+    def fixture_path(self, prompt: str) -> str:
+        key = LLMGatewayService.make_key(self.model_name, prompt)
+        return os.path.join(self.fixtures_dir, f"{key[:24]}.json")
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        path = self.fixture_path(prompt)
+        if self.mode == 'replay':
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    fixture = json.load(f)
+                return LLMResponse(fixture['response'], self.name, _Usage(**fixture.get('usage', {})))
+            if self.strict or self.inner is None:
+                raise LLMProviderError(f"No recorded LLM fixture for prompt ({os.path.basename(path)})")
+            return self.inner.generate(prompt, generation_config=generation_config)
+
+        response = self.inner.generate(prompt, generation_config=generation_config)
+        usage = getattr(response, 'usage_metadata', None)
+        fixture = {
+            'model': self.model_name,
+            'prompt': prompt,
+            'response': response.text,
+            'usage': {
+                'prompt_token_count': getattr(usage, 'prompt_token_count', 0) or 0,
+                'candidates_token_count': getattr(usage, 'candidates_token_count', 0) or 0,
+            },
+            'recorded_at': timezone.now().isoformat(),
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, indent=2)
+        os.replace(tmp_path, path)
+        return LLMResponse(response.text, self.name, usage)
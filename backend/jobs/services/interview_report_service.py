@@ -0,0 +1,184 @@
+import os
+import json
+import socket
+import threading
+import time
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import AIAnalysisReport, AIInterview, AIInterviewReport, Application
+from .llm_gateway_service import llm_gateway_service
+from .llm_json import llm_json_parser, matches_schema
+from .prompt_budget_service import prompt_budget_service
+from .llm_router_service import llm_router_service
+
+logger = logging.getLogger(__name__)
+
+INTERVIEW_REPORT_SCHEMA = {'summary': (), 'fit_score': (), 'suggested_next_step': ()}
+
+DEFAULT_REPORT_DATA = {
+    "summary": "Error generating report.", "strengths": [], "weaknesses": [], "fit_score": 0, "culture_fit_score": 0,
+    "communication_score": 0, "technical_depth_score": 0, "suggested_next_step": "Further Interview",
+    "rationale": "LLM error.", "follow_up_questions": [], "version": "1.0",
+}
+
+
+class InterviewReportInProgress(Exception):
+    """Raised when another process is generating the same interview report and the wait timed out."""
+
+    def __init__(self, interview_id):
+        super().__init__(f"Interview report for interview {interview_id} is already being generated.")
+        self.interview_id = interview_id
+
+
+class InterviewReportService:
+    """
+    The single path that produces an interview's employer-facing AIInterviewReport.
+
+    A caller claims a lease on the AIInterview row under SELECT ... FOR UPDATE before
+    calling the LLM; concurrent callers see the lease and wait for that report instead
+    of generating their own. Leases expire, so a crashed holder is taken over, and the
+    report itself is upserted on its one-per-interview constraint.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'INTERVIEW_REPORT_LOCK', {})
+        self.lease_seconds = config.get('LEASE_SECONDS', 180)
+        self.wait_seconds = config.get('WAIT_SECONDS', 30)
+        self.poll_interval = config.get('POLL_INTERVAL', 0.5)
+        self.model = llm_router_service
+
+    @staticmethod
+    def _owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def get_or_create_report(self, interview_id, wait_timeout: Optional[float] = None) -> AIInterviewReport:
+        """
+        Return the interview's report, generating it if this caller wins the lease.
+        Raises InterviewReportInProgress if another holder is still generating after wait_timeout.
+        """
+        owner = self._owner()
+        timeout = self.wait_seconds if wait_timeout is None else wait_timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            report, claimed = self._claim(interview_id, owner)
+            if report is not None:
+                return report
+            if claimed:
+                break
+            if time.monotonic() >= deadline:
+                raise InterviewReportInProgress(interview_id)
+            time.sleep(self.poll_interval)
+
+        try:
+            interview = AIInterview.objects.select_related(
+                'application__job__company', 'application__resume'
+            ).get(id=interview_id)
+            report_data = self._generate(interview)
+            return self._save(interview, report_data)
+        finally:
+            AIInterview.objects.filter(id=interview_id, report_lease_owner=owner).update(
+                report_lease_owner='', report_lease_expires_at=None
+            )
+
+    def _claim(self, interview_id, owner: str) -> Tuple[Optional[AIInterviewReport], bool]:
+        """Return (existing report, False), or (None, True) if the lease was taken, or (None, False) if held elsewhere."""
+        now = timezone.now()
+        with transaction.atomic():
+            interview = AIInterview.objects.select_for_update().get(id=interview_id)
+            if interview.status != AIInterview.Status.COMPLETED:
+                raise ValueError("Interview must be completed to generate a report.")
+            report = AIInterviewReport.objects.filter(interview=interview).first()
+            if report is not None:
+                return report, False
+            if interview.report_lease_expires_at and interview.report_lease_expires_at > now:
+                return None, False
+            if interview.report_lease_owner:
+                logger.warning(f"Taking over expired report lease of {interview.report_lease_owner} for interview {interview_id}")
+            interview.report_lease_owner = owner
+            interview.report_lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            interview.save(update_fields=['report_lease_owner', 'report_lease_expires_at'])
+        return None, True
+
+    def _generate(self, interview: AIInterview) -> Dict[str, Any]:
+        application = interview.application
+        resume = application.resume
+        job = application.job
+        ai_match_report = AIAnalysisReport.objects.filter(resume=resume, job=job).order_by('-created_at').first()
+        ai_match_data = ai_match_report.report_data if ai_match_report else {}
+        resume_text = prompt_budget_service.compact_resume(getattr(resume, 'parsed_text', ''), 'INTERVIEW_REPORT_RESUME')
+        job_description = prompt_budget_service.compact_text(job.description, 'INTERVIEW_REPORT_JOB')
+        interview_qa = [
+            {'question': q.get('question_text', q) if isinstance(q, dict) else q, 'answer': a.get('text', a) if isinstance(a, dict) else a}
+            for q, a in zip(*interview.questions_and_answers())
+        ]
+        prompt = f'''
+You are an expert technical interviewer and AI hiring assistant. Generate a comprehensive, actionable employer-facing interview report for the following candidate and job application.
+Context:
+- Job Title: {job.title}
+- Company: {job.company.name}
+- Industry: {getattr(job.company, 'industry', '')}
+- Location: {job.location}
+- Job Description: {job_description}
+- Requirements: {job.requirements}
+- Responsibilities: {job.responsibilities}
+- Candidate Resume (parsed): {resume_text}
+- AI Matching Report: {prompt_budget_service.compact_match_report(ai_match_data)}
+- Interview Q&A:
+{json.dumps(interview_qa, indent=2)}
+Instructions:
+- Analyze the candidate's strengths and weaknesses based on the interview and AI matching data.
+- Assess fit against the job description and requirements.
+- Provide AI-derived confidence scores for key skills and culture fit.
+- Summarize the candidate's communication, problem-solving, and technical depth as demonstrated in the interview.
+- Suggest next steps: Offer, Reject, or Further Interview, with rationale.
+- Output a single JSON object with the following fields:
+  - summary: string
+  - strengths: list of strings
+  - weaknesses: list of strings
+  - fit_score: integer (0-100)
+  - culture_fit_score: integer (0-100)
+  - communication_score: integer (0-100)
+  - technical_depth_score: integer (0-100)
+  - suggested_next_step: string (Offer/Reject/Further Interview)
+  - rationale: string
+  - follow_up_questions: list of strings
+  - version: string (e.g. '1.0')
+- Never leave any field empty. If no data, provide a summary or explanation.
+- Return only the JSON object, no commentary.
+'''
+        response = llm_gateway_service.generate_content(
+            self.model, prompt, validator=lambda text: matches_schema(text, INTERVIEW_REPORT_SCHEMA)
+        )
+        # Keep whatever fields the (possibly repaired) response has; only absent ones fall back to defaults
+        parsed = llm_json_parser.parse(response.text, 'interview:report', INTERVIEW_REPORT_SCHEMA)
+        if parsed.data is None:
+            # Nothing usable: fail so the queued task retries rather than storing an empty report
+            raise ValueError(f"Interview report for interview {interview.id} was not valid JSON.")
+        return {**DEFAULT_REPORT_DATA, **parsed.data}
+
+    def _save(self, interview: AIInterview, report_data: Dict[str, Any]) -> AIInterviewReport:
+        with transaction.atomic():
+            # Upsert on the one-report-per-interview constraint: a takeover after an expired lease can't duplicate it
+            report, _ = AIInterviewReport.objects.update_or_create(
+                interview=interview,
+                defaults={
+                    'report_data': report_data,
+                    'report_version': report_data.get('version', '1.0'),
+                    'model_name': 'gemini-2.5-flash',
+                    'overall_score': report_data.get('fit_score', 0),
+                },
+            )
+            AIInterview.objects.filter(id=interview.id).update(report_generated=True)
+            Application.objects.filter(id=interview.application_id).exclude(
+                status=Application.Status.INTERVIEWED
+            ).update(status=Application.Status.INTERVIEWED)
+        logger.info(f"Generated AIInterviewReport {report.id} for interview {interview.id}")
+        return report
+
+
+# Global instance
+interview_report_service = InterviewReportService()
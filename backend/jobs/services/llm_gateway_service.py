@@ -0,0 +1,215 @@
+import re
+import json
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from ..models import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class CachedResponse:
+    """Stands in for a Gemini response when the text came from the cache."""
+    cached = True
+    usage_metadata = None
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __iter__(self):
+        # Streaming callers iterate chunks; a cached response is a single chunk
+        yield self
+
+
+class _RecordingStream:
+    """Wraps a streamed Gemini response and caches the full text once it validates."""
+    cached = False
+
+    def __init__(self, response, on_complete: Callable[[str], None]):
+        self._response = response
+        self._on_complete = on_complete
+        self._parts = []
+
+    def __iter__(self):
+        for chunk in self._response:
+            self._parts.append(getattr(chunk, 'text', '') or '')
+            yield chunk
+        self._on_complete(''.join(self._parts))
+
+    @property
+    def usage_metadata(self):
+        return getattr(self._response, 'usage_metadata', None)
+
+
+class LLMGatewayService:
+    """
+    Single entry point for Gemini calls with a two-tier response cache:
+    an in-process LRU in front of the LLMResponseCache table.
+
+    Keys hash (model, whitespace-normalised prompt, generation config). A response is
+    only stored when the caller's validator accepts it, so truncated or malformed
+    output is never replayed.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'LLM_RESPONSE_CACHE', {})
+        self.enabled = config.get('ENABLED', True)
+        self.ttl = config.get('TTL_SECONDS', 7 * 24 * 3600)
+        self.memory_max_entries = config.get('MEMORY_MAX_ENTRIES', 256)
+        self.db_max_rows = config.get('DB_MAX_ROWS', 10000)
+        self.max_response_chars = config.get('MAX_RESPONSE_CHARS', 200000)
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._writes_since_prune = 0
+
+    # ---------------- Public API ----------------
+
+    def generate_content(self, model, prompt: str, *, validator: Optional[Callable[[str], bool]] = None,
+                         generation_config: Optional[Dict[str, Any]] = None, stream: bool = False,
+                         cache_key_prompt: Optional[str] = None, call: Optional[Callable[[], Any]] = None,
+                         use_cache: bool = True):
+        """
+        Call ``model.generate_content(prompt)`` through the cache.
+
+        Returns the Gemini response, or a CachedResponse on a hit; both expose ``.text``,
+        ``.usage_metadata`` and chunk iteration. ``call`` overrides how the request is sent
+        (e.g. via a context-cached model) while ``cache_key_prompt`` is the full prompt the
+        key is derived from in that case. ``use_cache=False`` skips the lookup (a forced refresh)
+        but still stores a validated response, so the fresh text replaces the old one.
+        """
+        model_name = getattr(model, 'model_name', '') or 'unknown'
+
+        def send():
+            if call is not None:
+                return call()
+            kwargs = {}
+            if generation_config:
+                kwargs['generation_config'] = generation_config
+            if stream:
+                kwargs['stream'] = True
+            return model.generate_content(prompt, **kwargs)
+
+        if not (self.enabled and validator):
+            self._record('bypass')
+            return send()
+
+        key = self.make_key(model_name, cache_key_prompt or prompt, generation_config)
+        if use_cache:
+            text = self._lookup(key)
+            if text is not None:
+                return CachedResponse(text)
+        else:
+            self._record('refreshes')
+
+        response = send()
+        if stream:
+            return _RecordingStream(response, lambda full_text: self._store_if_valid(key, model_name, full_text, validator))
+        self._store_if_valid(key, model_name, getattr(response, 'text', '') or '', validator)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats.get('memory_hits', 0) + stats.get('db_hits', 0) + stats.get('misses', 0)
+        stats['hit_rate'] = round((stats.get('memory_hits', 0) + stats.get('db_hits', 0)) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        normalised = _WHITESPACE_RE.sub(' ', prompt).strip()
+        config = json.dumps(generation_config or {}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{model_name}\x00{config}\x00{normalised}".encode('utf-8')).hexdigest()
+
+    # ---------------- Cache tiers ----------------
+
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+            elif entry:
+                del self._memory[key]
+                entry = None
+        if entry:
+            self._record('memory_hits')
+            return entry[0]
+
+        row = LLMResponseCache.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        if row is None:
+            self._record('misses')
+            return None
+        LLMResponseCache.objects.filter(id=row.id).update(hit_count=F('hit_count') + 1, last_hit_at=timezone.now())
+        self._remember(key, row.response_text, row.expires_at.timestamp())
+        self._record('db_hits')
+        return row.response_text
+
+    def _store_if_valid(self, key: str, model_name: str, text: str, validator: Callable[[str], bool]) -> None:
+        try:
+            valid = bool(text) and len(text) <= self.max_response_chars and validator(text)
+        except Exception:
+            valid = False
+        if not valid:
+            self._record('rejected')
+            return
+        expires_at = timezone.now() + timedelta(seconds=self.ttl)
+        try:
+            LLMResponseCache.objects.update_or_create(
+                key=key,
+                defaults={'model_name': model_name, 'response_text': text, 'expires_at': expires_at, 'hit_count': 0},
+            )
+        except IntegrityError:
+            pass  # Another process stored the same key concurrently
+        self._remember(key, text, expires_at.timestamp())
+        self._record('stores')
+        self._maybe_prune()
+
+    def _remember(self, key: str, text: str, expires_ts: float) -> None:
+        with self._lock:
+            self._memory[key] = (text, expires_ts)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_max_entries:
+                self._memory.popitem(last=False)
+
+    def _maybe_prune(self) -> None:
+        """Every 100 writes drop expired rows and trim the table to DB_MAX_ROWS, least recently used first."""
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._writes_since_prune < 100:
+                return
+            self._writes_since_prune = 0
+        LLMResponseCache.objects.filter(expires_at__lte=timezone.now()).delete()
+        overflow_ids = list(
+            LLMResponseCache.objects.order_by(F('last_hit_at').desc(nulls_last=True), '-created_at')
+            .values_list('id', flat=True)[self.db_max_rows:]
+        )
+        if overflow_ids:
+            LLMResponseCache.objects.filter(id__in=overflow_ids).delete()
+            logger.info(f"LLM response cache pruned {len(overflow_ids)} rows over the {self.db_max_rows} row limit")
+
+    def _record(self, event: str) -> None:
+        with self._lock:
+            self._stats[event] += 1
+            lookups = self._stats['memory_hits'] + self._stats['db_hits'] + self._stats['misses']
+        if event in ('memory_hits', 'db_hits', 'misses') and lookups % 100 == 0:
+            logger.info(f"LLM response cache stats: {self.stats()}")
+
+
+# Global instance
+llm_gateway_service = LLMGatewayService()
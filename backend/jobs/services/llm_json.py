@@ -0,0 +1,330 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONSectionParser:
+    """
+    Incrementally scans streamed LLM output for a single top-level JSON object and
+    returns each top-level object/array value as soon as its closing bracket arrives.
+
+    Used to forward e.g. the "shared" scores of an analysis report to the client
+    before the model has finished writing the student and employer views.
+    Scalar top-level values are ignored; code fences around the object are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._current_key = None
+        self._value_start = None
+        self.sections: Dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of model output and return newly completed (key, value) sections."""
+        self._buffer += chunk
+        buf = self._buffer
+        completed = []
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        # Either a key or a scalar value; a following ':' decides
+                        self._last_string = buf[self._string_start + 1:self._pos]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch in '{[':
+                if self._depth == 1 and self._current_key is not None and self._value_start is None:
+                    self._value_start = self._pos
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    raw = buf[self._value_start:self._pos + 1]
+                    try:
+                        value = repair_loads(raw)
+                        self.sections[self._current_key] = value
+                        completed.append((self._current_key, value))
+                    except ValueError as e:
+                        logger.warning(f"Could not parse streamed section '{self._current_key}': {e}")
+                    self._current_key = None
+                    self._value_start = None
+            elif ch == ':' and self._depth == 1:
+                self._current_key = self._last_string
+            self._pos += 1
+        return completed
+
+
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the outermost JSON object in model output, ignoring code fences and prose
+    around it. If the object is never closed (truncated output) the rest of the text
+    is returned for repair_json to close.
+    """
+    text = text or ''
+    start = text.find('{')
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _scan(fragment: str) -> Tuple[str, List[str], bool, List[int]]:
+    """
+    Single pass over a JSON fragment that drops trailing commas, maps Python literals,
+    escapes raw newlines in strings and fixes mismatched closers. Returns
+    (text, open closers, ends inside a string, offsets where a truncated tail can be cut:
+    structural commas and just after opening brackets).
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    commas: List[int] = []
+    openers: List[int] = []
+    in_string = escape = False
+    i, n = 0, len(fragment)
+    while i < n:
+        ch = fragment[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == '\n':
+                ch = '\\n'
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+            out.append(ch)
+            openers.append(len(out))
+        elif ch in '}]':
+            while out and out[-1] in ' \t\r\n':
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+                commas.pop()
+            if stack:
+                out.append(stack.pop())
+        elif ch == ',':
+            commas.append(len(out))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < n and fragment[j].isalpha():
+                j += 1
+            word = fragment[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    if escape:
+        out.pop()
+    return ''.join(out), stack, in_string, sorted(commas + openers)
+
+
+def _close(text: str, stack: List[str], in_string: bool) -> str:
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    if text.endswith(','):
+        text = text[:-1]
+    return text + ''.join(reversed(stack))
+
+
+def repair_loads(text: str, max_cuts: int = 50) -> Any:
+    """
+    Parse model output as JSON, repairing common defects: surrounding prose or fences,
+    trailing commas, Python literals, raw newlines in strings and truncation (open
+    strings and brackets are closed; a dangling key or value is cut back to the last
+    complete member). Raises ValueError if nothing parseable remains.
+    """
+    fragment = extract_json_object(text)
+    if fragment is None:
+        raise ValueError('No JSON object in model output')
+    try:
+        return json.loads(fragment)
+    except ValueError:
+        pass
+    repaired, stack, in_string, cuts = _scan(fragment)
+    try:
+        return json.loads(_close(repaired, stack, in_string))
+    except ValueError as e:
+        error = e
+    # Truncated mid-member: drop members from the end until the rest parses
+    for cut in reversed(cuts[-max_cuts:]):
+        prefix, stack, in_string, _ = _scan(repaired[:cut])
+        try:
+            return json.loads(_close(prefix, stack, in_string))
+        except ValueError as e:
+            error = e
+    raise ValueError(f'Unrepairable JSON in model output: {error}')
+
+
+def loads_llm_json(text: str) -> Any:
+    """Tolerant json.loads for model output (see repair_loads)."""
+    return repair_loads(text)
+
+
+def has_json_keys(text: str, *keys: str) -> bool:
+    """True if the model output is a JSON object containing every key; used as a cache validator."""
+    try:
+        data = loads_strict(text)
+    except (ValueError, TypeError):
+        return False
+    return isinstance(data, dict) and all(data.get(key) not in (None, '', [], {}) for key in keys)
+
+
+def matches_schema(text: str, schema: Dict[str, Iterable[str]]) -> bool:
+    """
+    True if the model output is well-formed JSON (no repair) with nothing missing from
+    ``schema``. Used as a cache validator: output that only parses after repair may be
+    truncated, so it is used for the live request but never stored for replay.
+    """
+    try:
+        data = loads_strict(text)
+    except (ValueError, TypeError):
+        return False
+    return isinstance(data, dict) and not missing_keys(data, schema)
+
+
+class ParsedJSON(NamedTuple):
+    data: Optional[Dict[str, Any]]  # None if the output could not be parsed at all
+    repaired: bool
+    missing: List[str]              # schema keys absent, empty or lacking required fields
+
+
+def missing_keys(data: Dict[str, Any], schema: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Check a parsed object against ``schema`` ({key: required sub-keys}); a key is missing
+    if absent or empty, or if it is an object lacking any of its required sub-keys.
+    """
+    missing = []
+    for key, required in schema.items():
+        value = data.get(key)
+        if value in (None, '', [], {}):
+            missing.append(key)
+        elif required and (not isinstance(value, dict) or any(sub not in value for sub in required)):
+            missing.append(key)
+    return missing
+
+
+class LLMJSONParser:
+    """
+    Shared parser for LLM JSON responses: tolerant parsing (repair_loads), schema checks
+    and per-caller outcome counts, so parse failures show up as a rate rather than
+    silently stored default reports.
+    """
+
+    OUTCOMES = ('ok', 'repaired', 'incomplete', 'failed')
+
+    def __init__(self):
+        self._stats = defaultdict(lambda: dict.fromkeys(self.OUTCOMES, 0))
+        self._lock = threading.Lock()
+
+    def parse(self, text: str, name: str = 'default', schema: Optional[Dict[str, Iterable[str]]] = None) -> ParsedJSON:
+        repaired = False
+        try:
+            data = loads_strict(text)
+        except ValueError:
+            repaired = True
+            try:
+                data = repair_loads(text)
+            except ValueError as e:
+                self._record(name, 'failed')
+                logger.error(f"LLM JSON [{name}] unparseable ({e}); output starts: {(text or '')[:200]!r}")
+                return ParsedJSON(None, False, list(schema or []))
+        if not isinstance(data, dict):
+            self._record(name, 'failed')
+            logger.error(f"LLM JSON [{name}] is not an object")
+            return ParsedJSON(None, repaired, list(schema or []))
+
+        missing = missing_keys(data, schema) if schema else []
+        if missing:
+            self._record(name, 'incomplete')
+            logger.warning(f"LLM JSON [{name}] missing {', '.join(missing)}{' after repair' if repaired else ''}")
+        elif repaired:
+            self._record(name, 'repaired')
+            logger.info(f"LLM JSON [{name}] parsed after repair")
+        else:
+            self._record(name, 'ok')
+        return ParsedJSON(data, repaired, missing)
+
+    def _record(self, name: str, outcome: str) -> None:
+        with self._lock:
+            self._stats[name][outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for name, counts in self._stats.items():
+                total = sum(counts.values())
+                result[name] = {
+                    **counts,
+                    'total': total,
+                    'failure_rate': round(counts['failed'] / total, 4) if total else 0.0,
+                    'incomplete_rate': round(counts['incomplete'] / total, 4) if total else 0.0,
+                }
+            return result
+
+
+def loads_strict(text: str) -> Any:
+    """json.loads model output after stripping surrounding whitespace and ``` / ```json fences."""
+    cleaned = (text or '').strip()
+    if cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+        if cleaned.startswith('json'):
+            cleaned = cleaned[4:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    return json.loads(cleaned)
+
+
+# Global instance
+llm_json_parser = LLMJSONParser()
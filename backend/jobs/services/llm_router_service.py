@@ -0,0 +1,379 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .rate_limiter_service import rate_limiter_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTING = {
+    'POLICY': 'latency',              # 'latency': fastest healthy provider first; 'ordered': PROVIDERS order
+    'HEDGE_ENABLED': False,           # hedges duplicate whole generations; enable only where calls are short
+    'HEDGE_PERCENTILE': 95,           # hedge a request once it outlasts this percentile of the provider's recent latencies
+    'HEDGE_MIN_SAMPLES': 20,          # latencies needed before that percentile is trusted (no hedging until then)
+    'HEDGE_AFTER_MS': 4000,           # ... and never sooner than this
+    'HEDGE_BUDGET_FRACTION': 0.05,    # at most this share of requests may be hedged
+    'HEDGE_BUDGET_BURST': 3,          # unused hedges that can be saved up
+    'LATENCY_WINDOW': 200,            # recent latencies kept per provider for the percentile
+    'MAX_PARALLEL': 2,                # providers in flight for one request, including hedges
+    'FAILURE_THRESHOLD': 3,           # consecutive failures that open a provider's circuit
+    'RESET_TIMEOUT_SECONDS': 30,      # open circuit duration before a half-open probe is allowed
+    'EWMA_ALPHA': 0.2,
+    'MAX_WORKERS': 32,                # threads available for concurrent/hedged provider calls
+    'PROVIDERS': [
+        {'name': 'gemini', 'type': 'gemini', 'model': 'gemini-2.5-flash'},
+    ],
+}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LLMProviderError(Exception):
+    """Raised when a provider call fails or every routed provider is unavailable."""
+
+
+class _Usage:
+    """Token counts in the attribute names of Gemini's usage_metadata."""
+
+    def __init__(self, prompt_token_count: int = 0, candidates_token_count: int = 0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = 0
+
+
+class LLMResponse:
+    """Provider-neutral response exposing the parts of a Gemini response the services use."""
+
+    def __init__(self, text: str, provider: str, usage_metadata: Any = None):
+        self.text = text
+        self.provider = provider
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        yield self
+
+
+class CircuitBreaker:
+    """Closed -> open after FAILURE_THRESHOLD consecutive failures -> half-open probe after the reset timeout."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class BaseLLMProvider:
+    def __init__(self, name: str, model: str, timeout: float = 60):
+        self.name = name
+        self.model_name = model
+        self.timeout = timeout
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        raise NotImplementedError
+
+
+class GeminiProvider(BaseLLMProvider):
+    def __init__(self, name: str, model: str, timeout: float = 60, api_key: Optional[str] = None):
+        super().__init__(name, model, timeout)
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or settings.GEMINI_API_KEY)
+        self._model = genai.GenerativeModel(model)
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        kwargs = {'request_options': {'timeout': self.timeout}}
+        if generation_config:
+            kwargs['generation_config'] = generation_config
+        if stream:
+            # Streams are handed back as-is so chunks reach the caller as they arrive
+            return self._model.generate_content(prompt, stream=True, **kwargs)
+        response = self._model.generate_content(prompt, **kwargs)
+        return LLMResponse(response.text, self.name, getattr(response, 'usage_metadata', None))
+
+
+class OpenAICompatibleProvider(BaseLLMProvider):
+    """Chat-completions API as served by OpenRouter, Groq, Together, vLLM, llama.cpp, etc."""
+
+    def __init__(self, name: str, model: str, api_base: str, api_key_env: str = '', headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 60):
+        super().__init__(name, model, timeout)
+        self.api_base = api_base.rstrip('/')
+        self.api_key = os.getenv(api_key_env, '') if api_key_env else ''
+        self.headers = headers or {}
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False):
+        # Streaming is not requested from these providers; the full text is returned as a single chunk
+        body = {'model': self.model_name, 'messages': [{'role': 'user', 'content': prompt}]}
+        config = generation_config or {}
+        if 'temperature' in config:
+            body['temperature'] = config['temperature']
+        if 'max_output_tokens' in config:
+            body['max_tokens'] = config['max_output_tokens']
+        headers = {'Content-Type': 'application/json', **self.headers}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            f"{self.api_base}/chat/completions", data=json.dumps(body).encode('utf-8'), headers=headers, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            raise LLMProviderError(f"{self.name} returned HTTP {e.code}") from e
+        except (urllib.error.URLError, TimeoutError, ValueError) as e:
+            raise LLMProviderError(f"{self.name} request failed: {e}") from e
+        try:
+            text = payload['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMProviderError(f"{self.name} returned an unexpected payload") from e
+        usage = payload.get('usage') or {}
+        return LLMResponse(text, self.name, _Usage(usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)))
+
+
+PROVIDER_TYPES = {
+    'gemini': GeminiProvider,
+    'openai': OpenAICompatibleProvider,
+    'fake': 'jobs.services.fake_llm_service.FakeLLMProvider',
+    'record_replay': 'jobs.services.fake_llm_service.RecordReplayProvider',
+}
+
+
+class LLMRouterService:
+    """
+    Drop-in replacement for a GenerativeModel that spreads calls over several providers.
+
+    Each provider has a circuit breaker and an EWMA of its latency. A request goes to the
+    best healthy provider; if it fails the next one is tried. With HEDGE_ENABLED, a request
+    that outlasts the provider's HEDGE_PERCENTILE latency is also started on the next
+    provider, within a budget of HEDGE_BUDGET_FRACTION of requests, and whichever succeeds
+    first wins.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, providers: Optional[List[BaseLLMProvider]] = None):
+        self.config = {**DEFAULT_ROUTING, **(config if config is not None else getattr(settings, 'LLM_ROUTING', {}))}
+        self.providers = providers if providers is not None else [
+            self._build_provider(spec) for spec in self.config['PROVIDERS'] if spec.get('enabled', True)
+        ]
+        self.breakers = {
+            p.name: CircuitBreaker(self.config['FAILURE_THRESHOLD'], self.config['RESET_TIMEOUT_SECONDS'])
+            for p in self.providers
+        }
+        self.latency_ewma: Dict[str, Optional[float]] = {p.name: None for p in self.providers}
+        self.latencies: Dict[str, Deque[float]] = {p.name: deque(maxlen=self.config['LATENCY_WINDOW']) for p in self.providers}
+        self._hedge_budget = float(self.config['HEDGE_BUDGET_BURST'])
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.config['MAX_WORKERS'], thread_name_prefix='llm-router')
+
+    @staticmethod
+    def _build_provider(spec: Dict[str, Any]) -> BaseLLMProvider:
+        """Instantiate a provider from its settings dict; 'type' is a PROVIDER_TYPES key or a dotted class path."""
+        spec = dict(spec)
+        provider_cls = PROVIDER_TYPES.get(spec['type'], spec['type'])
+        spec.pop('type')
+        if isinstance(provider_cls, str):
+            provider_cls = import_string(provider_cls)
+        return provider_cls(**{key: value for key, value in spec.items() if key != 'enabled'})
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the routing setup in cache keys; any provider may have produced a cached answer."""
+        return 'router:' + ','.join(f"{p.name}/{p.model_name}" for p in self.providers)
+
+    # ---------------- Routing ----------------
+
+    def ordered_providers(self) -> List[BaseLLMProvider]:
+        candidates = [p for p in self.providers if self.breakers[p.name].state != 'open']
+        if self.config['POLICY'] == 'latency':
+            # Untried providers keep their configured position ahead of slower measured ones
+            candidates.sort(key=lambda p: self.latency_ewma[p.name] if self.latency_ewma[p.name] is not None else 0)
+        return candidates
+
+    def _hedge_delay(self, provider: BaseLLMProvider) -> Optional[float]:
+        """
+        Seconds to wait before hedging a request to ``provider``, or None not to hedge. Only
+        requests slower than nearly all recent ones are duplicated, so a generation that is
+        merely long, like a full analysis report, is not sent twice.
+        """
+        if not self.config['HEDGE_ENABLED']:
+            return None
+        with self._lock:
+            samples = list(self.latencies[provider.name])
+        if not samples or len(samples) < self.config['HEDGE_MIN_SAMPLES']:
+            return None
+        return max(self.config['HEDGE_AFTER_MS'] / 1000, _percentile(samples, self.config['HEDGE_PERCENTILE']))
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._hedge_budget < 1:
+                return False
+            self._hedge_budget -= 1
+            return True
+
+    def _record(self, provider: BaseLLMProvider, started: Optional[float], ok: bool) -> None:
+        if ok and started is None:
+            self.breakers[provider.name].record_success()
+        elif ok:
+            latency = time.monotonic() - started
+            alpha = self.config['EWMA_ALPHA']
+            with self._lock:
+                previous = self.latency_ewma[provider.name]
+                self.latency_ewma[provider.name] = latency if previous is None else alpha * latency + (1 - alpha) * previous
+                self.latencies[provider.name].append(latency)
+            self.breakers[provider.name].record_success()
+        else:
+            self.breakers[provider.name].record_failure()
+            if self.breakers[provider.name].state == 'open':
+                logger.warning(f"LLM provider '{provider.name}' circuit opened")
+
+    def _call(self, provider: BaseLLMProvider, prompt: str, generation_config, stream: bool):
+        bucket = f"llm:{provider.name}"
+        # Waiting for quota is not a provider failure, so it happens outside the breaker accounting
+        rate_limiter_service.acquire(bucket)
+        started = time.monotonic()
+        try:
+            result = provider.generate(prompt, generation_config=generation_config, stream=stream)
+        except Exception as e:
+            if rate_limiter_service.is_rate_limit_error(e):
+                rate_limiter_service.drain(bucket)
+            self._record(provider, started, ok=False)
+            raise
+        # Time-to-open of a stream says nothing about generation latency, so it is not averaged in
+        self._record(provider, None if stream else started, ok=True)
+        return result
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, stream: bool = False, **kwargs):
+        providers = self.ordered_providers()
+        if stream:
+            # A stream cannot be hedged once it starts; fail over only if opening it fails
+            last_error = None
+            for provider in providers:
+                if not self.breakers[provider.name].allow():
+                    continue
+                try:
+                    return self._call(provider, prompt, generation_config, stream=True)
+                except Exception as e:
+                    logger.warning(f"LLM provider '{provider.name}' failed to start stream: {e}")
+                    last_error = e
+            raise LLMProviderError(f"All LLM providers failed: {last_error or 'all circuits open'}") from last_error
+
+        return self._hedged(providers, prompt, generation_config)
+
+    def _hedged(self, providers: List[BaseLLMProvider], prompt: str, generation_config):
+        if len(providers) == 1:
+            # Nothing to hedge with; call inline instead of occupying a pool thread
+            if not self.breakers[providers[0].name].allow():
+                raise LLMProviderError("No LLM provider available (all circuits open)")
+            try:
+                return self._call(providers[0], prompt, generation_config, False)
+            except Exception as e:
+                raise LLMProviderError(f"All LLM providers failed: {e}") from e
+
+        with self._lock:
+            self._hedge_budget = min(self.config['HEDGE_BUDGET_BURST'], self._hedge_budget + self.config['HEDGE_BUDGET_FRACTION'])
+        pending = {}
+        queue = list(providers)
+        last_error = None
+        hedging = True
+
+        def launch() -> bool:
+            # Breakers are consulted only at launch so an unused half-open provider keeps its probe slot
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].allow():
+                    # Run in a copy of the caller's context so the rate-limit priority carries over to the pool thread
+                    context = contextvars.copy_context()
+                    pending[self._executor.submit(context.run, self._call, provider, prompt, generation_config, False)] = provider
+                    return True
+            return False
+
+        launch()
+        while pending:
+            timeout = None
+            if hedging and queue and len(pending) < self.config['MAX_PARALLEL']:
+                timeout = self._hedge_delay(pending[next(iter(pending))])
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                slow = pending[next(iter(pending))].name
+                if not self._take_hedge():
+                    logger.info(f"LLM request to '{slow}' slow but the hedge budget is spent; waiting")
+                    hedging = False
+                elif launch():
+                    logger.info(f"LLM request to '{slow}' slow; hedging with '{list(pending.values())[-1].name}'")
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"LLM provider '{provider.name}' failed: {e}")
+                    last_error = e
+                    continue
+                # Losers that have not started are dropped; running ones finish in the pool and are ignored
+                for loser in pending:
+                    loser.cancel()
+                return result
+            if not pending:
+                launch()
+        raise LLMProviderError(f"All LLM providers failed: {last_error or 'all circuits open'}") from last_error
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            p.name: {
+                'model': p.model_name,
+                'circuit': self.breakers[p.name].state,
+                'consecutive_failures': self.breakers[p.name].failures,
+                'latency_ewma_ms': round(self.latency_ewma[p.name] * 1000) if self.latency_ewma[p.name] is not None else None,
+                'latency_p95_ms': round(_percentile(list(self.latencies[p.name]), 95) * 1000) if self.latencies[p.name] else None,
+            }
+            for p in self.providers
+        }
+
+
+# Global instance
+llm_router_service = LLMRouterService()
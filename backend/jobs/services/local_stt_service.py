@@ -0,0 +1,253 @@
+import time
+import logging
+import threading
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, List, Optional
+import numpy as np
+from django.conf import settings
+from . import local_stt_worker
+from .audio_buffer import AudioBuffer
+from .audio_transcode_service import audio_transcode_service
+
+try:
+    import faster_whisper
+except ImportError:
+    faster_whisper = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = local_stt_worker.SAMPLE_RATE  # matches audio_transcode_service's PCM output
+
+DEFAULT_LOCAL_STT = {
+    'ENABLED': True,
+    'MODEL': 'base.en',
+    'COMPUTE_TYPE': 'int8',
+    'LANGUAGE': 'en',
+    'BEAM_SIZE': 1,
+    'INITIAL_PROMPT': '',
+    'WORKERS': 2,                # processes, each holding its own copy of the model
+    'CPU_THREADS': 2,            # intra-op threads per worker
+    'MAX_QUEUE': 16,             # clips queued or in flight before new requests are refused
+    'BATCH_WINDOW_MS': 40,       # how long the first short clip waits for others to share its batch
+    'MAX_BATCH_SIZE': 8,
+    'BATCH_MAX_SECONDS': 30,     # clips up to this long are batchable (Whisper's 30 s window at most)
+    'TIMEOUT_SECONDS': 120,
+    'METRICS_WINDOW': 500,       # recent requests kept for latency / RTF percentiles
+    'LOG_EVERY': 100,
+}
+
+
+class LocalSTTUnavailable(Exception):
+    """Local STT is disabled or faster-whisper is not installed."""
+
+
+class LocalSTTBusy(Exception):
+    """The local STT queue is full."""
+
+
+class _Request:
+    __slots__ = ('samples', 'audio_seconds', 'submitted_at', 'future')
+
+    def __init__(self, samples: np.ndarray):
+        self.samples = samples
+        self.audio_seconds = len(samples) / SAMPLE_RATE
+        self.submitted_at = time.monotonic()
+        self.future: Future = Future()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LocalSTTService:
+    """
+    Offline speech-to-text on CPU with faster-whisper, so transcription doesn't depend on
+    Google credentials or quota and its throughput is sized by WORKERS.
+
+    The model runs in a process pool (spawned lazily, model loaded once per worker).
+    Admission is bounded by MAX_QUEUE; short clips arriving within BATCH_WINDOW_MS of
+    each other are decoded as one batch, longer clips run alone. ``stats()`` reports
+    latency and real-time factor (compute seconds per audio second).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_LOCAL_STT, **(config if config is not None else getattr(settings, 'LOCAL_STT', {}))}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.config['MAX_QUEUE'])
+        self._pending: Deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._latencies: Deque[float] = deque(maxlen=self.config['METRICS_WINDOW'])
+        self._rtfs: Deque[float] = deque(maxlen=self.config['METRICS_WINDOW'])
+
+    @property
+    def available(self) -> bool:
+        return bool(self.config['ENABLED']) and faster_whisper is not None
+
+    # ---------------- Public API ----------------
+
+    def transcribe(self, audio: AudioBuffer) -> Dict[str, Any]:
+        """Decode and transcribe buffered audio; blocks until the pool returns."""
+        return self.transcribe_samples(self.load_samples(audio))
+
+    def transcribe_samples(self, samples: np.ndarray) -> Dict[str, Any]:
+        return self.submit(samples).result(timeout=self.config['TIMEOUT_SECONDS'])
+
+    def submit(self, samples: np.ndarray) -> Future:
+        """
+        Queue 16 kHz mono float32 samples. The future resolves to a dict with transcript,
+        audio_seconds, latency_ms, rtf and batch_size. Raises LocalSTTBusy when full.
+        """
+        if not self.available:
+            raise LocalSTTUnavailable('Local STT is disabled or faster-whisper is not installed.')
+        if not self._slots.acquire(blocking=False):
+            self._record('rejected')
+            raise LocalSTTBusy('Local speech recognition is at capacity.')
+        request = _Request(samples)
+        request.future.add_done_callback(lambda _: self._slots.release())
+        if request.audio_seconds <= min(self.config['BATCH_MAX_SECONDS'], local_stt_worker.WINDOW_SECONDS):
+            with self._cond:
+                self._ensure_dispatcher()
+                self._pending.append(request)
+                self._cond.notify()
+        else:
+            self._dispatch([request])
+        return request.future
+
+    @staticmethod
+    def load_samples(audio: AudioBuffer) -> np.ndarray:
+        """Decode to 16 kHz mono float32 through the shared transcoder (may raise TranscodeError)."""
+        pcm = audio_transcode_service.to_pcm(audio)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def warm(self) -> None:
+        """Start every worker and wait for its model to load."""
+        pool = self._get_pool()
+        for future in [pool.submit(local_stt_worker.ping) for _ in range(self.config['WORKERS'])]:
+            future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = list(self._latencies)
+            rtfs = list(self._rtfs)
+        stats['queued'] = len(self._pending)
+        stats['latency_p50_ms'] = round(_percentile(latencies, 50) * 1000)
+        stats['latency_p95_ms'] = round(_percentile(latencies, 95) * 1000)
+        stats['rtf_mean'] = round(sum(rtfs) / len(rtfs), 3) if rtfs else 0.0
+        stats['rtf_p95'] = round(_percentile(rtfs, 95), 3)
+        batches = stats.get('batches', 0)
+        stats['mean_batch_size'] = round(stats.get('completed', 0) / batches, 2) if batches else 0.0
+        return stats
+
+    # ---------------- Batching ----------------
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='local-stt-batcher', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        window = self.config['BATCH_WINDOW_MS'] / 1000
+        max_batch = self.config['MAX_BATCH_SIZE']
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0].submitted_at + window
+                while len(self._pending) < max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(max_batch, len(self._pending)))]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_Request]) -> None:
+        try:
+            job = self._get_pool().submit(local_stt_worker.transcribe_clips, [r.samples for r in batch])
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            self._fail(batch, e)
+            return
+        job.add_done_callback(lambda done: self._complete(batch, done))
+
+    def _complete(self, batch: List[_Request], job: Future) -> None:
+        try:
+            texts, compute_seconds = job.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._reset_pool()
+            self._fail(batch, e)
+            return
+        audio_seconds = sum(r.audio_seconds for r in batch)
+        rtf = compute_seconds / audio_seconds if audio_seconds else 0.0
+        now = time.monotonic()
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['completed'] += len(batch)
+            self._stats['audio_seconds'] = round(self._stats['audio_seconds'] + audio_seconds, 1)
+            self._rtfs.append(rtf)
+            self._latencies.extend(now - r.submitted_at for r in batch)
+            completed = self._stats['completed']
+        for request, text in zip(batch, texts):
+            request.future.set_result({
+                'transcript': text,
+                'audio_seconds': round(request.audio_seconds, 2),
+                'latency_ms': round((now - request.submitted_at) * 1000),
+                'rtf': round(rtf, 3),
+                'batch_size': len(batch),
+            })
+        if completed // self.config['LOG_EVERY'] != (completed - len(batch)) // self.config['LOG_EVERY']:
+            logger.info(f"Local STT stats: {self.stats()}")
+
+    def _fail(self, batch: List[_Request], error: Exception) -> None:
+        logger.error(f"Local STT batch of {len(batch)} failed: {error}")
+        self._record('failed', len(batch))
+        for request in batch:
+            request.future.set_exception(error)
+
+    def _record(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += count
+
+    # ---------------- Pool ----------------
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                options = {
+                    'language': self.config['LANGUAGE'],
+                    'beam_size': self.config['BEAM_SIZE'],
+                    'initial_prompt': self.config['INITIAL_PROMPT'] or None,
+                }
+                # spawn, not fork: the web process is multi-threaded
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.config['WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=local_stt_worker.init_worker,
+                    initargs=(self.config['MODEL'], self.config['COMPUTE_TYPE'], self.config['CPU_THREADS'], options),
+                )
+                logger.info(f"Started local STT pool: {self.config['WORKERS']} x {self.config['MODEL']}")
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        self._record('pool_restarts')
+
+
+# Global instance
+local_stt_service = LocalSTTService()
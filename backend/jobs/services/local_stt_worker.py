@@ -0,0 +1,99 @@
+"""
+Code that runs inside the local STT process pool. Kept free of Django imports so spawned
+workers start quickly; each worker loads the Whisper model once in ``init_worker``.
+"""
+import time
+from typing import List, Optional, Tuple
+import numpy as np
+
+try:
+    import ctranslate2
+    from faster_whisper import WhisperModel
+    from faster_whisper.tokenizer import Tokenizer
+except ImportError:
+    ctranslate2 = None
+    WhisperModel = None
+    Tokenizer = None
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30   # Whisper's fixed input window; every clip is padded to it
+WINDOW_FRAMES = 3000  # mel frames in one window
+MAX_DECODE_TOKENS = 448
+NO_SPEECH_THRESHOLD = 0.6
+
+_model = None
+_tokenizer = None
+_options: dict = {}
+
+
+def init_worker(model_name: str, compute_type: str, cpu_threads: int, options: dict) -> None:
+    """Pool initializer: load the model and run one warm-up pass so the first real clip isn't slow."""
+    global _model, _tokenizer, _options
+    _model = WhisperModel(model_name, device='cpu', compute_type=compute_type, cpu_threads=cpu_threads)
+    _tokenizer = Tokenizer(_model.hf_tokenizer, _model.model.is_multilingual, task='transcribe',
+                           language=options.get('language', 'en'))
+    _options = options
+    transcribe_clips([np.zeros(SAMPLE_RATE, dtype=np.float32)])
+
+
+def ping() -> bool:
+    return _model is not None
+
+
+def transcribe_clips(clips: List[np.ndarray]) -> Tuple[List[str], float]:
+    """
+    Transcribe 16 kHz mono float32 clips; returns the texts in order and the compute time.
+    Clips that fit in one Whisper window are encoded and decoded as a single batch; a
+    longer clip is transcribed on its own with the long-form pipeline.
+    """
+    started = time.perf_counter()
+    if len(clips) == 1 and len(clips[0]) > WINDOW_SECONDS * SAMPLE_RATE:
+        texts = [_transcribe_long(clips[0])]
+    else:
+        texts = _transcribe_batch(clips)
+    return texts, time.perf_counter() - started
+
+
+def _prompt_tokens() -> List[int]:
+    tokens = list(_tokenizer.sot_sequence) + [_tokenizer.no_timestamps]
+    initial_prompt: Optional[str] = _options.get('initial_prompt')
+    if initial_prompt:
+        prompt_tokens = _tokenizer.encode(' ' + initial_prompt.strip())[-(MAX_DECODE_TOKENS // 2 - 1):]
+        tokens = [_tokenizer.sot_prev] + prompt_tokens + tokens
+    return tokens
+
+
+def _transcribe_batch(clips: List[np.ndarray]) -> List[str]:
+    window = WINDOW_SECONDS * SAMPLE_RATE
+    features = np.stack([
+        _model.feature_extractor(np.pad(clip[:window], (0, window - len(clip[:window]))))[:, :WINDOW_FRAMES]
+        for clip in clips
+    ]).astype(np.float32)
+    prompt = _prompt_tokens()
+    results = _model.model.generate(
+        ctranslate2.StorageView.from_array(np.ascontiguousarray(features)),
+        [prompt] * len(clips),
+        beam_size=_options.get('beam_size', 1),
+        max_length=MAX_DECODE_TOKENS,
+        suppress_blank=True,
+        return_no_speech_prob=True,
+    )
+    texts = []
+    for result in results:
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+            texts.append('')
+        else:
+            texts.append(_tokenizer.decode(result.sequences_ids[0]).strip())
+    return texts
+
+
+def _transcribe_long(clip: np.ndarray) -> str:
+    segments, _ = _model.transcribe(
+        clip,
+        language=_options.get('language', 'en'),
+        beam_size=_options.get('beam_size', 1),
+        initial_prompt=_options.get('initial_prompt'),
+        condition_on_previous_text=False,
+        vad_filter=True,
+    )
+    return ' '.join(segment.text.strip() for segment in segments).strip()
@@ -0,0 +1,189 @@
+import re
+import json
+import math
+import logging
+from typing import Any, Dict, List, Tuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('cl100k_base')
+except Exception:  # tiktoken is optional; fall back to the ~4 chars/token heuristic
+    _ENCODING = None
+
+DEFAULT_BUDGETS = {
+    'ANALYSIS_RESUME': 1500,
+    'ANALYSIS_JOB': 700,
+    'ANALYSIS_SHARED': 400,
+    'INTERVIEW_REPORT_RESUME': 900,
+    'INTERVIEW_REPORT_JOB': 500,
+    'INTERVIEW_REPORT_MATCH': 400,
+    'INTERVIEW_QUESTION_RESUME': 700,
+}
+
+# Resume sections in the order they are kept when the budget is tight
+SECTION_PRIORITY = ['skills', 'experience', 'projects', 'education', 'certifications', 'summary', 'other']
+SECTION_HEADINGS = {
+    'skills': ['skills', 'technical skills', 'core competencies', 'competencies', 'technologies', 'tools', 'languages'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment', 'employment history',
+                   'work history', 'internships', 'internship'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects'],
+    'education': ['education', 'academic background', 'qualifications', 'academic qualifications'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'awards', 'achievements', 'honors'],
+    'summary': ['summary', 'profile', 'professional summary', 'objective', 'career objective', 'about me'],
+    'other': ['references', 'hobbies', 'interests', 'declaration', 'personal details', 'personal information',
+              'activities', 'extracurricular activities', 'volunteering'],
+}
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+_BOILERPLATE_RES = [
+    re.compile(r'references?\s+(are\s+)?(available\s+)?(up)?on\s+request', re.I),
+    re.compile(r'^\s*(curriculum\s+vitae|resume|cv)\s*$', re.I),
+    re.compile(r'^\s*page\s+\d+(\s+of\s+\d+)?\s*$', re.I),
+    re.compile(r'i\s+hereby\s+declare', re.I),
+    re.compile(r'^\s*(e-?mail|phone|mobile|tel|address|linkedin|github|date of birth|dob|nationality|gender|marital status)\s*[:|-]', re.I),
+    re.compile(r'^[\s\W]*[\w.+-]+@[\w-]+\.[\w.]+[\s\W]*$'),
+    re.compile(r'^[\s+()\d-]{8,}$'),
+]
+
+
+class PromptBudgetService:
+    """
+    Keeps prompt inputs within per-field token budgets. Resumes are split into sections,
+    boilerplate (contact lines, declarations, page numbers) is dropped and sections are
+    kept in SECTION_PRIORITY order until the budget is spent.
+    """
+
+    def __init__(self):
+        self.budgets = {**DEFAULT_BUDGETS, **getattr(settings, 'PROMPT_TOKEN_BUDGETS', {})}
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        if _ENCODING is not None:
+            return len(_ENCODING.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / 4)
+
+    def budget(self, name: str) -> int:
+        return self.budgets[name]
+
+    # ---------------- Resume ----------------
+
+    def compact_resume(self, text: str, budget_name: str = 'ANALYSIS_RESUME') -> str:
+        text = text or ''
+        budget = self.budget(budget_name)
+        before = self.count_tokens(text)
+        if before <= budget:
+            return text
+
+        sections = self._split_sections(self._strip_boilerplate(text))
+        remaining = budget
+        kept: Dict[int, str] = {}
+        order = sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.index(sections[i][0]))
+        for index in order:
+            body = sections[index][1]
+            tokens = self.count_tokens(body)
+            if tokens <= remaining:
+                kept[index] = body
+                remaining -= tokens
+            elif remaining > 50:
+                kept[index] = self.truncate(body, remaining)
+                remaining = 0
+            if remaining <= 0:
+                break
+        compacted = '\n\n'.join(kept[i] for i in sorted(kept))
+        logger.info(f"Prompt budget [{budget_name}] resume {before} -> {self.count_tokens(compacted)} tokens (budget {budget})")
+        return compacted
+
+    def _strip_boilerplate(self, text: str) -> str:
+        lines = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                if lines and lines[-1] != '':
+                    lines.append('')
+                continue
+            if any(pattern.search(stripped) for pattern in _BOILERPLATE_RES):
+                continue
+            lines.append(re.sub(r'[ \t]{2,}', ' ', stripped))
+        return '\n'.join(lines).strip()
+
+    def _split_sections(self, text: str) -> List[Tuple[str, str]]:
+        """Split on recognised headings; text before the first heading counts as the summary."""
+        sections: List[Tuple[str, List[str]]] = [('summary', [])]
+        for line in text.splitlines():
+            heading = re.sub(r'[^a-z ]', '', line.lower()).strip()
+            if heading in _HEADING_LOOKUP and len(line) <= 40:
+                sections.append((_HEADING_LOOKUP[heading], [line]))
+            else:
+                sections[-1][1].append(line)
+        return [(name, '\n'.join(lines).strip()) for name, lines in sections if '\n'.join(lines).strip()]
+
+    # ---------------- Generic text ----------------
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to roughly max_tokens, preferring a line or sentence boundary."""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        if _ENCODING is not None:
+            cut = _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens])
+        else:
+            cut = text[:max_tokens * 4]
+        boundary = max(cut.rfind('\n'), cut.rfind('. '))
+        if boundary > len(cut) * 0.6:
+            cut = cut[:boundary + 1]
+        return cut.rstrip() + ' [...]'
+
+    def compact_text(self, text: str, budget_name: str) -> str:
+        text = re.sub(r'\n{3,}', '\n\n', re.sub(r'[ \t]{2,}', ' ', text or '')).strip()
+        budget = self.budget(budget_name)
+        before = self.count_tokens(text)
+        if before <= budget:
+            return text
+        compacted = self.truncate(text, budget)
+        logger.info(f"Prompt budget [{budget_name}] text {before} -> {self.count_tokens(compacted)} tokens (budget {budget})")
+        return compacted
+
+    # ---------------- AI match report ----------------
+
+    def compact_match_report(self, report_data: Dict[str, Any], budget_name: str = 'INTERVIEW_REPORT_MATCH') -> str:
+        """
+        Reduce a full AIAnalysisReport.report_data to the scores, summaries and employer
+        flags an interview report needs, serialised compactly and kept within budget.
+        """
+        if not report_data:
+            return '{}'
+        shared = report_data.get('shared', {}) or {}
+        employer_view = report_data.get('employer_view', {}) or {}
+        skills = shared.get('skills_analysis', {}) or {}
+        compact = {
+            'overall_score': shared.get('overall_score'),
+            'scores': {key: value for key, value in shared.items() if key.endswith('_score') and key != 'overall_score'},
+            'matching_skills': skills.get('matching_skills', [])[:8],
+            'missing_skills': skills.get('missing_skills', [])[:8],
+            'summaries': {
+                key.replace('_analysis', ''): value.get('summary') for key, value in shared.items()
+                if isinstance(value, dict) and value.get('summary')
+            },
+            'fit_summary': employer_view.get('fit_summary'),
+        }
+        for key in ('risk_flags', 'opportunity_flags'):
+            items = employer_view.get(key)
+            if isinstance(items, list) and items:
+                compact[key] = [item.get('title', '') if isinstance(item, dict) else item for item in items[:3]]
+        compact = {key: value for key, value in compact.items() if value not in (None, '', {}, [])}
+
+        full = json.dumps(report_data)
+        serialised = json.dumps(compact, separators=(',', ':'))
+        budget = self.budget(budget_name)
+        if self.count_tokens(serialised) > budget:
+            compact.pop('summaries', None)
+            serialised = json.dumps(compact, separators=(',', ':'))
+        logger.info(f"Prompt budget [{budget_name}] match report {self.count_tokens(full)} -> {self.count_tokens(serialised)} tokens (budget {budget})")
+        return serialised
+
+
+# Global instance
+prompt_budget_service = PromptBudgetService()
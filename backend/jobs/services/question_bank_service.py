@@ -0,0 +1,124 @@
+import random
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import numpy as np
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from ..models import InterviewQuestion, Job, Resume
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTION_BANK_CONFIG = {
+    'ENABLED': True,
+    'FIT_THRESHOLD': 0.35,
+    'DUPLICATE_THRESHOLD': 0.9,
+    'MIN_BANK_SIZE': 3,
+    'MAX_BANK_SIZE': 20,
+    'TOP_K': 3,
+    'MAX_SERVES': 50,
+    'EXPLORE_RATE': 0.1,
+}
+
+
+def _cosine(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    norms[norms == 0] = 1.0
+    return matrix @ vector / norms
+
+
+class QuestionBankService:
+    """
+    Per-job bank of opening interview questions. An opener is served from the bank when
+    the candidate's resume embedding is close enough to a banked question's embedding;
+    otherwise the caller generates one and offers it back to the bank.
+
+    Novelty: the bank keeps generating until it holds MIN_BANK_SIZE questions, still
+    generates a fresh question EXPLORE_RATE of the time, and rejects new questions that
+    are near-duplicates of banked ones. Rotation: among the TOP_K best-fitting questions
+    the least-served is chosen, and questions are retired after MAX_SERVES uses.
+    """
+
+    def __init__(self):
+        self.config = {**DEFAULT_QUESTION_BANK_CONFIG, **getattr(settings, 'INTERVIEW_QUESTION_BANK', {})}
+        self._stats = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _embed(text: str) -> List[float]:
+        from .embedding_service import embedding_service  # Local import: loads the sentence-transformer model on first use
+        return embedding_service.get_embedding(text)
+
+    def _active(self, job: Job):
+        return InterviewQuestion.objects.filter(job=job, is_active=True)
+
+    def serve_opener(self, job: Job, resume: Resume) -> Optional[Dict[str, Any]]:
+        """Return a banked opening question that fits the resume, or None if one should be generated."""
+        config = self.config
+        if not config['ENABLED'] or not resume or not resume.embedding:
+            return None
+        bank = list(self._active(job).values('id', 'question_text', 'question_type', 'embedding', 'times_served', 'last_served_at'))
+        if len(bank) < config['MIN_BANK_SIZE']:
+            self._count('bank_too_small')
+            return None
+        if len(bank) < config['MAX_BANK_SIZE'] and random.random() < config['EXPLORE_RATE']:
+            self._count('explored')
+            return None
+
+        resume_vector = np.asarray(resume.embedding, dtype=float)
+        usable = [q for q in bank if len(q['embedding'] or []) == len(resume_vector)]
+        if not usable:
+            return None
+        scores = _cosine(np.asarray([q['embedding'] for q in usable], dtype=float), resume_vector)
+        ranked = sorted(
+            ((score, q) for score, q in zip(scores, usable) if score >= config['FIT_THRESHOLD']),
+            key=lambda item: item[0], reverse=True,
+        )[:config['TOP_K']]
+        if not ranked:
+            self._count('miss')
+            return None
+
+        # Rotate: least-served of the best fits, oldest-served first on ties
+        score, chosen = min(ranked, key=lambda item: (item[1]['times_served'], item[1]['last_served_at'] or timezone.now()))
+        InterviewQuestion.objects.filter(id=chosen['id']).update(times_served=F('times_served') + 1, last_served_at=timezone.now())
+        if chosen['times_served'] + 1 >= config['MAX_SERVES']:
+            InterviewQuestion.objects.filter(id=chosen['id']).update(is_active=False)
+            logger.info(f"Retired banked question {chosen['id']} for job {job.id} after {config['MAX_SERVES']} uses")
+        self._count('hit')
+        logger.info(f"Serving banked opener {chosen['id']} for job {job.id} (fit {score:.2f})")
+        return {'question_text': chosen['question_text'], 'type': chosen['question_type'], 'bank_id': str(chosen['id'])}
+
+    def add_opener(self, job: Job, question: Dict[str, Any]) -> Optional[InterviewQuestion]:
+        """Bank a freshly generated opener unless the bank is full or it duplicates a banked question."""
+        config = self.config
+        text = (question or {}).get('question_text', '').strip()
+        if not config['ENABLED'] or not text:
+            return None
+        bank = list(self._active(job).values_list('embedding', flat=True))
+        if len(bank) >= config['MAX_BANK_SIZE']:
+            return None
+        embedding = self._embed(text)
+        if not embedding:
+            return None
+        same_size = [vector for vector in bank if len(vector or []) == len(embedding)]
+        if same_size and _cosine(np.asarray(same_size, dtype=float), np.asarray(embedding, dtype=float)).max() >= config['DUPLICATE_THRESHOLD']:
+            self._count('duplicate')
+            return None
+        self._count('banked')
+        return InterviewQuestion.objects.create(
+            job=job, question_text=text, question_type=question.get('type', ''), embedding=embedding
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Global instance
+question_bank_service = QuestionBankService()
@@ -0,0 +1,200 @@
+import re
+import time
+import logging
+from typing import Any, Dict, List
+import numpy as np
+from django.conf import settings
+from ..models import AIAnalysisReport, BackgroundTask, Job, Resume
+from .ai_analysis_service import ai_analysis_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASCADE_CONFIG = {
+    'VECTOR_TOP_K': 300,      # jobs kept after the cosine-similarity stage
+    'RERANK_TOP_K': 50,       # jobs kept after the local re-ranking stage
+    'LLM_TOP_K': 5,           # jobs eligible for Gemini analysis
+    'LLM_PREFETCH': False,    # queue background analyses for the LLM_TOP_K jobs lacking one
+    'CROSS_ENCODER_MODEL': '',  # e.g. 'cross-encoder/ms-marco-MiniLM-L-6-v2'; empty uses the feature model
+    'RERANK_TEXT_CHARS': 2000,
+}
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#.\-]{1,}")
+
+
+class RankingCascadeService:
+    """
+    Three-stage job ranking so LLM cost does not scale with catalogue size:
+      1. vector:  cosine similarity of the resume embedding against every active job (one matrix product)
+      2. rerank:  local cross-encoder, or a cheap feature model, over the vector top-K
+      3. llm:     existing Gemini reports for the re-ranked top handful; new analyses are only
+                  queued (LLM_PREFETCH) or generated when the user opens a job
+    """
+
+    def __init__(self):
+        self.config = {**DEFAULT_CASCADE_CONFIG, **getattr(settings, 'RANKING_CASCADE', {})}
+        self._cross_encoder = None
+
+    def rank_jobs(self, resume: Resume, limit: int = 10, jobs_queryset=None) -> Dict[str, Any]:
+        """
+        Return {'results': [{'job': Job, 'vector_score', 'rerank_score', 'ai_match_score', 'score', 'stage'}],
+                'timings_ms': {...}, 'counts': {...}} with results sorted best first.
+        ``score`` is on the scale of the candidate's ``stage`` (LLM overall score or re-rank score),
+        so compare positions, not scores, across stages.
+        """
+        timings = {}
+        counts = {}
+        jobs_queryset = jobs_queryset if jobs_queryset is not None else Job.objects.filter(is_active=True)
+
+        started = time.monotonic()
+        candidates = self._vector_stage(resume, jobs_queryset)
+        timings['vector'] = (time.monotonic() - started) * 1000
+        counts['vector'] = len(candidates)
+
+        started = time.monotonic()
+        candidates = self._rerank_stage(resume, candidates)
+        timings['rerank'] = (time.monotonic() - started) * 1000
+        counts['rerank'] = len(candidates)
+
+        started = time.monotonic()
+        self._llm_stage(resume, candidates)
+        timings['llm'] = (time.monotonic() - started) * 1000
+        counts['llm'] = sum(1 for c in candidates if c['ai_match_score'] is not None)
+
+        candidates = self._merge_llm_head(candidates)
+
+        timings = {stage: round(ms, 1) for stage, ms in timings.items()}
+        logger.info(f"Ranking cascade for resume {resume.id}: counts={counts} timings_ms={timings}")
+        return {'results': candidates[:limit], 'timings_ms': timings, 'counts': counts}
+
+    # ---------------- Stage 1: vector ----------------
+
+    def _vector_stage(self, resume: Resume, jobs_queryset) -> List[Dict[str, Any]]:
+        if not resume.embedding:
+            return []
+        rows = [(job_id, emb) for job_id, emb in jobs_queryset.exclude(embedding__isnull=True).values_list('id', 'embedding') if emb]
+        if not rows:
+            return []
+        matrix = np.asarray([emb for _, emb in rows], dtype='float32')
+        query = np.asarray(resume.embedding, dtype='float32')
+        if matrix.shape[1] != query.shape[0]:
+            logger.warning(f"Embedding dimension mismatch for resume {resume.id}; skipping vector stage")
+            return []
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = (matrix @ query) / np.where(norms == 0, 1.0, norms)
+        top_k = min(self.config['VECTOR_TOP_K'], len(rows))
+        top_idx = np.argpartition(-scores, top_k - 1)[:top_k]
+        top_ids = [rows[i][0] for i in top_idx]
+        jobs = Job.objects.filter(id__in=top_ids).select_related('company').prefetch_related('skills').in_bulk()
+        return [
+            {'job': jobs[rows[i][0]], 'vector_score': max(0.0, float(scores[i]) * 100), 'rerank_score': None, 'ai_match_score': None}
+            for i in top_idx if rows[i][0] in jobs
+        ]
+
+    # ---------------- Stage 2: local re-rank ----------------
+
+    def _rerank_stage(self, resume: Resume, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not candidates:
+            return candidates
+        cross_encoder = self._get_cross_encoder()
+        if cross_encoder is not None:
+            self._cross_encoder_scores(cross_encoder, resume, candidates)
+        else:
+            self._feature_scores(resume, candidates)
+        candidates.sort(key=lambda c: c['rerank_score'], reverse=True)
+        return candidates[:self.config['RERANK_TOP_K']]
+
+    def _get_cross_encoder(self):
+        model_name = self.config.get('CROSS_ENCODER_MODEL')
+        if not model_name:
+            return None
+        if self._cross_encoder is None:
+            try:
+                from sentence_transformers import CrossEncoder
+                self._cross_encoder = CrossEncoder(model_name)
+            except Exception as e:
+                logger.warning(f"Cross-encoder '{model_name}' unavailable, using feature re-ranker: {e}")
+                self.config['CROSS_ENCODER_MODEL'] = ''
+                return None
+        return self._cross_encoder
+
+    def _job_text(self, job: Job) -> str:
+        requirements = ' '.join(job.requirements) if isinstance(job.requirements, list) else str(job.requirements or '')
+        return f"{job.title}. {job.description} {requirements}"[:self.config['RERANK_TEXT_CHARS']]
+
+    def _cross_encoder_scores(self, cross_encoder, resume: Resume, candidates: List[Dict[str, Any]]) -> None:
+        resume_text = (resume.parsed_text or '')[:self.config['RERANK_TEXT_CHARS']]
+        raw = cross_encoder.predict([(resume_text, self._job_text(c['job'])) for c in candidates])
+        # Squash logits to 0-100 and blend with the vector score so ties keep a sensible order
+        probs = 100 / (1 + np.exp(-np.asarray(raw, dtype='float32')))
+        for candidate, prob in zip(candidates, probs):
+            candidate['rerank_score'] = round(0.7 * float(prob) + 0.3 * candidate['vector_score'], 2)
+
+    def _feature_scores(self, resume: Resume, candidates: List[Dict[str, Any]]) -> None:
+        """Cheap lexical features: skill coverage, title overlap and career-preference matches."""
+        resume_words = set(_WORD_RE.findall((resume.parsed_text or '').lower()))
+        preferences = getattr(resume.student_profile, 'career_preferences', None) or {}
+        preferred_roles = ' '.join(preferences.get('preferred_roles', [])).lower()
+        preferred_locations = [loc.lower() for loc in preferences.get('locations', [])]
+        preferred_industries = [ind.lower() for ind in preferences.get('industries', [])]
+
+        for candidate in candidates:
+            job = candidate['job']
+            skill_names = [skill.name.lower() for skill in job.skills.all()]
+            if skill_names:
+                skill_coverage = sum(1 for name in skill_names if name in resume_words or name in (resume.parsed_text or '').lower()) / len(skill_names)
+            else:
+                requirement_words = set(_WORD_RE.findall(self._job_text(job).lower()))
+                skill_coverage = len(requirement_words & resume_words) / max(len(requirement_words), 1)
+            title_words = set(_WORD_RE.findall(job.title.lower()))
+            title_overlap = len(title_words & (resume_words | set(_WORD_RE.findall(preferred_roles)))) / max(len(title_words), 1)
+            preference_bonus = 0
+            if job.location and any(loc in job.location.lower() for loc in preferred_locations):
+                preference_bonus += 2.5
+            if job.company.industry and job.company.industry.lower() in preferred_industries:
+                preference_bonus += 2.5
+            candidate['rerank_score'] = round(
+                0.5 * candidate['vector_score'] + 30 * skill_coverage + 15 * title_overlap + preference_bonus, 2
+            )
+
+    # ---------------- Stage 3: LLM ----------------
+
+    def _llm_stage(self, resume: Resume, candidates: List[Dict[str, Any]]) -> None:
+        """Attach existing fresh Gemini scores to the LLM_TOP_K head; never calls the LLM inline."""
+        head = candidates[:self.config['LLM_TOP_K']]
+        if not head:
+            return
+        reports = {
+            report.job_id: report
+            for report in AIAnalysisReport.objects.filter(resume=resume, job__in=[c['job'] for c in head])
+        }
+        for candidate in head:
+            # check_staleness flags reports whose inputs changed since they were generated
+            report = reports.get(candidate['job'].id)
+            fresh = report is not None and not ai_analysis_service.check_staleness(report, resume, candidate['job'])
+            candidate['ai_match_score'] = report.overall_score if fresh else None
+
+        if self.config['LLM_PREFETCH']:
+            missing = [c['job'] for c in head if c['ai_match_score'] is None]
+            if missing:
+                from ..tasks import enqueue_analysis_batch
+                enqueue_analysis_batch(resume, missing, priority=BackgroundTask.Priority.BATCH)
+
+    def _merge_llm_head(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        LLM and re-rank scores are on different scales, so they are never compared: the
+        LLM-scored jobs are ordered among themselves and keep the head of the list, the
+        rest of the LLM_TOP_K head follows in re-rank order, then the re-ranked tail.
+        """
+        head_size = self.config['LLM_TOP_K']
+        head, tail = candidates[:head_size], candidates[head_size:]
+        scored = sorted((c for c in head if c['ai_match_score'] is not None), key=lambda c: c['ai_match_score'], reverse=True)
+        unscored = [c for c in head if c['ai_match_score'] is None]
+        for candidate in scored:
+            candidate['score'], candidate['stage'] = candidate['ai_match_score'], 'llm'
+        for candidate in unscored + tail:
+            candidate['score'], candidate['stage'] = candidate['rerank_score'], 'rerank'
+        return scored + unscored + tail
+
+
+# Global instance
+ranking_cascade_service = RankingCascadeService()
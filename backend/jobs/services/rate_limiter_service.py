@@ -0,0 +1,154 @@
+import time
+import random
+import logging
+import threading
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ..models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+
+_current_priority = contextvars.ContextVar('rate_limit_priority', default=PRIORITY_INTERACTIVE)
+
+
+class RateLimitExceeded(Exception):
+    """The bucket could not supply a token within the caller's maximum wait."""
+
+    def __init__(self, bucket: str, retry_after: float):
+        super().__init__(f"Rate limit for '{bucket}' exceeded; retry after {retry_after:.1f}s")
+        self.bucket = bucket
+        self.retry_after = retry_after
+
+
+class RateLimiterService:
+    """
+    Cross-process token buckets stored in the RateLimitBucket table. Each acquire refills
+    the bucket from elapsed time and takes a token under SELECT ... FOR UPDATE.
+
+    Batch callers may not dip into the last BATCH_RESERVE_FRACTION of a bucket, so
+    interactive requests still find tokens while background work is saturating a quota.
+    Buckets without configuration are not limited.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'RATE_LIMITS', {})
+        self.buckets: Dict[str, Dict[str, float]] = config.get('BUCKETS', {})
+        self.batch_reserve_fraction = config.get('BATCH_RESERVE_FRACTION', 0.3)
+        self.max_wait = {PRIORITY_INTERACTIVE: 15, PRIORITY_BATCH: 300, **config.get('MAX_WAIT_SECONDS', {})}
+        self.poll_seconds = config.get('POLL_SECONDS', 0.25)
+        self._stats = defaultdict(lambda: {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'timeouts': 0})
+        self._lock = threading.Lock()
+
+    # ---------------- Priority context ----------------
+
+    @contextmanager
+    def priority(self, level: str):
+        """Run the enclosed calls at the given priority (interactive or batch)."""
+        token = _current_priority.set(level)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    def current_priority(self) -> str:
+        return _current_priority.get()
+
+    # ---------------- Acquire ----------------
+
+    def acquire(self, bucket: str, cost: float = 1.0, priority: Optional[str] = None, max_wait: Optional[float] = None) -> float:
+        """Block until ``cost`` tokens are taken from ``bucket``; returns seconds waited."""
+        config = self.buckets.get(bucket)
+        if not config:
+            return 0.0
+        priority = priority or self.current_priority()
+        max_wait = self.max_wait.get(priority, 15) if max_wait is None else max_wait
+        capacity = config['CAPACITY']
+        rate = config['REFILL_PER_SECOND']
+        floor = capacity * self.batch_reserve_fraction if priority == PRIORITY_BATCH else 0.0
+
+        started = time.monotonic()
+        while True:
+            wait = self._try_take(bucket, cost, capacity, rate, floor)
+            waited = time.monotonic() - started
+            if wait == 0:
+                self._record(bucket, priority, waited)
+                return waited
+            if waited + wait > max_wait:
+                self._record(bucket, priority, waited, timed_out=True)
+                raise RateLimitExceeded(bucket, wait)
+            # Jitter so waiting processes don't all wake and contend for the row at once
+            time.sleep(min(wait, self.poll_seconds) * random.uniform(0.8, 1.2))
+
+    def _try_take(self, bucket: str, cost: float, capacity: float, rate: float, floor: float) -> float:
+        """Take tokens if available and return 0, else return the estimated seconds until they are."""
+        now = timezone.now()
+        with transaction.atomic():
+            row = RateLimitBucket.objects.select_for_update().filter(name=bucket).first()
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        row = RateLimitBucket.objects.create(name=bucket, tokens=capacity, updated_at=now)
+                except IntegrityError:
+                    row = RateLimitBucket.objects.select_for_update().get(name=bucket)
+            elapsed = max(0.0, (now - row.updated_at).total_seconds())
+            tokens = min(capacity, row.tokens + elapsed * rate)
+            if tokens - cost >= floor:
+                row.tokens = tokens - cost
+                row.updated_at = now
+                row.save(update_fields=['tokens', 'updated_at'])
+                return 0.0
+        return max((cost + floor - tokens) / rate, 0.01)
+
+    def call(self, bucket: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Acquire a token from ``bucket``, then call ``func``; a 429 from the provider drains the bucket."""
+        self.acquire(bucket)
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if self.is_rate_limit_error(e):
+                self.drain(bucket)
+            raise
+
+    @staticmethod
+    def is_rate_limit_error(error: Exception) -> bool:
+        return type(error).__name__ in ('ResourceExhausted', 'TooManyRequests') or 'HTTP 429' in str(error)
+
+    def drain(self, bucket: str) -> None:
+        """Empty a bucket after the provider rejected us, so every process backs off together."""
+        if bucket in self.buckets:
+            RateLimitBucket.objects.filter(name=bucket).update(tokens=0, updated_at=timezone.now())
+            logger.warning(f"Rate limit bucket '{bucket}' drained after a provider 429")
+
+    # ---------------- Metrics ----------------
+
+    def _record(self, bucket: str, priority: str, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            stats = self._stats[f"{bucket}:{priority}"]
+            if timed_out:
+                stats['timeouts'] += 1
+            else:
+                stats['acquired'] += 1
+            if waited > 0.001:
+                stats['waited'] += 1
+                stats['wait_seconds'] += waited
+                stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+        if timed_out:
+            logger.warning(f"Rate limit '{bucket}' [{priority}] gave up after waiting {waited:.2f}s")
+        elif waited > 1:
+            logger.info(f"Rate limit '{bucket}' [{priority}] queued {waited:.2f}s for a token")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+
+# Global instance
+rate_limiter_service = RateLimiterService()
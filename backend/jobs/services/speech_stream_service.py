@@ -0,0 +1,258 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .audio_buffer import AudioBuffer
+from .local_stt_service import local_stt_service
+from .rate_limiter_service import rate_limiter_service
+
+try:
+    from google.cloud import speech
+except ImportError:
+    speech = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STT_STREAMING = {
+    'BACKEND': {'type': 'google'},
+    'QUEUE_MAX_CHUNKS': 512,       # audio frames buffered ahead of the recogniser before feeding waits
+    'FEED_TIMEOUT_SECONDS': 5.0,   # how long a frame waits for room before the utterance is abandoned
+    'FINAL_GRACE_SECONDS': 1.5,    # after "end", wait this long for the recogniser's final result
+}
+
+# on_result(text, is_final): text is the current segment; finals replace that segment's interims
+ResultCallback = Callable[[str, bool], None]
+
+
+class SpeechStreamOverflow(Exception):
+    """The recogniser fell FEED_TIMEOUT_SECONDS behind; the utterance was abandoned."""
+
+
+class BaseSpeechBackend:
+    """A streaming recogniser. recognize() runs in a worker thread and blocks until the audio ends."""
+
+    name = 'base'
+
+    def recognize(self, chunks: Iterator[bytes], on_result: ResultCallback) -> None:
+        raise NotImplementedError
+
+
+class GoogleStreamingBackend(BaseSpeechBackend):
+    """Google Cloud streaming recognition with interim results."""
+
+    name = 'google'
+
+    def __init__(self, encoding: str = 'OGG_OPUS', sample_rate_hertz: int = 48000, language_code: str = 'en-US',
+                 model: str = 'latest_long'):
+        self.encoding = encoding
+        self.sample_rate_hertz = sample_rate_hertz
+        self.language_code = language_code
+        self.model = model
+
+    def recognize(self, chunks: Iterator[bytes], on_result: ResultCallback) -> None:
+        if speech is None:
+            raise RuntimeError('google-cloud-speech is not installed')
+        client = speech.SpeechClient()
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=getattr(speech.RecognitionConfig.AudioEncoding, self.encoding),
+                sample_rate_hertz=self.sample_rate_hertz,
+                language_code=self.language_code,
+                enable_automatic_punctuation=True,
+                model=self.model,
+                use_enhanced=True,
+            ),
+            interim_results=True,
+        )
+        requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in chunks)
+        rate_limiter_service.acquire('google_speech')
+        try:
+            for response in client.streaming_recognize(streaming_config, requests):
+                for result in response.results:
+                    if result.alternatives:
+                        on_result(result.alternatives[0].transcript, result.is_final)
+        except Exception as e:
+            if rate_limiter_service.is_rate_limit_error(e):
+                rate_limiter_service.drain('google_speech')
+            raise
+
+
+class FakeStreamingBackend(BaseSpeechBackend):
+    """
+    Offline stand-in for tests and local development: every audio frame is read as UTF-8
+    text, each frame yields an interim result and the end of audio yields the final one.
+    """
+
+    name = 'fake'
+
+    def __init__(self, delay_ms: float = 0):
+        self.delay = delay_ms / 1000
+
+    def recognize(self, chunks: Iterator[bytes], on_result: ResultCallback) -> None:
+        words: List[str] = []
+        for chunk in chunks:
+            if self.delay:
+                time.sleep(self.delay)
+            words.extend(chunk.decode('utf-8', errors='ignore').split())
+            on_result(' '.join(words), False)
+        if words:
+            on_result(' '.join(words), True)
+
+
+class LocalWhisperBackend(BaseSpeechBackend):
+    """
+    Offline recognition on the local Whisper pool. Whisper isn't a streaming model, so this
+    collects the utterance and returns only the final result once the audio ends.
+    """
+
+    name = 'whisper'
+
+    def recognize(self, chunks: Iterator[bytes], on_result: ResultCallback) -> None:
+        with AudioBuffer() as audio:
+            for chunk in chunks:
+                audio.write(chunk)
+            if audio.size:
+                text = local_stt_service.transcribe(audio)['transcript']
+                if text:
+                    on_result(text, True)
+
+
+STT_BACKEND_TYPES = {
+    'google': GoogleStreamingBackend,
+    'whisper': LocalWhisperBackend,
+    'fake': FakeStreamingBackend,
+}
+
+
+class SpeechStream:
+    """
+    One recognition session. Audio frames are fed from the event loop into a bounded,
+    thread-safe queue that the backend consumes in a worker thread; results travel back
+    to the loop with call_soon_threadsafe and are read with ``async for ... in results()``.
+
+    A full queue holds up feed() (and so the socket) rather than dropping the frame: a
+    missing chunk corrupts the rest of a WEBM/OGG container for the recogniser.
+    """
+
+    _END = object()
+
+    def __init__(self, backend: BaseSpeechBackend, loop: asyncio.AbstractEventLoop, max_chunks: int,
+                 feed_timeout: float = DEFAULT_STT_STREAMING['FEED_TIMEOUT_SECONDS']):
+        self.backend = backend
+        self.loop = loop
+        self.feed_timeout = feed_timeout
+        self._audio: 'queue.Queue[Any]' = queue.Queue(maxsize=max_chunks)
+        self._events: 'asyncio.Queue[Optional[Tuple[str, bool]]]' = asyncio.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'stt-{backend.name}', daemon=True)
+        self.finals: List[str] = []
+        self.interim = ''
+        self.error: Optional[Exception] = None
+        self.ended_at: Optional[float] = None
+
+    @property
+    def transcript(self) -> str:
+        return ' '.join(part for part in [*self.finals, self.interim] if part).strip()
+
+    def start(self) -> 'SpeechStream':
+        self._thread.start()
+        return self
+
+    async def feed(self, chunk: bytes) -> bool:
+        """
+        Queue a frame, waiting up to feed_timeout for room without blocking the loop. If the
+        recogniser is still that far behind, the stream is closed with a SpeechStreamOverflow
+        error and False is returned; later frames are refused rather than fed after a gap.
+        """
+        if self._closed:
+            return False
+        try:
+            self._audio.put_nowait(chunk)
+            return True
+        except queue.Full:
+            pass
+        try:
+            await asyncio.to_thread(self._audio.put, chunk, timeout=self.feed_timeout)
+            return True
+        except queue.Full:
+            logger.warning(f"Streaming STT ({self.backend.name}) fell {self.feed_timeout}s behind; abandoning the utterance")
+            self.error = SpeechStreamOverflow('Audio is arriving faster than it can be transcribed.')
+            self.finish()
+            return False
+
+    def finish(self) -> None:
+        """Signal end of audio; the backend drains what is queued and returns its final result."""
+        if self._closed:
+            return
+        self._closed = True
+        self.ended_at = time.monotonic()
+        try:
+            self._audio.put_nowait(self._END)
+        except queue.Full:
+            pass  # the chunk iterator also stops once the queue drains after close
+
+    def _chunks(self) -> Iterator[bytes]:
+        while True:
+            try:
+                chunk = self._audio.get(timeout=0.2)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            if chunk is self._END:
+                return
+            yield chunk
+
+    def _run(self) -> None:
+        try:
+            self.backend.recognize(self._chunks(), self._on_result)
+        except Exception as e:
+            logger.error(f"Streaming STT ({self.backend.name}) failed: {e}", exc_info=True)
+            self.error = e
+        finally:
+            self.loop.call_soon_threadsafe(self._events.put_nowait, None)
+
+    def _on_result(self, text: str, is_final: bool) -> None:
+        self.loop.call_soon_threadsafe(self._events.put_nowait, (text.strip(), is_final))
+
+    async def results(self) -> AsyncIterator[Tuple[str, bool]]:
+        """Yield (segment text, is_final) until the backend finishes, keeping ``transcript`` current."""
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            text, is_final = event
+            if is_final:
+                self.finals.append(text)
+                self.interim = ''
+            else:
+                self.interim = text
+            yield text, is_final
+
+
+class SpeechStreamService:
+    """Builds streaming recognition sessions on the configured, swappable backend."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_STT_STREAMING, **(config if config is not None else getattr(settings, 'STT_STREAMING', {}))}
+
+    def build_backend(self) -> BaseSpeechBackend:
+        """'type' is an STT_BACKEND_TYPES key or a dotted class path; other keys are constructor arguments."""
+        spec = dict(self.config['BACKEND'])
+        backend_cls = STT_BACKEND_TYPES.get(spec['type'], spec['type'])
+        spec.pop('type')
+        if isinstance(backend_cls, str):
+            backend_cls = import_string(backend_cls)
+        return backend_cls(**spec)
+
+    def open_stream(self, loop: asyncio.AbstractEventLoop) -> SpeechStream:
+        return SpeechStream(self.build_backend(), loop, self.config['QUEUE_MAX_CHUNKS'],
+                            self.config['FEED_TIMEOUT_SECONDS']).start()
+
+
+# Global instance
+speech_stream_service = SpeechStreamService()
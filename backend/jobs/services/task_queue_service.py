@@ -0,0 +1,196 @@
+import os
+import random
+import socket
+import time
+import logging
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import BackgroundTask
+from .rate_limiter_service import PRIORITY_BATCH, PRIORITY_INTERACTIVE, rate_limiter_service
+
+logger = logging.getLogger(__name__)
+
+# task_name -> callable(**payload) returning a JSON-serialisable result
+TASK_HANDLERS: Dict[str, Callable[..., Any]] = {}
+
+
+def register_task(name: str):
+    """Decorator registering a function as the handler for ``name`` tasks."""
+    def decorator(func):
+        TASK_HANDLERS[name] = func
+        return func
+    return decorator
+
+
+class TaskQueueService:
+    """
+    Durable DB-backed task queue. Tasks are claimed in priority order with
+    SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker processes can
+    poll the same table without handing the same task to two of them.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'TASK_QUEUE', {})
+        self.visibility_timeout = config.get('VISIBILITY_TIMEOUT_SECONDS', 300)
+        self.default_max_attempts = config.get('MAX_ATTEMPTS', 5)
+        self.backoff_base = config.get('BACKOFF_BASE_SECONDS', 5)
+        self.backoff_max = config.get('BACKOFF_MAX_SECONDS', 600)
+
+    # ---------------- Producer side ----------------
+
+    def enqueue(self, task_name: str, payload: Optional[Dict[str, Any]] = None, priority: int = BackgroundTask.Priority.NORMAL,
+                dedup_key: Optional[str] = None, max_attempts: Optional[int] = None, requested_by=None) -> BackgroundTask:
+        """
+        Queue a task. If a queued/running task with the same dedup_key exists it is
+        returned instead, with its priority raised if the new request is more urgent.
+        Either way ``requested_by`` is recorded as a requester, so they may poll the task.
+        """
+        if dedup_key:
+            existing = self._active_task(dedup_key)
+            if existing:
+                return self._join(existing, priority, requested_by)
+        try:
+            with transaction.atomic():
+                task = BackgroundTask.objects.create(
+                    task_name=task_name,
+                    payload=payload or {},
+                    priority=priority,
+                    dedup_key=dedup_key,
+                    max_attempts=max_attempts or self.default_max_attempts,
+                    requested_by=requested_by,
+                )
+                if requested_by is not None:
+                    task.requesters.add(requested_by)
+                return task
+        except IntegrityError:
+            # Lost the race against a concurrent enqueue of the same key
+            existing = self._active_task(dedup_key)
+            if existing:
+                return self._join(existing, priority, requested_by)
+            raise
+
+    def _active_task(self, dedup_key: str) -> Optional[BackgroundTask]:
+        return BackgroundTask.objects.filter(
+            dedup_key=dedup_key,
+            status__in=[BackgroundTask.Status.QUEUED, BackgroundTask.Status.RUNNING],
+        ).first()
+
+    def _join(self, task: BackgroundTask, priority: int, requested_by=None) -> BackgroundTask:
+        """Collapse a duplicate request onto ``task``: raise its priority and record the requester."""
+        if priority > task.priority:
+            BackgroundTask.objects.filter(id=task.id, priority__lt=priority).update(priority=priority)
+            task.priority = priority
+        if requested_by is not None:
+            task.requesters.add(requested_by)
+        return task
+
+    def visible_to(self, user):
+        """Tasks ``user`` may poll: those they requested, including ones their request was collapsed onto."""
+        if user.is_staff:
+            return BackgroundTask.objects.all()
+        return BackgroundTask.objects.filter(Q(requested_by=user) | Q(requesters=user)).distinct()
+
+    def get_task(self, task_id) -> Optional[BackgroundTask]:
+        return BackgroundTask.objects.filter(id=task_id).first()
+
+    # ---------------- Worker side ----------------
+
+    def claim(self, worker_id: str) -> Optional[BackgroundTask]:
+        """Claim the highest-priority runnable task, or a running one whose visibility timeout lapsed."""
+        now = timezone.now()
+        with transaction.atomic():
+            task = BackgroundTask.objects.select_for_update(skip_locked=True).filter(
+                Q(status=BackgroundTask.Status.QUEUED, run_after__lte=now) |
+                Q(status=BackgroundTask.Status.RUNNING, locked_until__lt=now)
+            ).order_by('-priority', 'run_after').first()
+            if task is None:
+                return None
+            if task.status == BackgroundTask.Status.RUNNING:
+                logger.warning(f"Task {task.id} ({task.task_name}) exceeded its visibility timeout on {task.locked_by}; reclaiming")
+                if task.attempts >= task.max_attempts:
+                    task.status = BackgroundTask.Status.FAILED
+                    task.last_error = task.last_error or 'Visibility timeout exceeded on final attempt.'
+                    task.finished_at = now
+                    task.locked_until = None
+                    task.save(update_fields=['status', 'last_error', 'finished_at', 'locked_until', 'updated_at'])
+                    return None
+            task.status = BackgroundTask.Status.RUNNING
+            task.attempts += 1
+            task.locked_by = worker_id
+            task.locked_until = now + timedelta(seconds=self.visibility_timeout)
+            task.save(update_fields=['status', 'attempts', 'locked_by', 'locked_until', 'updated_at'])
+        return task
+
+    def run(self, task: BackgroundTask) -> None:
+        handler = TASK_HANDLERS.get(task.task_name)
+        if handler is None:
+            self._mark_failed(task, f"No handler registered for task '{task.task_name}'.", retry=False)
+            return
+        started = time.monotonic()
+        # Someone is waiting on interactive tasks; everything else yields outbound quota to live requests
+        rate_priority = PRIORITY_INTERACTIVE if task.priority >= BackgroundTask.Priority.INTERACTIVE else PRIORITY_BATCH
+        try:
+            with rate_limiter_service.priority(rate_priority):
+                result = handler(**task.payload)
+        except Exception as e:
+            logger.error(f"Task {task.id} ({task.task_name}) attempt {task.attempts} failed: {e}", exc_info=True)
+            self._mark_failed(task, f"{e}\n{traceback.format_exc()}", retry=True)
+            return
+        BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by).update(
+            status=BackgroundTask.Status.SUCCEEDED,
+            result=result,
+            last_error='',
+            locked_until=None,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        logger.info(f"Task {task.id} ({task.task_name}) succeeded in {time.monotonic() - started:.2f}s")
+
+    def _mark_failed(self, task: BackgroundTask, error: str, retry: bool) -> None:
+        now = timezone.now()
+        if retry and task.attempts < task.max_attempts:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (task.attempts - 1)))
+            delay = delay * random.uniform(0.8, 1.2)  # jitter so retries don't stampede
+            BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by).update(
+                status=BackgroundTask.Status.QUEUED,
+                run_after=now + timedelta(seconds=delay),
+                last_error=error,
+                locked_until=None,
+                updated_at=now,
+            )
+            return
+        BackgroundTask.objects.filter(id=task.id, locked_by=task.locked_by).update(
+            status=BackgroundTask.Status.FAILED,
+            last_error=error,
+            locked_until=None,
+            finished_at=now,
+            updated_at=now,
+        )
+
+    def work(self, worker_id: Optional[str] = None, poll_interval: float = 1.0, stop_event=None, burst: bool = False) -> int:
+        """
+        Worker loop: claim and run tasks until stop_event is set.
+        With burst=True, return as soon as the queue is empty. Returns the number of tasks run.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        while not (stop_event and stop_event.is_set()):
+            close_old_connections()
+            task = self.claim(worker_id)
+            if task is None:
+                if burst:
+                    break
+                time.sleep(poll_interval)
+                continue
+            self.run(task)
+            processed += 1
+        return processed
+
+
+# Global instance
+task_queue_service = TaskQueueService()
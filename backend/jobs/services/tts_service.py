@@ -0,0 +1,190 @@
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .rate_limiter_service import rate_limiter_service
+
+try:
+    from google.cloud import texttospeech
+    GOOGLE_TTS_AVAILABLE = True
+except ImportError:
+    texttospeech = None
+    GOOGLE_TTS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOICE = 'en-US-Chirp3-HD-Charon'  # most human-like neural voice: male, informative
+GTTS_VOICE = 'gTTS-fallback'
+# Part of the cache key: changing any of these must not serve audio synthesised with the old values
+AUDIO_CONFIG = {'audio_encoding': 'MP3', 'speaking_rate': 0.9, 'pitch': 0.0, 'volume_gain_db': 0.0}
+MIN_VALID_MP3_BYTES = 2048  # smaller Google output is treated as invalid
+
+
+class TTSUnavailable(Exception):
+    """No text-to-speech backend is installed."""
+
+
+class TTSService:
+    """
+    Text-to-speech with a content-addressed audio cache. The storage path is derived from
+    a hash of (text, voice, audio config), so identical prompts are synthesised once and
+    every later request gets the stored file's URL. An in-process LRU of known paths skips
+    the storage existence check on hot prompts. The voice list is cached with a TTL.
+    """
+
+    def __init__(self):
+        config = getattr(settings, 'TTS_CACHE', {})
+        self.enabled = config.get('ENABLED', True)
+        self.prefix = config.get('STORAGE_PREFIX', 'tts_cache')
+        self.memory_entries = config.get('MEMORY_ENTRIES', 2048)
+        self.voices_ttl = config.get('VOICES_TTL_SECONDS', 24 * 3600)
+        self._known: 'OrderedDict[str, str]' = OrderedDict()
+        self._voices: Optional[List[Dict[str, Any]]] = None
+        self._voices_fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    @staticmethod
+    def google_available() -> bool:
+        return bool(GOOGLE_TTS_AVAILABLE and getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', ''))
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join((text or '').split())
+
+    def cache_path(self, text: str, voice: str) -> str:
+        config = ','.join(f"{key}={value}" for key, value in sorted(AUDIO_CONFIG.items()))
+        digest = hashlib.sha256(f"{voice}\n{config}\n{self.normalize(text)}".encode('utf-8')).hexdigest()
+        return f"{self.prefix}/{digest[:2]}/{digest}.mp3"
+
+    @staticmethod
+    def _url(path: str) -> str:
+        return os.path.join(settings.MEDIA_URL, path)
+
+    # ---------------- Synthesis ----------------
+
+    def synthesize(self, text: str, voice: Optional[str] = None) -> Dict[str, Any]:
+        """Return {'audio_url', 'voice_used', 'cached'} for ``text``, synthesising only on a cache miss."""
+        text = self.normalize(text)
+        voice = voice or DEFAULT_VOICE
+        if self.google_available():
+            cached = self._cached(text, voice)
+            if cached:
+                return {'audio_url': cached, 'voice_used': voice, 'cached': True}
+            audio = self._google_synthesize(text, voice)
+            if len(audio) >= MIN_VALID_MP3_BYTES:
+                return {'audio_url': self._store(text, voice, audio), 'voice_used': voice, 'cached': False}
+            logger.error(f"Google TTS generated invalid/empty mp3 (size: {len(audio)} bytes). Falling back to gTTS.")
+
+        cached = self._cached(text, GTTS_VOICE)
+        if cached:
+            return {'audio_url': cached, 'voice_used': GTTS_VOICE, 'cached': True}
+        audio = self._gtts_synthesize(text)
+        return {'audio_url': self._store(text, GTTS_VOICE, audio), 'voice_used': GTTS_VOICE, 'cached': False}
+
+    def _cached(self, text: str, voice: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self.cache_path(text, voice)
+        with self._lock:
+            if path in self._known:
+                self._known.move_to_end(path)
+                self._stats['memory_hits'] += 1
+                return self._known[path]
+        if not default_storage.exists(path):
+            self._count('misses')
+            return None
+        self._count('storage_hits')
+        return self._remember(path)
+
+    def _store(self, text: str, voice: str, audio: bytes) -> str:
+        if not self.enabled:
+            # Uncached: keep the old one-file-per-request behaviour
+            path = default_storage.save(f"user_uploads/interview_audio/tts_{hashlib.sha1(audio).hexdigest()}.mp3", ContentFile(audio))
+            return self._url(path)
+        path = self.cache_path(text, voice)
+        saved = default_storage.save(path, ContentFile(audio))
+        if saved != path:
+            # A concurrent request stored the same prompt first; keep the canonical file only
+            default_storage.delete(saved)
+        return self._remember(path)
+
+    def _remember(self, path: str) -> str:
+        url = self._url(path)
+        with self._lock:
+            self._known[path] = url
+            self._known.move_to_end(path)
+            while len(self._known) > self.memory_entries:
+                self._known.popitem(last=False)
+        return url
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _google_synthesize(self, text: str, voice: str) -> bytes:
+        client = texttospeech.TextToSpeechClient()
+        response = rate_limiter_service.call(
+            'google_tts',
+            client.synthesize_speech,
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(
+                language_code="en-US", name=voice, ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
+            ),
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
+                speaking_rate=AUDIO_CONFIG['speaking_rate'],
+                pitch=AUDIO_CONFIG['pitch'],
+                volume_gain_db=AUDIO_CONFIG['volume_gain_db'],
+            ),
+        )
+        return response.audio_content
+
+    @staticmethod
+    def _gtts_synthesize(text: str) -> bytes:
+        try:
+            from gtts import gTTS
+        except ImportError:
+            raise TTSUnavailable('gTTS not available. Please install gtts library.')
+        with tempfile.NamedTemporaryFile(suffix='.mp3') as temp_file:
+            gTTS(text=text, lang='en', slow=False).save(temp_file.name)
+            with open(temp_file.name, 'rb') as f:
+                return f.read()
+
+    # ---------------- Voices ----------------
+
+    def list_voices(self) -> List[Dict[str, Any]]:
+        """The en-US Google voices, fetched at most once per VOICES_TTL_SECONDS per process."""
+        with self._lock:
+            if self._voices is not None and time.monotonic() - self._voices_fetched_at < self.voices_ttl:
+                return self._voices
+        client = texttospeech.TextToSpeechClient()
+        response = rate_limiter_service.call('google_tts', client.list_voices, language_code="en-US")
+        voices = [
+            {
+                'name': voice.name,
+                'language_code': voice.language_codes[0],
+                'ssml_gender': voice.ssml_gender.name,
+                'natural_sample_rate_hertz': voice.natural_sample_rate_hertz,
+            }
+            for voice in response.voices
+        ]
+        with self._lock:
+            self._voices = voices
+            self._voices_fetched_at = time.monotonic()
+        return voices
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Global instance
+tts_service = TTSService()
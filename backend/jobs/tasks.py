@@ -0,0 +1,105 @@
+"""
+Background task handlers executed by the run_workers management command.
+Enqueue with task_queue_service.enqueue(<task name>, payload).
+"""
+import hashlib
+import logging
+from .models import AIAnalysisReport, AIInterview, BackgroundTask, Job, Resume
+from .services.task_queue_service import register_task, task_queue_service
+
+logger = logging.getLogger(__name__)
+
+GENERATE_AI_ANALYSIS_REPORT = 'generate_ai_analysis_report'
+GENERATE_AI_ANALYSIS_BATCH = 'generate_ai_analysis_batch'
+GENERATE_AI_INTERVIEW_REPORT = 'generate_ai_interview_report'
+
+
+def analysis_dedup_key(resume_id, job_id, audience=None, force_refresh=False) -> str:
+    # A forced refresh must not collapse onto a plain generation that may serve the cached report
+    return f"analysis:{resume_id}:{job_id}:{audience or 'all'}{':refresh' if force_refresh else ''}"
+
+
+@register_task(GENERATE_AI_ANALYSIS_REPORT)
+def generate_ai_analysis_report_task(resume_id, job_id, force_refresh=False, audience=None):
+    """
+    Generate (or regenerate when force_refresh) the AI analysis report for a resume/job pair.
+    ``audience`` limits generation to the sections that audience sees (None: full report).
+    """
+    from .services.ai_analysis_service import ai_analysis_service  # Local import: configures Gemini on load
+
+    try:
+        resume = Resume.objects.get(id=resume_id)
+        job = Job.objects.get(id=job_id)
+    except (Resume.DoesNotExist, Job.DoesNotExist):
+        logger.warning(f"Skipping analysis task: resume {resume_id} or job {job_id} no longer exists")
+        return {'skipped': True}
+
+    if force_refresh:
+        AIAnalysisReport.objects.filter(resume=resume, job=job).update(is_stale=True)
+    # If another process holds the generation lock this raises AnalysisInProgress,
+    # which the queue treats like any failure: back off and re-check later.
+    # A forced refresh must reach the model: cached responses for the same prompt would replay the old text
+    report = ai_analysis_service.get_or_create_analysis(resume, job, audience=audience, use_cache=not force_refresh)
+    return {'report_id': str(report.id), 'overall_score': report.overall_score}
+
+
+@register_task(GENERATE_AI_ANALYSIS_BATCH)
+def generate_ai_analysis_batch_task(resume_id, job_ids):
+    """Generate reports for one resume against several jobs using the shared-context batch prompt."""
+    from .services.ai_analysis_service import ai_analysis_service
+
+    try:
+        resume = Resume.objects.get(id=resume_id)
+    except Resume.DoesNotExist:
+        logger.warning(f"Skipping batch analysis task: resume {resume_id} no longer exists")
+        return {'skipped': True}
+    jobs = list(Job.objects.filter(id__in=job_ids).select_related('company'))
+    reports = ai_analysis_service.analyze_jobs(resume, jobs)
+    return {'reports': {job_id: str(report.id) for job_id, report in reports.items()}}
+
+
+@register_task(GENERATE_AI_INTERVIEW_REPORT)
+def generate_ai_interview_report_task(interview_id):
+    """Generate the employer-facing report for a completed AI interview; a no-op if it already exists."""
+    from .services.interview_report_service import interview_report_service
+
+    if not AIInterview.objects.filter(id=interview_id).exists():
+        logger.warning(f"Skipping interview report task: interview {interview_id} no longer exists")
+        return {'skipped': True}
+    # If another process holds the report lease this raises InterviewReportInProgress; the queue retries later
+    report = interview_report_service.get_or_create_report(interview_id)
+    return {'report_id': str(report.id), 'overall_score': report.overall_score}
+
+
+def enqueue_analysis_report(resume, job, priority=None, force_refresh=False, requested_by=None, audience=None):
+    """Queue report generation for a resume/job pair, collapsing duplicates onto the active task."""
+    return task_queue_service.enqueue(
+        GENERATE_AI_ANALYSIS_REPORT,
+        {'resume_id': str(resume.id), 'job_id': str(job.id), 'force_refresh': force_refresh, 'audience': audience},
+        priority=priority if priority is not None else BackgroundTask.Priority.NORMAL,
+        dedup_key=analysis_dedup_key(resume.id, job.id, audience, force_refresh),
+        requested_by=requested_by,
+    )
+
+
+def enqueue_analysis_batch(resume, jobs, priority=None, requested_by=None):
+    """Queue one batched generation task for a resume against several jobs."""
+    job_ids = sorted(str(job.id) for job in jobs)
+    return task_queue_service.enqueue(
+        GENERATE_AI_ANALYSIS_BATCH,
+        {'resume_id': str(resume.id), 'job_ids': job_ids},
+        priority=priority if priority is not None else BackgroundTask.Priority.BATCH,
+        dedup_key=f"analysis-batch:{resume.id}:{hashlib.sha1(','.join(job_ids).encode()).hexdigest()}",
+        requested_by=requested_by,
+    )
+
+
+def enqueue_interview_report(interview, priority=None, requested_by=None):
+    """Queue report generation for a completed interview; repeat calls return the active task."""
+    return task_queue_service.enqueue(
+        GENERATE_AI_INTERVIEW_REPORT,
+        {'interview_id': str(interview.id)},
+        priority=priority if priority is not None else BackgroundTask.Priority.NORMAL,
+        dedup_key=f"interview-report:{interview.id}",
+        requested_by=requested_by,
+    )
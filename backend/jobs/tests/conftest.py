@@ -0,0 +1,38 @@
+import uuid
+import pytest
+from accounts.models import Company, Resume, StudentProfile, User
+from jobs.models import Job
+
+
+@pytest.fixture
+def student(db):
+    user = User.objects.create_user(email=f'{uuid.uuid4().hex}@example.com', password='password')
+    StudentProfile.objects.create(user=user, career_preferences={'industries': ['Tech']})
+    return user
+
+
+@pytest.fixture
+def resume(student):
+    return Resume.objects.create(
+        student_profile=student.student_profile,
+        file_url='https://example.com/resume.pdf',
+        parsed_text='SKILLS\nPython, Django\nEXPERIENCE\nBackend developer',
+        embedding=[0.1, 0.2, 0.3],
+        is_primary=True,
+    )
+
+
+@pytest.fixture
+def company(db):
+    return Company.objects.create(name=f'Company {uuid.uuid4().hex[:8]}', industry='Tech')
+
+
+@pytest.fixture
+def job(company):
+    return Job.objects.create(
+        company=company,
+        title='Backend Developer',
+        description='Build APIs with Django',
+        requirements=['Python'],
+        responsibilities=['APIs'],
+    )
@@ -0,0 +1,50 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from jobs.models import AIAnalysisReport, AnalysisGenerationLock
+from jobs.services.analysis_lock_service import AnalysisInProgress, AnalysisLockService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def locks():
+    service = AnalysisLockService()
+    service.poll_interval = 0.01
+    return service
+
+
+def test_first_caller_leads_and_second_follows(locks, resume, job):
+    lock, is_leader = locks.acquire(resume, job, 'v1')
+    assert is_leader
+    follower_lock, follower_leads = locks.acquire(resume, job, 'v1')
+    assert not follower_leads and follower_lock.id == lock.id
+    with pytest.raises(AnalysisInProgress):
+        locks.wait_for_leader(follower_lock, wait_timeout=0.05)
+
+    report = AIAnalysisReport.objects.create(resume=resume, job=job, overall_score=70, report_data={'shared': {}})
+    assert locks.wait_for_leader(follower_lock, wait_timeout=0.05, sections=['shared']) == report
+    locks.release(lock)
+    assert not AnalysisGenerationLock.objects.exists()
+
+
+def test_expired_lease_is_taken_over(locks, resume, job, monkeypatch):
+    lock, _ = locks.acquire(resume, job, 'v1')
+    AnalysisGenerationLock.objects.filter(id=lock.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+    monkeypatch.setattr(AnalysisLockService, '_owner', staticmethod(lambda: 'other-host:1:1'))
+    taken, is_leader = locks.acquire(resume, job, 'v1')
+    assert is_leader and taken.id == lock.id
+    # The old holder can neither renew nor release the new holder's lease
+    assert not locks.renew(lock)
+    locks.release(lock)
+    assert AnalysisGenerationLock.objects.filter(id=lock.id).exists()
+
+
+def test_renew_extends_the_lease(locks, resume, job):
+    lock, _ = locks.acquire(resume, job, 'v1')
+    AnalysisGenerationLock.objects.filter(id=lock.id).update(expires_at=timezone.now() + timedelta(seconds=1))
+    assert locks.renew(lock)
+    lock.refresh_from_db()
+    assert lock.expires_at > timezone.now() + timedelta(seconds=locks.lease_seconds - 5)
+    _, is_leader = locks.acquire(resume, job, 'v1')
+    assert not is_leader
@@ -0,0 +1,17 @@
+from jobs.services.ai_interview_service import answer_prefix_match, answer_similarity
+
+PARTIAL = 'I built a REST API in Django for our payments team'
+
+
+def test_an_answer_that_carries_on_still_matches_its_partial():
+    final = PARTIAL + ' and later scaled it to ten thousand requests per second with caching and async workers'
+    assert answer_prefix_match(PARTIAL, final) == 1.0
+    # The whole-answer ratio penalises the extra words; it only decides when to re-draft
+    assert answer_similarity(PARTIAL, final) < 0.75
+
+
+def test_revised_or_restarted_answers_do_not_match():
+    assert answer_prefix_match(PARTIAL, PARTIAL.replace('REST', 'restful')) > 0.75
+    assert answer_prefix_match(PARTIAL, 'Actually let me talk about a different project I wrote in Go') < 0.25
+    assert answer_prefix_match(PARTIAL, 'I built a REST API') < 0.75
+    assert answer_prefix_match('', PARTIAL) == 0.0
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+from django.http import StreamingHttpResponse
+from jobs.renderers import format_sse, iterate_in_thread
+
+
+def test_events_reach_the_client_before_the_stream_ends():
+    first_event_sent = threading.Event()
+    closed = threading.Event()
+
+    def events():
+        try:
+            yield format_sse('section', {'name': 'shared'})
+            # Blocks the generator until the first event has been handed to the server
+            yield format_sse('delta', {'streamed': first_event_sent.wait(5)})
+            yield format_sse('report', {})
+        finally:
+            closed.set()
+
+    async def serve():
+        # What Django's ASGIHandler does with a streaming response
+        response = StreamingHttpResponse(iterate_in_thread(events()), content_type='text/event-stream')
+        chunks = []
+        async for chunk in response:
+            chunks.append(chunk.decode())
+            first_event_sent.set()
+            if len(chunks) == 2:
+                break  # client disconnects
+        await response.streaming_content.aclose()
+        return chunks
+
+    chunks = asyncio.run(serve())
+    assert chunks[0].startswith('event: section')
+    assert '"streamed": true' in chunks[1]
+    assert closed.is_set()
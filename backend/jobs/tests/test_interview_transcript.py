@@ -0,0 +1,108 @@
+import importlib
+import threading
+import pytest
+from django.db import connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.test import override_settings
+from jobs.models import AIInterview, Application, InterviewUtterance
+from jobs.services.ai_interview_service import interview_service
+
+migration_0019 = importlib.import_module('jobs.migrations.0019_interview_utterance_transcript')
+
+QUESTIONS = [
+    {'question_text': 'Tell me about a Django project.', 'question_type': 'experience'},
+    {'question_text': 'How do you test concurrency?'},
+]
+ANSWERS = [
+    {'text': 'I built a job board.', 'audio_url': 'https://example.com/a1.webm', 'timestamp': '2026-01-01T10:00:00Z'},
+]
+
+
+@pytest.fixture
+def application(student, resume, job):
+    return Application.objects.create(job=job, applicant=student, resume=resume)
+
+
+@pytest.fixture
+def interview(application):
+    return AIInterview.objects.create(application=application, status=AIInterview.Status.IN_PROGRESS)
+
+
+def test_utterances_are_numbered_in_order(interview):
+    interview_service.record_question(interview, QUESTIONS[0])
+    interview_service.record_answer(interview, ANSWERS[0])
+    interview_service.record_question(interview, QUESTIONS[1])
+
+    utterances = list(interview.utterances.all())
+    assert [(u.sequence, u.speaker) for u in utterances] == [(1, 'AI'), (2, 'CANDIDATE'), (3, 'AI')]
+    assert utterances[1].audio_clip_url == ANSWERS[0]['audio_url']
+    assert utterances[1].metadata == {'timestamp': ANSWERS[0]['timestamp']}
+    assert interview.questions_and_answers() == (QUESTIONS, ANSWERS)
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='needs row locks (SELECT ... FOR UPDATE)')
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_appends_get_distinct_sequences(interview):
+    errors = []
+
+    def append(n):
+        try:
+            interview_service.append_utterance(interview, InterviewUtterance.Speaker.CANDIDATE, f'turn {n}')
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=append, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(interview.utterances.values_list('sequence', flat=True)) == list(range(1, 9))
+
+
+@pytest.fixture
+def historical_apps(transactional_db):
+    """jobs models as of migration 0019, on scratch tables so they don't clash with the current schema."""
+    with override_settings(MIGRATION_MODULES={}):
+        state = MigrationLoader(None, ignore_no_migrations=True).project_state(
+            ('jobs', '0019_interview_utterance_transcript'))
+    state.models['jobs', 'aiinterview'].options['db_table'] = 'test_0019_aiinterview'
+    state.models['jobs', 'interviewutterance'].options['db_table'] = 'test_0019_interviewutterance'
+    apps = state.apps
+    models = [apps.get_model('jobs', 'AIInterview'), apps.get_model('jobs', 'InterviewUtterance')]
+    with connection.schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+    yield apps
+    with connection.schema_editor() as editor:
+        for model in reversed(models):
+            editor.delete_model(model)
+
+
+def test_0019_backfills_utterances_and_restores_json(historical_apps, application):
+    OldInterview = historical_apps.get_model('jobs', 'AIInterview')
+    OldUtterance = historical_apps.get_model('jobs', 'InterviewUtterance')
+    interview = OldInterview.objects.create(application_id=application.id, questions=QUESTIONS, answers=ANSWERS)
+
+    migration_0019.backfill_utterances(historical_apps, None)
+    utterances = list(OldUtterance.objects.filter(interview_id=interview.id).order_by('sequence'))
+    assert [(u.sequence, u.speaker, u.text) for u in utterances] == [
+        (1, 'AI', QUESTIONS[0]['question_text']),
+        (2, 'CANDIDATE', ANSWERS[0]['text']),
+        (3, 'AI', QUESTIONS[1]['question_text']),
+    ]
+    assert utterances[0].metadata == {'question_type': 'experience'}
+    assert utterances[1].audio_clip_url == ANSWERS[0]['audio_url']
+
+    # Re-running skips interviews that already have utterances
+    migration_0019.backfill_utterances(historical_apps, None)
+    assert OldUtterance.objects.filter(interview_id=interview.id).count() == 3
+
+    OldInterview.objects.filter(id=interview.id).update(questions=[], answers=[])
+    migration_0019.restore_json(historical_apps, None)
+    interview.refresh_from_db()
+    assert interview.questions == QUESTIONS
+    assert interview.answers == ANSWERS
@@ -0,0 +1,50 @@
+import pytest
+from jobs.models import LLMResponseCache
+from jobs.services.llm_gateway_service import LLMGatewayService
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeModel:
+    model_name = 'fake-model'
+
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return type('Response', (), {'text': self.texts.pop(0), 'usage_metadata': None})()
+
+
+def is_json_object(text):
+    return text.startswith('{') and text.endswith('}')
+
+
+def test_cache_key_ignores_whitespace_but_not_model_or_config():
+    key = LLMGatewayService.make_key('m', 'Score  this\n resume')
+    assert key == LLMGatewayService.make_key('m', 'Score this resume ')
+    assert key != LLMGatewayService.make_key('other', 'Score this resume')
+    assert key != LLMGatewayService.make_key('m', 'Score this resume', {'temperature': 0.2})
+
+
+def test_only_validated_responses_are_replayed():
+    gateway = LLMGatewayService()
+    model = FakeModel('{"truncated": ', '{"ok": true}', 'unused')
+    assert gateway.generate_content(model, 'prompt', validator=is_json_object).text == '{"truncated": '
+    assert not LLMResponseCache.objects.exists()
+
+    assert gateway.generate_content(model, 'prompt', validator=is_json_object).text == '{"ok": true}'
+    gateway.clear_memory()
+    replay = gateway.generate_content(model, 'prompt', validator=is_json_object)
+    assert replay.cached and replay.text == '{"ok": true}' and model.calls == 2
+
+
+def test_forced_refresh_skips_the_lookup_and_replaces_the_entry():
+    gateway = LLMGatewayService()
+    model = FakeModel('{"v": 1}', '{"v": 2}')
+    gateway.generate_content(model, 'prompt', validator=is_json_object)
+    fresh = gateway.generate_content(model, 'prompt', validator=is_json_object, use_cache=False)
+    assert not getattr(fresh, 'cached', False) and fresh.text == '{"v": 2}'
+    assert gateway.generate_content(model, 'prompt', validator=is_json_object).text == '{"v": 2}'
+    assert model.calls == 2
@@ -0,0 +1,55 @@
+import json
+import pytest
+from jobs.services.llm_json import IncrementalJSONSectionParser, matches_schema, repair_loads
+
+REPORT = {
+    'shared': {'skills_score': 80, 'summary': 'Strong {Django} match, "REST" APIs'},
+    'note': 'scalar values are not sections',
+    'student_view': {'career_insights': [{'title': 'Backend', 'tags': ['a', 'b]']}]},
+}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Here you go:\n```json\n{"a": 1}\n```\nHope this helps', {'a': 1}),
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {'a': [1, 2], 'b': {'c': 3}}),
+    ('{"ok": True, "missing": None, "bad": False}', {'ok': True, 'missing': None, 'bad': False}),
+    ('{"text": "line one\nline two"}', {'text': 'line one\nline two'}),
+    ('{"a": 1, "b": {"c": "trunc', {'a': 1, 'b': {'c': 'trunc'}}),
+    ('{"a": 1, "b": [1, 2', {'a': 1, 'b': [1, 2]}),
+    ('{"a": 1, "b":', {'a': 1}),
+    ('{"a": {"b": 1]}', {'a': {'b': 1}}),
+])
+def test_repair_loads(text, expected):
+    assert repair_loads(text) == expected
+
+
+def test_repair_loads_rejects_output_without_json():
+    with pytest.raises(ValueError):
+        repair_loads('Sorry, I cannot help with that.')
+
+
+def test_cache_validator_only_accepts_well_formed_output():
+    schema = {'shared': ('skills_score',)}
+    assert matches_schema('```json\n{"shared": {"skills_score": 80}}\n```', schema)
+    # Repairable, but possibly truncated: good enough for the live parse, not for the cache
+    assert not matches_schema('{"shared": {"skills_score": 80}', schema)
+    assert not matches_schema('{"shared": {"skills_score": 80,},}', schema)
+    assert not matches_schema('{"shared": {"summary": "no scores"}}', schema)
+
+
+def test_incremental_parser_emits_sections_regardless_of_chunking():
+    text = '```json\n' + json.dumps(REPORT, indent=2) + '\n```'
+    for size in (1, 2, 3, 7, 50, len(text)):
+        parser = IncrementalJSONSectionParser()
+        emitted = []
+        for start in range(0, len(text), size):
+            emitted.extend(parser.feed(text[start:start + size]))
+        assert emitted == [('shared', REPORT['shared']), ('student_view', REPORT['student_view'])], size
+        assert parser.text == text
+
+
+def test_incremental_parser_emits_a_section_as_soon_as_it_closes():
+    parser = IncrementalJSONSectionParser()
+    assert parser.feed('{"shared": {"skills_score": 8') == []
+    assert parser.feed('0}, "student_view": {"career_') == [('shared', {'skills_score': 80})]
+    assert parser.feed('insights": []}}') == [('student_view', {'career_insights': []})]
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from jobs.services.llm_router_service import BaseLLMProvider, LLMProviderError, LLMResponse, LLMRouterService, OpenAICompatibleProvider
+from jobs.services.rate_limiter_service import PRIORITY_BATCH, rate_limiter_service
+
+ROUTING = {
+    'POLICY': 'ordered',
+    'HEDGE_ENABLED': False,
+    'HEDGE_AFTER_MS': 0,
+    'MAX_PARALLEL': 2,
+    'FAILURE_THRESHOLD': 2,
+    'RESET_TIMEOUT_SECONDS': 60,
+    'EWMA_ALPHA': 0.5,
+    'PROVIDERS': [],
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions; behaviour is chosen by the model name."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        model = body['model']
+        if model == 'broken':
+            self.send_response(500)
+            self.end_headers()
+            return
+        if model == 'slow':
+            time.sleep(1.0)
+        payload = {
+            'choices': [{'message': {'role': 'assistant', 'content': json.dumps({'model': model})}}],
+            'usage': {'prompt_tokens': 7, 'completion_tokens': 3},
+        }
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def stub_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+def make_router(stub_url, *models, **config):
+    providers = [OpenAICompatibleProvider(name=model, model=model, api_base=stub_url, timeout=5) for model in models]
+    return LLMRouterService(config={**ROUTING, **config}, providers=providers)
+
+
+def test_routes_to_first_provider_and_tracks_usage(stub_url):
+    router = make_router(stub_url, 'fast', 'other')
+    response = router.generate_content('hello')
+    assert json.loads(response.text) == {'model': 'fast'}
+    assert response.usage_metadata.prompt_token_count == 7
+    assert router.health()['fast']['latency_ewma_ms'] is not None
+
+
+def test_fails_over_and_opens_circuit(stub_url):
+    router = make_router(stub_url, 'broken', 'fast')
+    for _ in range(2):
+        assert json.loads(router.generate_content('hello').text) == {'model': 'fast'}
+    assert router.health()['broken']['circuit'] == 'open'
+    # With the circuit open the broken provider is skipped entirely
+    assert [p.name for p in router.ordered_providers()] == ['fast']
+
+
+def test_all_providers_failing_raises(stub_url):
+    router = make_router(stub_url, 'broken')
+    with pytest.raises(LLMProviderError):
+        router.generate_content('hello')
+
+
+def hedging_router(stub_url, **config):
+    router = make_router(stub_url, 'slow', 'fast', HEDGE_ENABLED=True, HEDGE_AFTER_MS=100, HEDGE_MIN_SAMPLES=5, **config)
+    router.latencies['slow'].extend([0.05] * 50)
+    return router
+
+
+def test_hedged_request_returns_faster_provider(stub_url):
+    router = hedging_router(stub_url)
+    started = time.monotonic()
+    response = router.generate_content('hello')
+    assert json.loads(response.text) == {'model': 'fast'}
+    assert time.monotonic() - started < 0.9
+
+
+def test_no_hedge_until_the_latency_percentile_is_known(stub_url):
+    router = make_router(stub_url, 'slow', 'fast', HEDGE_ENABLED=True, HEDGE_AFTER_MS=100, HEDGE_MIN_SAMPLES=5)
+    assert router._hedge_delay(router.providers[0]) is None
+    router.latencies['slow'].extend([0.05, 0.05, 0.05, 0.05, 2.0])
+    # The p95 of recent latencies, not the floor, decides when a request counts as slow
+    assert router._hedge_delay(router.providers[0]) == 2.0
+
+
+def test_hedges_are_limited_by_the_budget(stub_url):
+    router = hedging_router(stub_url, HEDGE_BUDGET_BURST=1, HEDGE_BUDGET_FRACTION=0)
+    assert json.loads(router.generate_content('hello').text) == {'model': 'fast'}
+    # Budget spent: the slow provider is awaited instead of duplicated
+    assert json.loads(router.generate_content('hello').text) == {'model': 'slow'}
+
+
+def test_latency_policy_prefers_lower_ewma(stub_url):
+    router = make_router(stub_url, 'slow', 'fast', POLICY='latency')
+    router.latency_ewma.update({'slow': 1.0, 'fast': 0.05})
+    assert [p.name for p in router.ordered_providers()] == ['fast', 'slow']
+
+
+class PriorityProvider(BaseLLMProvider):
+    """Answers with the rate-limit priority in effect on the thread that ran the call."""
+
+    def generate(self, prompt, generation_config=None, stream=False):
+        return LLMResponse(rate_limiter_service.current_priority(), self.name)
+
+
+def test_pool_calls_keep_the_callers_priority():
+    router = LLMRouterService(config=ROUTING, providers=[PriorityProvider('a', 'a'), PriorityProvider('b', 'b')])
+    with rate_limiter_service.priority(PRIORITY_BATCH):
+        assert router.generate_content('hello').text == PRIORITY_BATCH
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from jobs.services import local_stt_service as local_stt_module
+from jobs.services import local_stt_worker
+from jobs.services.local_stt_service import LocalSTTBusy, LocalSTTService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    batches = []
+
+    def transcribe_clips(clips):
+        batches.append(len(clips))
+        time.sleep(0.05)
+        return [f'{len(clip) // 16000}s' for clip in clips], 0.05
+
+    monkeypatch.setattr(local_stt_module, 'faster_whisper', object())
+    monkeypatch.setattr(local_stt_worker, 'transcribe_clips', transcribe_clips)
+    service = LocalSTTService(config={'MAX_QUEUE': 6, 'BATCH_WINDOW_MS': 30, 'MAX_BATCH_SIZE': 4})
+    pool = ThreadPoolExecutor(max_workers=2)
+    service._get_pool = lambda: pool
+    service.batches = batches
+    yield service
+    pool.shutdown()
+
+
+def _clip(seconds):
+    return np.zeros(16000 * seconds, dtype=np.float32)
+
+
+def test_concurrent_short_clips_share_batches(service):
+    futures = [service.submit(_clip(i + 1)) for i in range(5)]
+    results = [future.result(timeout=5) for future in futures]
+    assert [r['transcript'] for r in results] == ['1s', '2s', '3s', '4s', '5s']
+    assert service.batches == [4, 1]
+    assert service.submit(_clip(45)).result(timeout=5)['batch_size'] == 1
+    stats = service.stats()
+    assert stats['completed'] == 6 and stats['batches'] == 3
+    assert stats['rtf_mean'] > 0
+
+
+def test_submit_is_refused_when_queue_is_full(service):
+    futures = [service.submit(_clip(1)) for _ in range(6)]
+    with pytest.raises(LocalSTTBusy):
+        service.submit(_clip(1))
+    for future in futures:
+        future.result(timeout=5)
+    assert service.submit(_clip(1)).result(timeout=5)['transcript'] == '1s'
@@ -0,0 +1,55 @@
+import random
+import pytest
+from jobs.models import AIAnalysisReport
+from jobs.services.ai_analysis_service import ai_analysis_service
+
+pytestmark = pytest.mark.django_db
+
+
+def test_sql_rescore_matches_python_overall_score(resume, job, company):
+    rng = random.Random(7)
+    jobs, shared_by_job = [job], {}
+    for i in range(40):
+        if i:
+            jobs.append(type(job).objects.create(company=company, title=f'Role {i}', description='d', requirements=[], responsibilities=[]))
+        shared_by_job[jobs[i].id] = {
+            'skills_score': rng.randint(0, 100),
+            'experience_score': rng.randint(0, 100),
+            'culture_fit_score': rng.randint(0, 100),
+            'growth_potential_score': rng.randint(0, 100),
+            'preferences_bonus': rng.randint(0, 5),
+        }
+        AIAnalysisReport.objects.create(resume=resume, job=jobs[i], overall_score=0,
+                                        report_data={'shared': shared_by_job[jobs[i].id], 'student_view': {}})
+
+    for weights in ({'skills': 3, 'experience': 1, 'culture_fit': 1, 'growth_potential': 1},
+                    {'skills': 0.25, 'experience': 0.25, 'culture_fit': 0.25, 'growth_potential': 0.25}):
+        for current in jobs:
+            current.matching_weights = weights
+            current.save(update_fields=['matching_weights'])
+            assert ai_analysis_service.rescore_reports(current) == 1
+            report = AIAnalysisReport.objects.get(job=current)
+            normalised = ai_analysis_service._get_employer_weights(current)
+            expected = ai_analysis_service._calculate_overall_score(shared_by_job[current.id], normalised)
+            assert report.overall_score == expected
+            assert report.report_data['shared']['overall_score'] == expected
+            assert report.report_data['employer_weightage'] == pytest.approx(normalised)
+            assert report.report_data['student_view'] == {}
+
+
+@pytest.mark.parametrize('shared, expected', [
+    # 0.25 * (10 + 11 + 10 + 11) = 10.5: halves round up on every database
+    ({'skills_score': 10, 'experience_score': 11, 'culture_fit_score': 10, 'growth_potential_score': 11}, 11),
+    ({'skills_score': 12, 'experience_score': 13, 'culture_fit_score': 12, 'growth_potential_score': 13}, 13),
+    # Fractional scores are truncated before weighting, as _calculate_overall_score does
+    ({'skills_score': 72.9, 'experience_score': '61.7', 'culture_fit_score': 50, 'growth_potential_score': 40,
+      'preferences_bonus': 2}, 58),
+])
+def test_sql_rescore_rounds_halves_up(resume, job, shared, expected):
+    job.matching_weights = {'skills': 1, 'experience': 1, 'culture_fit': 1, 'growth_potential': 1}
+    job.save(update_fields=['matching_weights'])
+    AIAnalysisReport.objects.create(resume=resume, job=job, overall_score=0, report_data={'shared': dict(shared)})
+
+    assert ai_analysis_service._calculate_overall_score(shared, ai_analysis_service._get_employer_weights(job)) == expected
+    ai_analysis_service.rescore_reports(job)
+    assert AIAnalysisReport.objects.get(job=job).overall_score == expected
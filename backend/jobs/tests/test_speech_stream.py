@@ -0,0 +1,92 @@
+import json
+import asyncio
+from asgiref.testing import ApplicationCommunicator
+from jobs.consumers import STTConsumer
+from jobs.services.speech_stream_service import (
+    FakeStreamingBackend, SpeechStream, SpeechStreamOverflow, SpeechStreamService, speech_stream_service,
+)
+
+
+async def _recognise(stream, frames):
+    for frame in frames:
+        assert await stream.feed(frame)
+    stream.finish()
+    return [event async for event in stream.results()]
+
+
+def test_interim_results_then_final_transcript():
+    async def run():
+        stream = SpeechStream(FakeStreamingBackend(), asyncio.get_running_loop(), max_chunks=8).start()
+        events = await _recognise(stream, [b'I built', b'a Django', b'service'])
+        return stream, events
+
+    stream, events = asyncio.run(run())
+    assert events[:3] == [('I built', False), ('I built a Django', False), ('I built a Django service', False)]
+    assert events[-1] == ('I built a Django service', True)
+    assert stream.transcript == 'I built a Django service'
+    assert stream.error is None
+
+
+def test_feed_waits_for_a_slow_recogniser_instead_of_dropping_frames():
+    async def run():
+        stream = SpeechStream(FakeStreamingBackend(delay_ms=30), asyncio.get_running_loop(), max_chunks=2).start()
+        return stream, await _recognise(stream, [f'w{i}'.encode() for i in range(8)])
+
+    stream, events = asyncio.run(run())
+    assert events[-1] == (' '.join(f'w{i}' for i in range(8)), True)
+
+
+def test_feed_abandons_the_utterance_when_recogniser_stays_behind():
+    async def run():
+        stream = SpeechStream(FakeStreamingBackend(delay_ms=500), asyncio.get_running_loop(), max_chunks=1,
+                              feed_timeout=0.05).start()
+        accepted = [await stream.feed(b'word') for _ in range(4)]
+        [event async for event in stream.results()]
+        return stream, accepted
+
+    stream, accepted = asyncio.run(run())
+    # Nothing is fed after the first refused frame, so the recogniser never sees a gap
+    assert accepted == [True, True, False, False]
+    assert isinstance(stream.error, SpeechStreamOverflow)
+    assert stream.transcript == 'word word'
+
+
+def test_consumer_drops_the_rest_of_an_abandoned_utterance(monkeypatch):
+    monkeypatch.setitem(speech_stream_service.config, 'BACKEND', {'type': 'fake', 'delay_ms': 500})
+    monkeypatch.setitem(speech_stream_service.config, 'QUEUE_MAX_CHUNKS', 1)
+    monkeypatch.setitem(speech_stream_service.config, 'FEED_TIMEOUT_SECONDS', 0.05)
+
+    async def run():
+        # channels.testing needs daphne, so drive the consumer through the raw ASGI websocket protocol
+        communicator = ApplicationCommunicator(STTConsumer.as_asgi(), {'type': 'websocket', 'path': '/ws/stt/', 'headers': []})
+        await communicator.send_input({'type': 'websocket.connect'})
+        assert (await communicator.receive_output(timeout=2))['type'] == 'websocket.accept'
+
+        async def reply():
+            return json.loads((await communicator.receive_output(timeout=2))['text'])
+
+        statuses = []
+        for _ in range(3):
+            await communicator.send_input({'type': 'websocket.receive', 'bytes': b'word'})
+            statuses.append((await reply())['status'])
+        await communicator.send_input({'type': 'websocket.receive', 'bytes': b'word'})
+        dropped = await communicator.receive_nothing(timeout=0.2)
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'action': 'end'})})
+        ended = await reply()
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(timeout=2)
+        return statuses, dropped, ended
+
+    statuses, dropped, ended = asyncio.run(run())
+    assert statuses == ['chunk_received', 'chunk_received', 'error']
+    assert dropped
+    assert ended['status'] == 'error'
+
+
+def test_backend_is_chosen_from_config():
+    service = SpeechStreamService(config={'BACKEND': {'type': 'fake', 'delay_ms': 5}})
+    backend = service.build_backend()
+    assert isinstance(backend, FakeStreamingBackend)
+    assert backend.delay == 0.005
+    dotted = SpeechStreamService(config={'BACKEND': {'type': 'jobs.services.speech_stream_service.FakeStreamingBackend'}})
+    assert isinstance(dotted.build_backend(), FakeStreamingBackend)
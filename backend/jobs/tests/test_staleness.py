@@ -0,0 +1,54 @@
+import pytest
+from jobs.models import AIAnalysisReport
+from jobs.services.ai_analysis_service import REPORT_VERSION, ai_analysis_service
+from jobs.services.ranking_cascade_service import ranking_cascade_service
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def report(resume, job):
+    return AIAnalysisReport.objects.create(
+        resume=resume, job=job, overall_score=81, report_version=REPORT_VERSION,
+        report_data={'shared': {'skills_score': 90}},
+        content_fingerprints=ai_analysis_service.compute_fingerprints(resume, job),
+    )
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    def create_batch_analysis(resume, jobs):
+        calls.append([job.id for job in jobs])
+        return {str(job.id): None for job in jobs}
+
+    monkeypatch.setattr(ai_analysis_service, '_create_batch_analysis', create_batch_analysis)
+    return calls
+
+
+def test_batch_reuses_report_for_unchanged_job(resume, job, report, generated):
+    reports = ai_analysis_service.analyze_jobs(resume, [job])
+    assert reports[str(job.id)] == report
+    assert generated == []
+
+
+def test_batch_regenerates_report_after_job_edit(resume, job, report, generated):
+    job.description = 'Build data pipelines with Spark'
+    job.save()
+
+    ai_analysis_service.analyze_jobs(resume, [job])
+    assert generated == [[job.id]]
+    report.refresh_from_db()
+    assert report.is_stale
+
+
+def test_cascade_ignores_report_after_job_edit(resume, job, report):
+    candidates = [{'job': job}]
+    ranking_cascade_service._llm_stage(resume, candidates)
+    assert candidates[0]['ai_match_score'] == 81
+
+    job.requirements = ['Scala']
+    job.save()
+    ranking_cascade_service._llm_stage(resume, candidates)
+    assert candidates[0]['ai_match_score'] is None
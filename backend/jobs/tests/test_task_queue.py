@@ -0,0 +1,64 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from jobs.models import BackgroundTask
+from jobs.services.task_queue_service import TaskQueueService, register_task
+from jobs.tasks import enqueue_analysis_report
+
+pytestmark = pytest.mark.django_db
+
+FLAKY = 'test_flaky_task'
+
+
+@register_task(FLAKY)
+def flaky_task(fail=True):
+    if fail:
+        raise RuntimeError('boom')
+    return {'ok': True}
+
+
+@pytest.fixture
+def queue():
+    return TaskQueueService()
+
+
+def test_duplicate_requests_share_one_task(queue, resume, job, student):
+    employer = type(student).objects.create_user(email='employer@example.com', password='password')
+    first = enqueue_analysis_report(resume, job, requested_by=student)
+    second = enqueue_analysis_report(resume, job, priority=BackgroundTask.Priority.INTERACTIVE, requested_by=employer)
+    assert second.id == first.id
+    assert BackgroundTask.objects.get(id=first.id).priority == BackgroundTask.Priority.INTERACTIVE
+    # Both requesters may poll the shared task
+    assert queue.visible_to(employer).filter(id=first.id).exists()
+    assert queue.visible_to(student).filter(id=first.id).exists()
+
+    forced = enqueue_analysis_report(resume, job, force_refresh=True, requested_by=employer)
+    assert forced.id != first.id and forced.payload['force_refresh'] is True
+
+
+def test_claim_orders_by_priority_and_hands_each_task_out_once(queue):
+    low = queue.enqueue(FLAKY, {'fail': False}, priority=BackgroundTask.Priority.BATCH)
+    high = queue.enqueue(FLAKY, {'fail': False}, priority=BackgroundTask.Priority.INTERACTIVE)
+    assert queue.claim('worker-a').id == high.id
+    assert queue.claim('worker-b').id == low.id
+    assert queue.claim('worker-c') is None
+
+    # A lapsed visibility timeout makes the task claimable again
+    BackgroundTask.objects.filter(id=low.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+    reclaimed = queue.claim('worker-c')
+    assert reclaimed.id == low.id and reclaimed.attempts == 2 and reclaimed.locked_by == 'worker-c'
+
+
+def test_failures_back_off_then_fail_permanently(queue):
+    task = queue.enqueue(FLAKY, {'fail': True}, max_attempts=2)
+    queue.run(queue.claim('worker'))
+    task.refresh_from_db()
+    assert task.status == BackgroundTask.Status.QUEUED
+    assert task.run_after > timezone.now() + timedelta(seconds=queue.backoff_base * 0.7)
+    assert 'boom' in task.last_error
+    assert queue.claim('worker') is None  # still backing off
+
+    BackgroundTask.objects.filter(id=task.id).update(run_after=timezone.now())
+    queue.run(queue.claim('worker'))
+    task.refresh_from_db()
+    assert task.status == BackgroundTask.Status.FAILED and task.attempts == 2
@@ -1,7 +1,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import JobViewSet, ApplicationViewSet, SkillListAPIView, MyApplicationsAPIView, ActiveResumeAPIView, SavedJobViewSet, AnalyzeCVAPIView, ResumeUploadAPIView, ResumeDownloadAPIView
+from .views import JobViewSet, ApplicationViewSet, SkillListAPIView, MyApplicationsAPIView, ActiveResumeAPIView, SavedJobViewSet, AnalyzeCVAPIView, ResumeUploadAPIView, ResumeDownloadAPIView, TaskStatusAPIView
 
 router = DefaultRouter()
 router.register(r'jobs', JobViewSet, basename='job')
@@ -17,4 +17,5 @@ urlpatterns = [
     path('cv/analyze/', AnalyzeCVAPIView.as_view(), name='analyze-cv'), 
     path('cv/upload/', ResumeUploadAPIView.as_view(), name='upload-cv'),
     path('cv/<uuid:pk>/download/', ResumeDownloadAPIView.as_view(), name='download-cv'),
+    path('tasks/<uuid:pk>/', TaskStatusAPIView.as_view(), name='task-status'),
 ] 
\ No newline at end of file
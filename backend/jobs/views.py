@@ -6,10 +6,21 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from .models import Job, Application, Skill, AIAnalysisReport, SavedJob, AIInterview, AIInterviewReport
-from .serializers import JobSerializer, ApplicationSerializer, SkillSerializer, AIAnalysisReportSerializer, AIInterviewSerializer, AIInterviewReportSerializer
+from .models import Job, Application, Skill, AIAnalysisReport, SavedJob, AIInterview, AIInterviewReport, BackgroundTask
+from .serializers import JobSerializer, ApplicationSerializer, SkillSerializer, AIAnalysisReportSerializer, AIInterviewSerializer, AIInterviewReportSerializer, BackgroundTaskSerializer
 from .permissions import IsEmployerOrReadOnly
 from .services.ai_analysis_service import ai_analysis_service
+from .services.analysis_lock_service import AnalysisInProgress
+from .services.rate_limiter_service import RateLimitExceeded, rate_limiter_service
+from .services.tts_service import DEFAULT_VOICE, TTSUnavailable, tts_service
+from .services.audio_buffer import AudioBuffer, AudioTooLarge
+from .services.audio_transcode_service import (
+    SAMPLE_RATE as TRANSCODE_SAMPLE_RATE, SAMPLE_WIDTH as TRANSCODE_SAMPLE_WIDTH, TranscodeError, TranscoderBusy,
+    audio_transcode_service,
+)
+from .services.local_stt_service import LocalSTTBusy, local_stt_service
+from .services.task_queue_service import task_queue_service
+from .tasks import enqueue_analysis_report, enqueue_interview_report
 from accounts.models import Resume
 from .services.embedding_service import embedding_service
 from django.db import models
@@ -18,27 +29,27 @@ from django.conf import settings
 from django.utils import timezone
 from .services.vector_scoring_service import VectorScoringService
 vector_scoring_service = VectorScoringService()
+from .services.ranking_cascade_service import ranking_cascade_service
 from django.db import transaction
 from .services.ai_interview_service import interview_service
-from .services.ai_interview_service import ai_interview_service
 
 import os
 import uuid
 import logging
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.http import HttpResponse
-import tempfile
-import subprocess
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from .renderers import EventStreamRenderer, format_sse, iterate_in_thread
 import json
 try:
-    from google.cloud import speech, texttospeech
+    from google.cloud import speech
     from google.cloud import storage
     GOOGLE_CLOUD_AVAILABLE = True
 except ImportError:
     GOOGLE_CLOUD_AVAILABLE = False
     speech = None
-    texttospeech = None
     storage = None
 import wave
 import io
@@ -177,10 +188,38 @@ class JobViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+        # Optionally hand generation to the background workers instead of running it in this request
+        run_async = request.query_params.get('async', str(getattr(settings, 'AI_ANALYSIS_ASYNC', False))).lower() == 'true'
+        if run_async:
+            report = AIAnalysisReport.objects.filter(resume=primary_resume, job=job).first()
+            if (report and not ai_analysis_service.check_staleness(report, primary_resume, job)
+                    and ai_analysis_service.has_sections(report, ai_analysis_service.sections_for('student'))):
+                ai_analysis_service.record_view(report)
+                return Response(AIAnalysisReportSerializer(report).data, status=status.HTTP_200_OK)
+            task = enqueue_analysis_report(primary_resume, job, priority=BackgroundTask.Priority.INTERACTIVE,
+                                           requested_by=user, audience='student')
+            return Response({
+                "status": "processing",
+                "processing": True,
+                "task_id": str(task.id),
+                "message": "AI analysis report is being generated. Please check back in a few moments."
+            }, status=status.HTTP_202_ACCEPTED)
+
+        # Clients polling with a token from a previous 202 should not block again
+        wait_timeout = 0 if request.query_params.get('poll_token') else None
         try:
-            report = ai_analysis_service.get_or_create_analysis(primary_resume, job)
+            # Students only see the shared scores and their own view; the employer view is generated when an employer asks
+            report = ai_analysis_service.get_or_create_analysis(primary_resume, job, wait_timeout=wait_timeout, audience='student')
+            ai_analysis_service.record_view(report)
             serializer = AIAnalysisReportSerializer(report)
             return Response(serializer.data, status=status.HTTP_200_OK)
+        except AnalysisInProgress as e:
+            return Response({
+                "status": "processing",
+                "processing": True,
+                "poll_token": str(e.poll_token),
+                "message": "AI analysis report is being generated. Please check back in a few moments."
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             # Log the exception
             return Response(
@@ -188,6 +227,52 @@ class JobViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+    @action(
+        detail=True,
+        methods=['get'],
+        permission_classes=[permissions.IsAuthenticated],
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+        url_path='analysis/stream'
+    )
+    def analysis_stream(self, request, pk=None):
+        """
+        Server-sent events variant of `analysis`. Forwards model output as it is generated
+        (`delta`), emits each report section as soon as it closes (`section`: shared scores
+        first, then the student view) and finishes with the persisted report.
+        """
+        job = self.get_object()
+        user = request.user
+
+        if not hasattr(user, 'student_profile'):
+            return Response({"error": "User does not have a student profile."}, status=status.HTTP_400_BAD_REQUEST)
+
+        primary_resume = user.student_profile.resumes.filter(is_primary=True).first()
+        if not primary_resume:
+            return Response(
+                {"error": "No primary resume found for the user. Please upload a resume."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def event_stream():
+            try:
+                for event in ai_analysis_service.stream_analysis(primary_resume, job, audience='student'):
+                    if event['event'] == 'report':
+                        ai_analysis_service.record_view(event['report'])
+                        yield format_sse('report', AIAnalysisReportSerializer(event['report']).data)
+                    else:
+                        yield format_sse(event['event'], event['data'])
+            except Exception as e:
+                logger.error(f"Streaming analysis failed for job {job.id}: {e}", exc_info=True)
+                yield format_sse('error', {"error": "An unexpected error occurred while generating the analysis report."})
+
+        events = event_stream()
+        if isinstance(request._request, ASGIRequest):
+            events = iterate_in_thread(events)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # disable proxy buffering (nginx)
+        return response
+
     # ---------------- Saved job actions ----------------
 
     @action(detail=True, methods=['get', 'post', 'delete'], permission_classes=[permissions.IsAuthenticated])
@@ -225,23 +310,55 @@ class JobViewSet(viewsets.ModelViewSet):
         """Alias for analysis endpoint expected by the legacy frontend"""
         return self.analysis(request, pk)
 
+    def _ranked_matches(self, request, limit):
+        """Run the ranking cascade for the user's resume (cv_id or primary) and serialize the results."""
+        profile = getattr(request.user, 'student_profile', None)
+        if profile is None:
+            return None, None
+        cv_id = request.query_params.get('cv_id') or request.query_params.get('resume_id')
+        resumes = profile.resumes.all()
+        resume = resumes.filter(id=cv_id).first() if cv_id else resumes.filter(is_primary=True).first()
+        if resume is None or not resume.embedding:
+            return None, None
+
+        ranking = ranking_cascade_service.rank_jobs(resume, limit=limit)
+        ranked = ranking['results']
+        context = {
+            'request': request,
+            'vector_scores': {str(c['job'].id): c['vector_score'] for c in ranked},
+            'ai_match_scores': {str(c['job'].id): c['ai_match_score'] for c in ranked},
+        }
+        data = JobSerializer([c['job'] for c in ranked], many=True, context=context).data
+        for item, candidate in zip(data, ranked):
+            item['match_score'] = round(candidate['score'], 1)
+            item['match_stage'] = candidate['stage']
+        meta = {'timings_ms': ranking['timings_ms'], 'counts': ranking['counts']}
+        return data, meta
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='ai-match')
     def list_ai_match(self, request):
-        """Return a list of jobs ordered by AI match score (simplified placeholder)."""
+        """
+        Return jobs ordered by match score using the vector -> re-rank -> LLM cascade.
+        LLM scores are attached only where a report already exists; none are generated here.
+        """
         limit = int(request.query_params.get('limit', 10))
-        force_reparse = request.query_params.get('force_reparse', 'false').lower() == 'true'
-            
-        # Placeholder implementation: return the most recent active jobs
-        jobs_qs = Job.objects.filter(is_active=True).order_by('-created_at')[:limit]
-        serializer = JobSerializer(jobs_qs, many=True, context={'request': request})
-        return Response({'results': serializer.data})
+        data, meta = self._ranked_matches(request, limit)
+        if data is None:
+            # No resume embedding yet: fall back to the most recent active jobs
+            jobs_qs = Job.objects.filter(is_active=True).order_by('-created_at')[:limit]
+            serializer = JobSerializer(jobs_qs, many=True, context={'request': request})
+            return Response({'results': serializer.data, 'processing': True})
+        return Response({'results': data, 'cascade': meta})
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='top-matches')
     def top_matches(self, request):
         limit = int(request.query_params.get('limit', 10))
-        jobs_qs = Job.objects.filter(is_active=True).order_by('-created_at')[:limit]
-        serializer = JobSerializer(jobs_qs, many=True, context={'request': request})
-        return Response({'top_matches': serializer.data})
+        data, meta = self._ranked_matches(request, limit)
+        if data is None:
+            jobs_qs = Job.objects.filter(is_active=True).order_by('-created_at')[:limit]
+            serializer = JobSerializer(jobs_qs, many=True, context={'request': request})
+            return Response({'top_matches': serializer.data, 'processing': True})
+        return Response({'top_matches': data, 'cascade': meta})
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='vector-score')
     def vector_score(self, request, pk=None):
@@ -303,7 +420,7 @@ class MyApplicationsAPIView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Application.objects.filter(applicant=self.request.user).select_related('job', 'resume').order_by('-applied_at')
+        return Application.objects.filter(applicant=self.request.user).select_related('job', 'resume', 'interview').prefetch_related('interview__utterances').order_by('-applied_at')
 
 
 class ActiveResumeAPIView(generics.RetrieveAPIView):
@@ -330,7 +447,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Users can only see their own applications."""
-        return Application.objects.filter(applicant=self.request.user).select_related('job', 'resume', 'job__company', 'interview')
+        return Application.objects.filter(applicant=self.request.user).select_related('job', 'resume', 'job__company', 'interview').prefetch_related('interview__utterances')
 
     def perform_create(self, serializer):
         """Assign the current user as the applicant and create the AI interview."""
@@ -351,7 +468,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             interview = interview_service.start_interview(application)
             return Response({
                 'interview_id': str(interview.id),
-                'questions': interview.questions,
+                'questions': interview.questions_and_answers()[0],
                 'status': interview.status,
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -391,6 +508,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
 
         # Handle optional audio file upload
         audio_file = request.FILES.get('audio')
+        if audio_file and audio_file.size > settings.AUDIO_UPLOAD_MAX_SIZE:
+            return Response({'error': str(AudioTooLarge(settings.AUDIO_UPLOAD_MAX_SIZE))}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         if audio_file:
             try:
                 # Use a unique filename for the uploaded audio
@@ -418,6 +537,34 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             logger.error(f"Error submitting answer for interview {interview.id}: {e}", exc_info=True)
             return Response({'error': 'Failed to process answer and get next question.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='partial-answer')
+    def partial_answer(self, request, pk=None):
+        """
+        Receives the transcript of an answer still being given, so the next question can be
+        drafted before the candidate submits. Returns 202; drafting happens in the background.
+        """
+        application = self.get_object()
+        interview = get_object_or_404(AIInterview, application=application)
+        text = request.data.get('text', '')
+        if not text:
+            return Response({'error': 'Partial answer text is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        drafting = interview_service.draft_next_question(interview, text)
+        return Response({'drafting': drafting}, status=status.HTTP_202_ACCEPTED)
+
+    def _speculate_next_question(self, user, application_id, stt_response):
+        """Start drafting the follow-up question from a fresh transcript of an interview answer."""
+        transcript = (stt_response.data or {}).get('transcript') if stt_response.status_code == 200 else None
+        if not transcript:
+            return
+        try:
+            interview = AIInterview.objects.select_related('application__job', 'application__resume').filter(
+                application_id=application_id, application__applicant=user, status=AIInterview.Status.IN_PROGRESS
+            ).first()
+            if interview:
+                interview_service.draft_next_question(interview, transcript)
+        except Exception as e:
+            logger.warning(f"[STT] Could not start follow-up draft for application {application_id}: {e}")
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='generate-ai-interview-report')
     def generate_ai_interview_report(self, request, pk=None):
         """
@@ -425,13 +572,23 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         """
         application = self.get_object()
         interview = get_object_or_404(AIInterview, application=application)
-        try:
-            report = ai_interview_service.generate_final_report(interview.id)
-            serializer = AIInterviewReportSerializer(report)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            logger.error(f"Error generating AI interview report for application {pk}: {e}", exc_info=True)
-            return Response({'error': 'Failed to generate AI interview report.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        report = AIInterviewReport.objects.filter(interview=interview).order_by('-created_at').first()
+        if report:
+            return Response(AIInterviewReportSerializer(report).data, status=status.HTTP_200_OK)
+        if interview.status != AIInterview.Status.COMPLETED:
+            return Response({'error': 'Interview must be completed to generate a report.'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._interview_report_processing(interview, request.user)
+
+    def _interview_report_processing(self, interview, user):
+        """Make sure report generation is queued (collapsing onto the active task) and answer 202."""
+        task = enqueue_interview_report(interview, priority=BackgroundTask.Priority.INTERACTIVE, requested_by=user)
+        return Response({
+            "status": "processing",
+            "processing": True,
+            "task_id": str(task.id),
+            "task_status": task.status,
+            "message": "AI interview report is being generated. Please check back in a few moments."
+        }, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='ai-interview-report')
     def get_ai_interview_report(self, request, pk=None):
@@ -442,6 +599,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         interview = get_object_or_404(AIInterview, application=application)
         report = AIInterviewReport.objects.filter(interview=interview).order_by('-created_at').first()
         if not report:
+            if interview.status == AIInterview.Status.COMPLETED:
+                return self._interview_report_processing(interview, request.user)
             return Response({'error': 'No AI interview report found for this application.'}, status=status.HTTP_404_NOT_FOUND)
         serializer = AIInterviewReportSerializer(report)
         return Response(serializer.data)
@@ -455,6 +614,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             return Response({'error': 'No audio file provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
         audio_file = request.FILES['audio']
+        if audio_file.size > settings.AUDIO_UPLOAD_MAX_SIZE:
+            return Response({'error': str(AudioTooLarge(settings.AUDIO_UPLOAD_MAX_SIZE))}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         
         # Log content type for debugging
         logger.info(f"Received audio file with content type: {audio_file.content_type}")
@@ -510,17 +671,16 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 'details': 'Supported audio: webm, ogg, opus, wav, mp3, mpeg, aac, m4a'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Save a debug copy
         try:
-            ext = (audio_file.name.split('.')[-1] if audio_file.name and '.' in audio_file.name else 'webm')
-            debug_file = f"user_uploads/interview_audio/candidate_{pk}_{uuid.uuid4()}.{ext}"
-            file_path = default_storage.save(debug_file, audio_file)
-            logger.info(f"[STT] Saved uploaded audio for debugging: {file_path}")
-            audio_file.seek(0)
-        except Exception as e:
-            logger.warning(f"[STT] Could not save candidate audio for debugging: {e}")
+            audio = AudioBuffer.from_upload(audio_file)
+        except AudioTooLarge as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # Optional debug copy, written in the background
+        ext = (audio_file.name.split('.')[-1] if audio_file.name and '.' in audio_file.name else 'webm')
+        audio.save_debug_copy(f"user_uploads/interview_audio/candidate_{pk}_{uuid.uuid4()}.{ext}")
 
-        # Use Google Cloud STT if available, else fallback
+        # Google Cloud STT when configured, else the local model, else speech_recognition
         try:
             google_credentials_available = (
                 GOOGLE_CLOUD_AVAILABLE
@@ -528,22 +688,37 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 and settings.GOOGLE_APPLICATION_CREDENTIALS
                 and os.path.exists(settings.GOOGLE_APPLICATION_CREDENTIALS)
             )
-            audio_file.seek(0)
             if google_credentials_available:
-                return self._google_stt(audio_file)
+                response = self._google_stt(audio, content_type)
+            elif local_stt_service.available:
+                response = self._local_stt(audio)
             else:
-                return self._fallback_stt(audio_file)
+                response = self._fallback_stt(audio, content_type)
+            self._speculate_next_question(request.user, pk, response)
+            return response
+        except RateLimitExceeded as e:
+            return self._rate_limited_response(e)
         except Exception as e:
             logger.error(f"[STT] Speech-to-text failed: {e}", exc_info=True)
             return Response({'error': f'Speech-to-text failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            audio.close()
+
+    def _rate_limited_response(self, error):
+        retry_after = max(1, round(error.retry_after))
+        return Response({'error': 'Speech service is busy, please retry shortly.', 'retry_after': retry_after},
+                        status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(retry_after)})
+
+    def _stt_busy_response(self):
+        return Response({'error': 'Speech service is busy, please retry shortly.', 'retry_after': 2},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '2'})
 
-    def _google_stt(self, audio_file):
+    def _google_stt(self, audio, content_type):
         """Google Cloud Speech-to-Text implementation with enhanced tech term recognition"""
         client = speech.SpeechClient()
-        audio_content = audio_file.read()
+        audio_content = audio.read_bytes()
         
         # Determine audio encoding based on file type
-        content_type = audio_file.content_type.lower()
         if 'wav' in content_type:
             encoding = speech.RecognitionConfig.AudioEncoding.LINEAR16
             sample_rate = 16000
@@ -614,7 +789,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             model="latest_long"
         )
         
-        response = client.recognize(config=config, audio=audio)
+        response = rate_limiter_service.call('google_speech', client.recognize, config=config, audio=audio)
         
         if not response.results:
             return Response({'error': 'No speech detected in audio file.'}, 
@@ -646,7 +821,30 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             'method': 'google_cloud_enhanced'
         }, status=status.HTTP_200_OK)
 
-    def _fallback_stt(self, audio_file):
+    def _local_stt(self, audio):
+        """Offline STT on the local Whisper process pool"""
+        if audio.size == 0:
+            return Response({'error': 'Audio file is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = local_stt_service.transcribe(audio)
+        except (LocalSTTBusy, TranscoderBusy):
+            return self._stt_busy_response()
+        except TranscodeError as e:
+            logger.error(f"[STT] Audio transcoding failed: {e}")
+            return Response({'error': 'Audio could not be decoded.', 'details': 'Please try recording again.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not result['transcript']:
+            return Response({'error': 'No speech detected in audio file.'}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"[STT] Local STT: {result['audio_seconds']}s audio in {result['latency_ms']}ms (rtf {result['rtf']}, batch {result['batch_size']})")
+        return Response({
+            'transcript': result['transcript'],
+            'language_code': 'en-US',
+            'method': 'local_whisper',
+            'latency_ms': result['latency_ms'],
+            'rtf': result['rtf'],
+        }, status=status.HTTP_200_OK)
+
+    def _fallback_stt(self, audio, content_type):
         """Fallback STT using local speech recognition"""
         if not SPEECH_RECOGNITION_AVAILABLE:
             logger.error("Speech recognition library not available")
@@ -659,111 +857,45 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             recognizer = sr.Recognizer()
             
             # Handle different audio formats
-            content_type = audio_file.content_type.lower()
-            logger.info(f"Fallback STT processing {content_type} file, size: {audio_file.size}")
+            logger.info(f"Fallback STT processing {content_type} file, size: {audio.size}")
             
             # Check if file is empty
-            if audio_file.size == 0:
+            if audio.size == 0:
                 return Response({
                     'error': 'Audio file is empty.',
                     'details': 'Please record some audio before submitting.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # For webm files, we need special handling
-            if 'webm' in content_type:
-                logger.info("Processing webm audio file")
+            # sr.AudioFile only reads WAV/AIFF/FLAC; anything else is decoded to PCM in memory
+            if not any(fmt in content_type for fmt in ('wav', 'aiff', 'flac')):
                 try:
-                    # Save audio file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
-                        temp_file.write(audio_file.read())
-                        temp_file_path = temp_file.name
-                    
-                    # Try to recognize directly with webm
-                    try:
-                        with sr.AudioFile(temp_file_path) as source:
-                            audio_data = recognizer.record(source)
-                        
-                        transcript = recognizer.recognize_google(audio_data)
-                        os.unlink(temp_file_path)
-                        
-                        logger.info(f"Webm STT successful, transcript: {transcript[:50]}...")
-                        return Response({
-                            'transcript': transcript,
-                            'confidence': 0.8,
-                            'language_code': 'en-US',
-                            'method': 'fallback_webm'
-                        }, status=status.HTTP_200_OK)
-                        
-                    except Exception as webm_error:
-                        logger.warning(f"Direct webm processing failed: {webm_error}")
-                        # Try to convert webm to wav using ffmpeg if available
-                        try:
-                            import subprocess
-                            wav_path = temp_file_path.replace('.webm', '.wav')
-                            
-                            # Use ffmpeg to convert webm to wav
-                            result = subprocess.run([
-                                'ffmpeg', '-i', temp_file_path, 
-                                '-acodec', 'pcm_s16le', 
-                                '-ar', '16000', 
-                                '-ac', '1', 
-                                wav_path, '-y'
-                            ], capture_output=True, text=True, timeout=30)
-                            
-                            if result.returncode == 0 and os.path.exists(wav_path):
-                                logger.info("Successfully converted webm to wav")
-                                
-                                with sr.AudioFile(wav_path) as source:
-                                    audio_data = recognizer.record(source)
-                                
-                                transcript = recognizer.recognize_google(audio_data)
-                                
-                                # Clean up both files
-                                os.unlink(temp_file_path)
-                                os.unlink(wav_path)
-                                
-                                logger.info(f"Converted webm STT successful, transcript: {transcript[:50]}...")
-                                return Response({
-                                    'transcript': transcript,
-                                    'confidence': 0.8,
-                                    'language_code': 'en-US',
-                                    'method': 'fallback_webm_converted'
-                                }, status=status.HTTP_200_OK)
-                            else:
-                                logger.error(f"FFmpeg conversion failed: {result.stderr}")
-                                raise Exception("FFmpeg conversion failed")
-                                
-                        except Exception as convert_error:
-                            logger.error(f"Webm conversion failed: {convert_error}")
-                            os.unlink(temp_file_path)
-                            return Response({
-                                'error': 'Webm audio format not supported in fallback mode.',
-                                'details': 'Please use text input or ensure Google Cloud Speech is configured. You can also try recording in a different format.'
-                            }, status=status.HTTP_400_BAD_REQUEST)
-                
-                except Exception as webm_error:
-                    logger.error(f"Webm processing completely failed: {webm_error}")
+                    pcm = audio_transcode_service.to_pcm(audio)
+                except TranscoderBusy:
+                    return self._stt_busy_response()
+                except TranscodeError as e:
+                    logger.error(f"Audio transcoding failed: {e}")
                     return Response({
-                        'error': 'Failed to process webm audio file.',
-                        'details': 'Please use text input or try recording again.'
+                        'error': f'{content_type or "This"} audio format could not be decoded in fallback mode.',
+                        'details': 'Please use text input or ensure Google Cloud Speech is configured. You can also try recording in a different format.'
                     }, status=status.HTTP_400_BAD_REQUEST)
-            
+                transcript = recognizer.recognize_google(sr.AudioData(pcm, TRANSCODE_SAMPLE_RATE, TRANSCODE_SAMPLE_WIDTH))
+
+                logger.info(f"Transcoded STT successful, transcript: {transcript[:50]}...")
+                return Response({
+                    'transcript': transcript,
+                    'confidence': 0.8,
+                    'language_code': 'en-US',
+                    'method': 'fallback_transcoded'
+                }, status=status.HTTP_200_OK)
+
             # For other formats, try standard processing
             logger.info("Processing standard audio format")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                temp_file.write(audio_file.read())
-                temp_file_path = temp_file.name
-            
-            # Load audio file
-            with sr.AudioFile(temp_file_path) as source:
+            with audio.open() as stream, sr.AudioFile(stream) as source:
                 audio_data = recognizer.record(source)
             
             # Perform recognition
             transcript = recognizer.recognize_google(audio_data)
             
-            # Clean up temp file
-            os.unlink(temp_file_path)
-            
             logger.info(f"Standard STT successful, transcript: {transcript[:50]}...")
             return Response({
                 'transcript': transcript,
@@ -795,103 +927,32 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     def tts(self, request, pk=None):
         """
         Text-to-Speech: Accept text, return audio file URL using Google Cloud Text-to-Speech.
+        Identical text and voice are served from the TTS audio cache without re-synthesising.
         Request: JSON { 'text': ..., 'voice': ... (optional) }
         Response: { 'audio_url': ... }
         """
         text = request.data.get('text')
-        # Use the most human-like neural voice by default
-        voice_name = request.data.get('voice', 'en-US-Chirp3-HD-Charon')  # Default: male, informative
+        voice_name = request.data.get('voice', DEFAULT_VOICE)
         if not text:
             return Response({'error': 'No text provided.'}, status=status.HTTP_400_BAD_REQUEST)
         if len(text) > 5000:  # Limit text length
             return Response({'error': 'Text too long. Maximum 5000 characters.'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         try:
-            # Try Google Cloud TTS first
-            if GOOGLE_CLOUD_AVAILABLE and hasattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS') and settings.GOOGLE_APPLICATION_CREDENTIALS:
-                return self._google_tts(text, voice_name, pk)
-            else:
-                # Fallback to local TTS
-                return self._fallback_tts(text, pk)
-        except Exception as e:
-            logger.error(f"TTS error: {str(e)}")
-            return Response({'error': f'Text-to-speech failed: {str(e)}'}, 
-                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    def _google_tts(self, text, voice_name, pk):
-        """Google Cloud Text-to-Speech implementation with validation and fallback to gTTS if invalid."""
-        import shutil
-        client = texttospeech.TextToSpeechClient()
-        synthesis_input = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
-            name=voice_name,
-            ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3,
-            speaking_rate=0.9,
-            pitch=0.0,
-            volume_gain_db=0.0
-        )
-        response = client.synthesize_speech(
-            input=synthesis_input, voice=voice, audio_config=audio_config
-        )
-        filename = f"tts_{pk}_{uuid.uuid4()}.mp3"
-        save_path = os.path.join('user_uploads', 'interview_audio', filename)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-            temp_file.write(response.audio_content)
-            temp_file.flush()
-            temp_file_path = temp_file.name
-            # Validate file size
-            file_size = os.path.getsize(temp_file_path)
-            if file_size < 2048:  # <2KB is likely invalid
-                logger.error(f"Google TTS generated invalid/empty mp3 (size: {file_size} bytes). Falling back to gTTS.")
-                os.unlink(temp_file_path)
-                # Fallback to gTTS
-                return self._fallback_tts(text, pk)
-            with open(temp_file_path, 'rb') as f:
-                full_path = default_storage.save(save_path, f)
-        os.unlink(temp_file_path)
-        audio_url = os.path.join(settings.MEDIA_URL, full_path)
-        return Response({
-            'audio_url': audio_url,
-            'text_length': len(text),
-            'voice_used': voice_name
-        }, status=status.HTTP_200_OK)
-
-    def _fallback_tts(self, text, pk):
-        """Fallback TTS using gTTS (Google Text-to-Speech)"""
-        try:
-            from gtts import gTTS
-            
-            # Generate audio using gTTS
-            tts = gTTS(text=text, lang='en', slow=False)
-            
-            filename = f"tts_{pk}_{uuid.uuid4()}.mp3"
-            save_path = os.path.join('user_uploads', 'interview_audio', filename)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                tts.save(temp_file.name)
-                temp_file.flush()
-                
-                with open(temp_file.name, 'rb') as f:
-                    full_path = default_storage.save(save_path, f)
-            
-            os.unlink(temp_file.name)
-            audio_url = os.path.join(settings.MEDIA_URL, full_path)
-            
+            result = tts_service.synthesize(text, voice_name)
             return Response({
-                'audio_url': audio_url,
+                'audio_url': result['audio_url'],
                 'text_length': len(text),
-                'voice_used': 'gTTS-fallback'
+                'voice_used': result['voice_used'],
+                'cached': result['cached'],
             }, status=status.HTTP_200_OK)
-            
-        except ImportError:
-            return Response({'error': 'gTTS not available. Please install gtts library.'}, 
-                          status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except RateLimitExceeded as e:
+            return self._rate_limited_response(e)
+        except TTSUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            return Response({'error': f'Fallback TTS failed: {str(e)}'}, 
+            logger.error(f"TTS error: {str(e)}")
+            return Response({'error': f'Text-to-speech failed: {str(e)}'}, 
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='tts-voices')
@@ -901,22 +962,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         Response: { 'voices': [...] }
         """
         try:
-            client = texttospeech.TextToSpeechClient()
-            
-            # Get available voices
-            response = client.list_voices(language_code="en-US")
-            
-            voices = []
-            for voice in response.voices:
-                voices.append({
-                    'name': voice.name,
-                    'language_code': voice.language_codes[0],
-                    'ssml_gender': voice.ssml_gender.name,
-                    'natural_sample_rate_hertz': voice.natural_sample_rate_hertz
-                })
-            
-            return Response({'voices': voices}, status=status.HTTP_200_OK)
-            
+            return Response({'voices': tts_service.list_voices()}, status=status.HTTP_200_OK)
+        except RateLimitExceeded as e:
+            return self._rate_limited_response(e)
         except Exception as e:
             logging.error(f"TTS voices error: {str(e)}")
             return Response({'error': f'Failed to get voices: {str(e)}'}, 
@@ -1120,6 +1168,18 @@ class AnalyzeCVAPIView(generics.GenericAPIView):
             "sections_analysis": {}
         }, status=status.HTTP_200_OK)
 
+# ---------------- Background task status ---------------------------------------
+
+
+class TaskStatusAPIView(generics.RetrieveAPIView):
+    """Poll the status of a background task returned by a 202 response."""
+
+    serializer_class = BackgroundTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return task_queue_service.visible_to(self.request.user)
+
 # ---------------- Resume Download ---------------------------------------------
 
 from django.http import FileResponse, Http404
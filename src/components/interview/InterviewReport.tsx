@@ -50,23 +50,27 @@ export function InterviewReport({ applicationId, onClose, onRetake }: InterviewR
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
+    // Stops polling a still-generating report if the component unmounts
+    const controller = new AbortController();
     const fetchReport = async () => {
       setIsLoading(true);
       setError(null);
       try {
-        const data = await jobService.getInterviewReport(applicationId);
-        setReport(data);
+        const data = await jobService.getInterviewReport(applicationId, undefined, { signal: controller.signal });
+        if (!controller.signal.aborted) setReport(data);
       } catch (err) {
+        if (controller.signal.aborted) return;
         setError("Failed to load the interview report. Please try again later.");
         console.error("Error fetching interview report:", err);
       } finally {
-        setIsLoading(false);
+        if (!controller.signal.aborted) setIsLoading(false);
       }
     };
 
     if (applicationId) {
       fetchReport();
     }
+    return () => controller.abort();
   }, [applicationId]);
 
   if (isLoading) {
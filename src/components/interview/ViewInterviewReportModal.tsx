@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
 import {
   BarChart2,
@@ -36,6 +36,24 @@ export function ViewInterviewReportModal({ applicationId, isOpen, onClose }: Vie
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [isRetrying, setIsRetrying] = useState(false);
+  const [isGenerating, setIsGenerating] = useState(false);
+  const pollRef = useRef<AbortController | null>(null);
+
+  // Fetches the report, polling its background task while the backend answers 202
+  const loadReport = async () => {
+    pollRef.current?.abort();
+    const controller = new AbortController();
+    pollRef.current = controller;
+    setIsGenerating(false);
+    const data = await jobService.getInterviewReport(applicationId, 'employer', {
+      signal: controller.signal,
+      onProcessing: () => setIsGenerating(true),
+    });
+    if (!controller.signal.aborted) {
+      setIsGenerating(false);
+      setReport(data);
+    }
+  };
 
   useEffect(() => {
     const fetchReport = async () => {
@@ -43,9 +61,9 @@ export function ViewInterviewReportModal({ applicationId, isOpen, onClose }: Vie
       setIsLoading(true);
       setError(null);
       try {
-        const data = await jobService.getInterviewReport(applicationId, 'employer');
-        setReport(data);
+        await loadReport();
       } catch (err) {
+        if (pollRef.current?.signal.aborted) return;
         setError("Failed to load the interview report.");
       } finally {
         setIsLoading(false);
@@ -53,6 +71,7 @@ export function ViewInterviewReportModal({ applicationId, isOpen, onClose }: Vie
     };
 
     fetchReport();
+    return () => pollRef.current?.abort();
   }, [applicationId, isOpen]);
 
   const handleRetry = async () => {
@@ -61,11 +80,12 @@ export function ViewInterviewReportModal({ applicationId, isOpen, onClose }: Vie
     setError(null);
     try {
       await jobService.generateInterviewReport(applicationId);
-      const data = await jobService.getInterviewReport(applicationId, 'employer');
-      setReport(data);
+      await loadReport();
     } catch (err) {
+      if (pollRef.current?.signal.aborted) return;
       setError("Failed to regenerate the interview report. Please try again.");
     } finally {
+      setIsGenerating(false);
       setIsRetrying(false);
     }
   };
@@ -108,7 +128,9 @@ export function ViewInterviewReportModal({ applicationId, isOpen, onClose }: Vie
           <DialogDescription>Please wait while we load the interview report.</DialogDescription>
           <div className="flex flex-col items-center justify-center py-12">
             <Loader2 className="h-12 w-12 animate-spin text-indigo-600" />
-            <p className="mt-4 text-lg text-gray-700">Loading interview report...</p>
+            <p className="mt-4 text-lg text-gray-700">
+              {isGenerating ? 'Generating interview report...' : 'Loading interview report...'}
+            </p>
           </div>
         </DialogContent>
       </Dialog>
@@ -24,6 +24,12 @@ export interface JobSearchParams {
 
 export type PaginatedJobsResponse = PaginatedResponse<Job>;
 
+export interface TaskPollOptions {
+  intervalMs?: number;
+  timeoutMs?: number;
+  signal?: AbortSignal;
+}
+
 export interface MatchDetails {
   skills: {
     score: number;
@@ -344,7 +350,11 @@ class JobService {
     return response.data;
   }
 
-  async getInterviewReport(applicationId: string, audience?: string): Promise<any> {
+  async getInterviewReport(
+    applicationId: string,
+    audience?: string,
+    options: TaskPollOptions & { onProcessing?: () => void } = {}
+  ): Promise<any> {
     // Use the appropriate endpoint based on audience
     let url: string;
     if (audience === 'employer') {
@@ -353,10 +363,48 @@ class JobService {
       url = `applications/${applicationId}/ai-interview-report/`;
     }
     
-    const response = await api.get(url);
+    let response = await api.get(url);
+    if (response.status === 202) {
+      // Report is still being generated: wait for its task, then fetch the finished report
+      if (!response.data?.processing || !response.data?.task_id) {
+        throw new Error(response.data?.error || 'Interview report is not yet available.');
+      }
+      options.onProcessing?.();
+      await this.waitForTask(response.data.task_id, options);
+      response = await api.get(url);
+      if (response.status === 202) {
+        throw new Error('Interview report generation did not produce a report.');
+      }
+    }
     return this.flattenReportData(response.data);
   }
 
+  async getTaskStatus(taskId: string): Promise<any> {
+    const response = await api.get(`tasks/${taskId}/`);
+    return response.data;
+  }
+
+  /**
+   * Poll a background task returned by a 202 response until it is no longer processing.
+   * Rejects if the task failed, the timeout passes or the signal is aborted.
+   */
+  async waitForTask(
+    taskId: string,
+    { intervalMs = 3000, timeoutMs = 180000, signal }: TaskPollOptions = {}
+  ): Promise<any> {
+    const deadline = Date.now() + timeoutMs;
+    while (true) {
+      if (signal?.aborted) throw new Error('Polling cancelled.');
+      const task = await this.getTaskStatus(taskId);
+      if (!task.processing) {
+        if (task.status === 'FAILED') throw new Error('Background task failed.');
+        return task;
+      }
+      if (Date.now() + intervalMs > deadline) throw new Error('Timed out waiting for background task.');
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+  }
+
   private flattenReportData(data: any): any {
     if (!data) return data;
     